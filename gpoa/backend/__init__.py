@@ -17,15 +17,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from storage.dconf_registry import (
-    Dconf_registry,
-    add_preferences_to_global_registry_dict,
-    create_dconf_ini_file,
-)
 from util.config import GPConfig
 from util.logging import log
-from util.paths import get_dconf_config_file
-from util.util import get_uid_by_username, touch_file
 from util.windows import smbcreds
 
 from .nodomain_backend import nodomain_backend
@@ -84,27 +77,3 @@ def backend_factory(dc, username, is_machine, no_domain = False):
             log('E8', logdata)
 
     return back
-
-def save_dconf(username, is_machine, nodomain=None):
-    if is_machine:
-        uid = None
-    else:
-        uid = get_uid_by_username(username) if not is_machine else None
-    target_file = get_dconf_config_file(uid)
-    touch_file(target_file)
-    Dconf_registry.apply_template(uid)
-    add_preferences_to_global_registry_dict(username, is_machine)
-    Dconf_registry.update_dict_to_previous()
-    create_dconf_ini_file(target_file, Dconf_registry.global_registry_dict, uid, nodomain)
-
-
-def save_dconf_without_previous(username, is_machine, nodomain=None):
-    if is_machine:
-        uid = None
-    else:
-        uid = get_uid_by_username(username) if not is_machine else None
-    target_file = get_dconf_config_file(uid)
-    touch_file(target_file)
-    Dconf_registry.apply_template(uid)
-    add_preferences_to_global_registry_dict(username, is_machine)
-    create_dconf_ini_file(target_file, Dconf_registry.global_registry_dict, uid, nodomain)
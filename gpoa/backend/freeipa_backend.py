@@ -17,30 +17,28 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
-import smbc
 import re
 
 from .applier_backend import applier_backend
-from pathlib import Path
-from gpt.gpt import gpt, get_local_gpt
+from gpt.gpt import gpt, get_local_gpt, parse_gpts
 from gpt.gpo_dconf_mapping import GpoInfoDconf
 from storage import registry_factory
 from storage.dconf_registry import Dconf_registry, extract_display_name_version
-from storage.fs_file_cache import fs_file_cache
+from util.config import GPConfig
 from util.logging import log
+from util.smbsync import SmbTreeSync
 from util.util import get_uid_by_username
 from util.kerberos import (
-      machine_kinit
-    , machine_kdestroy
+      acquire_machine_ccache
+    , machine_ccache_path
 )
 
 
 class freeipa_backend(applier_backend):
     def __init__(self, ipacreds, username, domain, is_machine):
         self.ipacreds = ipacreds
-        self.cache_path = '/var/cache/gpupdate/creds/krb5cc_{}'.format(os.getpid())
-        self.__kinit_successful = machine_kinit(self.cache_path, "freeipa")
-        if not self.__kinit_successful:
+        self.cache_path = machine_ccache_path("freeipa")
+        if not acquire_machine_ccache("freeipa"):
             raise Exception('kinit is not successful')
 
         self.storage = registry_factory()
@@ -55,14 +53,9 @@ class freeipa_backend(applier_backend):
         self.gpo_cache_part = 'gpo_cache'
         self.gpo_cache_dir = os.path.join(self.cache_dir, self.gpo_cache_part)
         self.storage.set_info('cache_dir', self.gpo_cache_dir)
-        self.file_cache = fs_file_cache("freeipa_gpo", username)
         logdata = {'cachedir': self.cache_dir}
         log('D7', logdata)
 
-    def __del__(self):
-        if self.__kinit_successful:
-            machine_kdestroy()
-
     def retrieve_and_store(self):
         '''
         Retrieve settings and store it in a database - FreeIPA version
@@ -89,9 +82,9 @@ class freeipa_backend(applier_backend):
                 logdata = {'msg': str(exc)}
                 log('E17', logdata)
 
-            for i, gptobj in enumerate(machine_gpts):
+            for gptobj, parsed in zip(machine_gpts, parse_gpts(machine_gpts, 'machine')):
                 try:
-                    gptobj.merge_machine()
+                    gptobj.merge_machine(parsed)
                 except Exception as exc:
                     logdata = {'msg': str(exc)}
                     log('E26', logdata)
@@ -103,9 +96,9 @@ class freeipa_backend(applier_backend):
             except Exception as exc:
                 logdata = {'msg': str(exc)}
                 log('E17', logdata)
-            for i, gptobj in enumerate(user_gpts):
+            for gptobj, parsed in zip(user_gpts, parse_gpts(user_gpts, 'user')):
                 try:
-                    gptobj.merge_user()
+                    gptobj.merge_user(parsed)
                 except Exception as exc:
                     logdata = {'msg': str(exc)}
                     log('E27', logdata)
@@ -194,6 +187,8 @@ class freeipa_backend(applier_backend):
         gpo_cache_dir = os.path.join(cache_dir, domain, 'POLICIES')
         os.makedirs(gpo_cache_dir, exist_ok=True)
 
+        trees = []
+        synced_gpos = []
         for gpo in gpos:
             if not gpo.file_sys_path:
                 continue
@@ -201,10 +196,9 @@ class freeipa_backend(applier_backend):
             try:
                 smb_remote_path = self._convert_to_smb_path(gpo.file_sys_path, server)
                 local_gpo_path = os.path.join(gpo_cache_dir, gpo.name)
-
-                self._download_gpo_directory(smb_remote_path, local_gpo_path)
-                gpo.file_sys_path = local_gpo_path
-
+                manifest_path = os.path.join(gpo_cache_dir, '.{}.manifest'.format(gpo.name))
+                trees.append((smb_remote_path, local_gpo_path, manifest_path))
+                synced_gpos.append(gpo)
             except Exception as e:
                 logdata = {
                     'msg': str(e),
@@ -213,6 +207,10 @@ class freeipa_backend(applier_backend):
                 }
                 log('E38', logdata)
 
+        SmbTreeSync(GPConfig().get_sysvol_workers()).sync(trees)
+        for gpo, (_, local_gpo_path, _) in zip(synced_gpos, trees):
+            gpo.file_sys_path = local_gpo_path
+
     def _convert_to_smb_path(self, windows_path, server):
         match = re.search(r'\\\\[^\\]+\\(.+)', windows_path)
         if not match:
@@ -221,27 +219,3 @@ class freeipa_backend(applier_backend):
         smb_url = f"smb://{server}/{relative_path}"
 
         return smb_url
-
-    def _download_gpo_directory(self, remote_smb_path, local_path):
-        os.makedirs(local_path, exist_ok=True)
-        try:
-            entries = self.file_cache.samba_context.opendir(remote_smb_path).getdents()
-            for entry in entries:
-                if entry.name in [".", ".."]:
-                    continue
-                remote_entry_path = f"{remote_smb_path}/{entry.name}"
-                local_entry_path = os.path.join(local_path, entry.name)
-                if entry.smbc_type == smbc.DIR:
-                    self._download_gpo_directory(remote_entry_path, local_entry_path)
-                elif entry.smbc_type == smbc.FILE:
-                    try:
-                        os.makedirs(os.path.dirname(local_entry_path), exist_ok=True)
-                        self.file_cache.store(remote_entry_path, Path(local_entry_path))
-                    except Exception as e:
-                        logdata = {'exception': str(e), 'file': entry.name}
-                        log('W30', logdata)
-        except Exception as e:
-            logdata = {'exception': str(e), 'remote_folder_path': remote_smb_path}
-            log('W31', logdata)
-
-
@@ -26,10 +26,10 @@ except ImportError:
     from samba.gp.gpclass import check_safe_path
 
 from gpt.gpo_dconf_mapping import GpoInfoDconf
-from gpt.gpt import get_local_gpt, gpt
+from gpt.gpt import get_local_gpt, gpt, parse_gpts
 from storage import registry_factory
 from storage.dconf_registry import Dconf_registry
-from util.kerberos import machine_kdestroy, machine_kinit
+from util.kerberos import acquire_machine_ccache, machine_ccache_path
 from util.logging import log
 from util.sid import get_sid
 from util.util import get_machine_name, get_uid_by_username
@@ -42,9 +42,8 @@ class samba_backend(applier_backend):
     __user_policy_mode_key_win = '/Software/Policies/Microsoft/Windows/System/UserPolicyMode'
 
     def __init__(self, sambacreds, username, domain, is_machine):
-        self.cache_path = '/var/cache/gpupdate/creds/krb5cc_{}'.format(os.getpid())
-        self.__kinit_successful = machine_kinit(self.cache_path)
-        if not self.__kinit_successful:
+        self.cache_path = machine_ccache_path()
+        if not acquire_machine_ccache():
             raise Exception('kinit is not successful')
         self.storage = registry_factory()
         self.storage.set_info('domain', domain)
@@ -71,10 +70,6 @@ class samba_backend(applier_backend):
         logdata = {'cachedir': self.cache_dir}
         log('D7', logdata)
 
-    def __del__(self):
-        if self.__kinit_successful:
-            machine_kdestroy()
-
     def get_policy_mode(self):
         '''
         Get UserPolicyMode parameter value in order to determine if it
@@ -118,9 +113,9 @@ class samba_backend(applier_backend):
             raise exc
 
         if self._is_machine:
-            for gptobj in machine_gpts:
+            for gptobj, parsed in zip(machine_gpts, parse_gpts(machine_gpts, 'machine')):
                 try:
-                    gptobj.merge_machine()
+                    gptobj.merge_machine(parsed)
                 except Exception as exc:
                     logdata = {}
                     logdata['msg'] = str(exc)
@@ -144,9 +139,9 @@ class samba_backend(applier_backend):
             log('D152', logdata)
 
             if policy_mode < 2:
-                for gptobj in user_gpts:
+                for gptobj, parsed in zip(user_gpts, parse_gpts(user_gpts, 'user')):
                     try:
-                        gptobj.merge_user()
+                        gptobj.merge_user(parsed)
                         user_path_gpts.add(gptobj.path)
                     except Exception as exc:
                         logdata = {}
@@ -155,9 +150,10 @@ class samba_backend(applier_backend):
             filtered_machine_gpts = [gpt for gpt in machine_gpts
                                     if gpt.path not in user_path_gpts]
             if policy_mode > 0:
-                for gptobj in filtered_machine_gpts:
+                parsed_gpts = parse_gpts(filtered_machine_gpts, 'user')
+                for gptobj, parsed in zip(filtered_machine_gpts, parsed_gpts):
                     try:
-                        gptobj.merge_user()
+                        gptobj.merge_user(parsed)
                     except Exception as exc:
                         logdata = {}
                         logdata['msg'] = str(exc)
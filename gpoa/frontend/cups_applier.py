@@ -18,7 +18,6 @@
 
 import json
 
-import cups
 from gpt.printers import json2printer
 from util.logging import log
 from util.rpm import is_rpm_installed
@@ -64,6 +63,9 @@ class cups_applier(applier_frontend):
     __module_name = 'CUPSApplier'
     __module_experimental = False
     __module_enabled = True
+    writes = ('cups',)
+    policy_preferences = ('Printers',)
+    reassert = True
 
     def __init__(self, storage):
         self.storage = storage
@@ -78,6 +80,7 @@ class cups_applier(applier_frontend):
             log('W9')
             return
         try:
+            import cups
             self.cups_connection = cups.Connection()
         except Exception as exc:
             logdata = {'exc': exc}
@@ -103,6 +106,8 @@ class cups_applier_user(applier_frontend):
     __module_name = 'CUPSApplierUser'
     __module_experimental = False
     __module_enabled = True
+    policy_preferences = ('Printers',)
+    reassert = True
 
     def __init__(self, storage, username):
         self.storage = storage
@@ -125,6 +130,7 @@ class cups_applier_user(applier_frontend):
             log('W9')
             return
 
+        import cups
         self.cups_connection = cups.Connection()
         self.printers = storage_get_printers(self.storage, self.username)
 
@@ -16,9 +16,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import importlib
+
 from storage import registry_factory
-from storage.fs_file_cache import fs_file_cache
-from util.logging import log
+from storage.policy_digest import ApplierDigests, policy_digest_target
+from util.config import GPConfig
+from util.logging import log, log_watch
+from util.scheduler import run_tasks
 from util.system import with_privileges
 from util.users import (
     get_process_user,
@@ -26,28 +30,60 @@ from util.users import (
     username_match_uid,
 )
 
-from .chromium_applier import chromium_applier
-from .cifs_applier import cifs_applier, cifs_applier_user
-from .control_applier import control_applier
-from .cups_applier import cups_applier
-from .envvar_applier import envvar_applier, envvar_applier_user
-from .file_applier import file_applier, file_applier_user
-from .firefox_applier import firefox_applier
-from .firewall_applier import firewall_applier
-from .folder_applier import folder_applier, folder_applier_user
-from .gsettings_applier import gsettings_applier, gsettings_applier_user
-from .ini_applier import ini_applier, ini_applier_user
-from .kde_applier import kde_applier, kde_applier_user
-from .laps_applier import laps_applier
-from .networkshare_applier import networkshare_applier
-from .ntp_applier import ntp_applier
-from .package_applier import package_applier, package_applier_user
-from .polkit_applier import polkit_applier, polkit_applier_user
-from .scripts_applier import scripts_applier, scripts_applier_user
-from .shortcut_applier import shortcut_applier, shortcut_applier_user
-from .systemd_applier import systemd_applier
-from .thunderbird_applier import thunderbird_applier
-from .yandex_browser_applier import yandex_browser_applier
+# Applier name -> (module of this package, class, constructor arguments
+# taken from frontend_manager attributes). A module is imported only by
+# the pass which runs its applier, and the applier is created only when
+# its policy inputs changed, so a run does not pay for the dependencies
+# and the setup of appliers it skips.
+_MACHINE_APPLIERS = {
+    'laps_applier': ('laps_applier', 'laps_applier', ('storage',)),
+    'control': ('control_applier', 'control_applier', ('storage',)),
+    'polkit': ('polkit_applier', 'polkit_applier', ('storage',)),
+    'systemd': ('systemd_applier', 'systemd_applier', ('storage',)),
+    'firefox': ('firefox_applier', 'firefox_applier', ('storage', 'username')),
+    'thunderbird': ('thunderbird_applier', 'thunderbird_applier', ('storage', 'username')),
+    'chromium': ('chromium_applier', 'chromium_applier', ('storage', 'username')),
+    'yandex_browser': ('yandex_browser_applier', 'yandex_browser_applier', ('storage', 'username')),
+    'shortcuts': ('shortcut_applier', 'shortcut_applier', ('storage',)),
+    'gsettings': ('gsettings_applier', 'gsettings_applier', ('storage', 'file_cache')),
+    'cifs': ('cifs_applier', 'cifs_applier', ('storage',)),
+    'cups': ('cups_applier', 'cups_applier', ('storage',)),
+    'firewall': ('firewall_applier', 'firewall_applier', ('storage',)),
+    'folders': ('folder_applier', 'folder_applier', ('storage',)),
+    'ntp': ('ntp_applier', 'ntp_applier', ('storage',)),
+    'envvar': ('envvar_applier', 'envvar_applier', ('storage',)),
+    'networkshare': ('networkshare_applier', 'networkshare_applier', ('storage',)),
+    'scripts': ('scripts_applier', 'scripts_applier', ('storage',)),
+    'files': ('file_applier', 'file_applier', ('storage', 'file_cache')),
+    'ini': ('ini_applier', 'ini_applier', ('storage',)),
+    'kde': ('kde_applier', 'kde_applier', ('storage',)),
+    'package': ('package_applier', 'package_applier', ('storage',)),
+}
+
+# User appliers are expected to work with user-writable files and
+# settings, mostly in $HOME.
+_USER_APPLIERS = {
+    'shortcuts': ('shortcut_applier', 'shortcut_applier_user', ('storage', 'username')),
+    'folders': ('folder_applier', 'folder_applier_user', ('storage', 'username')),
+    'gsettings': ('gsettings_applier', 'gsettings_applier_user', ('storage', 'file_cache', 'username')),
+    'cifs': ('cifs_applier', 'cifs_applier_user', ('storage', 'username')),
+    'polkit': ('polkit_applier', 'polkit_applier_user', ('storage', 'username')),
+    'envvar': ('envvar_applier', 'envvar_applier_user', ('storage', 'username')),
+    'networkshare': ('networkshare_applier', 'networkshare_applier', ('storage', 'username')),
+    'scripts': ('scripts_applier', 'scripts_applier_user', ('storage', 'username')),
+    'files': ('file_applier', 'file_applier_user', ('storage', 'file_cache', 'username')),
+    'ini': ('ini_applier', 'ini_applier_user', ('storage', 'username')),
+    'kde': ('kde_applier', 'kde_applier_user', ('storage', 'username', 'file_cache')),
+    'package': ('package_applier', 'package_applier_user', ('storage', 'username')),
+}
+
+
+def load_applier_class(module_name, class_name):
+    '''
+    Import the applier module of this package and return the class.
+    '''
+    module = importlib.import_module('.' + module_name, __package__)
+    return getattr(module, class_name)
 
 
 def determine_username(username=None):
@@ -73,14 +109,26 @@ def determine_username(username=None):
     return name
 
 def apply_user_context(user_appliers):
+    '''
+    Run the user context part of *user_appliers* and return the names
+    of those which failed or logged a warning or an error.
+    '''
+    incomplete = list()
     for applier_name, applier_object in user_appliers.items():
         log('D55', {'name': applier_name})
 
         try:
-            applier_object.user_context_apply()
+            with log_watch() as watch:
+                applier_object.user_context_apply()
         except Exception as exc:
             logdata = {'applier': applier_name, 'exception': str(exc)}
             log('E20', logdata)
+            incomplete.append(applier_name)
+            continue
+        if watch.problems:
+            log('D370', {'applier': applier_name, 'problems': watch.problems})
+            incomplete.append(applier_name)
+    return incomplete
 
 class frontend_manager:
     '''
@@ -93,62 +141,138 @@ class frontend_manager:
         self.storage = registry_factory('dconf', username=self.username)
         self.is_machine = is_machine
         self.process_uname = get_process_user()
-        self.file_cache = fs_file_cache('file_cache', self.username)
+        self._file_cache = None
 
-        self.machine_appliers = dict()
-        self.user_appliers = dict()
-        if is_machine:
-            self._init_machine_appliers()
-        else:
-            self._init_user_appliers()
-
-    def _init_machine_appliers(self):
-        self.machine_appliers['laps_applier'] = laps_applier(self.storage)
-        self.machine_appliers['control'] = control_applier(self.storage)
-        self.machine_appliers['polkit'] = polkit_applier(self.storage)
-        self.machine_appliers['systemd'] = systemd_applier(self.storage)
-        self.machine_appliers['firefox'] = firefox_applier(self.storage, self.username)
-        self.machine_appliers['thunderbird'] = thunderbird_applier(self.storage, self.username)
-        self.machine_appliers['chromium'] = chromium_applier(self.storage, self.username)
-        self.machine_appliers['yandex_browser'] = yandex_browser_applier(self.storage, self.username)
-        self.machine_appliers['shortcuts'] = shortcut_applier(self.storage)
-        self.machine_appliers['gsettings'] = gsettings_applier(self.storage, self.file_cache)
-        try:
-            self.machine_appliers['cifs'] = cifs_applier(self.storage)
-        except Exception as exc:
-            logdata = {'applier_name': 'cifs', 'msg': str(exc)}
-            log('E24', logdata)
-        self.machine_appliers['cups'] = cups_applier(self.storage)
-        self.machine_appliers['firewall'] = firewall_applier(self.storage)
-        self.machine_appliers['folders'] = folder_applier(self.storage)
-        self.machine_appliers['ntp'] = ntp_applier(self.storage)
-        self.machine_appliers['envvar'] = envvar_applier(self.storage)
-        self.machine_appliers['networkshare'] = networkshare_applier(self.storage)
-        self.machine_appliers['scripts'] = scripts_applier(self.storage)
-        self.machine_appliers['files'] = file_applier(self.storage, self.file_cache)
-        self.machine_appliers['ini'] = ini_applier(self.storage)
-        self.machine_appliers['kde'] = kde_applier(self.storage)
-        self.machine_appliers['package'] = package_applier(self.storage)
-
-    def _init_user_appliers(self):
-        # User appliers are expected to work with user-writable
-        # files and settings, mostly in $HOME.
-        self.user_appliers['shortcuts'] = shortcut_applier_user(self.storage, self.username)
-        self.user_appliers['folders'] = folder_applier_user(self.storage, self.username)
-        self.user_appliers['gsettings'] = gsettings_applier_user(self.storage, self.file_cache, self.username)
-        try:
-            self.user_appliers['cifs'] = cifs_applier_user(self.storage, self.username)
-        except Exception as exc:
-            logdata = {'applier_name': 'cifs', 'msg': str(exc)}
-            log('E25', logdata)
-        self.user_appliers['polkit'] = polkit_applier_user(self.storage, self.username)
-        self.user_appliers['envvar'] = envvar_applier_user(self.storage, self.username)
-        self.user_appliers['networkshare'] = networkshare_applier(self.storage, self.username)
-        self.user_appliers['scripts'] = scripts_applier_user(self.storage, self.username)
-        self.user_appliers['files'] = file_applier_user(self.storage, self.file_cache, self.username)
-        self.user_appliers['ini'] = ini_applier_user(self.storage, self.username)
-        self.user_appliers['kde'] = kde_applier_user(self.storage, self.username, self.file_cache)
-        self.user_appliers['package'] = package_applier_user(self.storage, self.username)
+        self.appliers = _MACHINE_APPLIERS if is_machine else _USER_APPLIERS
+        self.failed_appliers = list()
+        # Appliers which handled their failures themselves
+        self.incomplete_appliers = list()
+        # Appliers which have to run again although the policy does not
+        # change, see rerun_schedule()
+        self.always_run_appliers = list()
+        self.reassert_appliers = list()
+        self.applier_digests = ApplierDigests(policy_digest_target(self.username, is_machine))
+        config = GPConfig()
+        self.reassert_interval = config.get_reassert_interval()
+        self.applier_workers = config.get_applier_workers()
+
+    @property
+    def file_cache(self):
+        '''
+        File cache of the run, made on first use since it opens a
+        libsmbclient context.
+        '''
+        if self._file_cache is None:
+            from storage.fs_file_cache import fs_file_cache
+            self._file_cache = fs_file_cache('file_cache', self.username)
+        return self._file_cache
+
+    def _create_appliers(self, classes):
+        '''
+        Instantiate the applier *classes*. An applier which can not be
+        created is logged and counted as failed.
+        '''
+        appliers = dict()
+        for applier_name, applier_class in classes.items():
+            arguments = self.appliers[applier_name][2]
+            try:
+                appliers[applier_name] = applier_class(
+                    *(getattr(self, argument) for argument in arguments))
+            except Exception as exc:
+                logdata = {'applier_name': applier_name, 'msg': str(exc)}
+                log('E24' if self.is_machine else 'E25', logdata)
+                self.failed_appliers.append(applier_name)
+        return appliers
+
+    def _select_appliers(self):
+        '''
+        Return the appliers whose policy inputs, as declared by their
+        classes, changed since their last successful run, with the
+        digests of the inputs of every applier.
+        '''
+        selected = dict()
+        digests = dict()
+        for applier_name, (module_name, class_name, _) in self.appliers.items():
+            try:
+                applier_class = load_applier_class(module_name, class_name)
+            except Exception as exc:
+                logdata = {'applier_name': applier_name, 'msg': str(exc)}
+                log('E24' if self.is_machine else 'E25', logdata)
+                self.failed_appliers.append(applier_name)
+                continue
+            digest = self.storage.applier_digest(
+                applier_name, self.username, self.is_machine,
+                getattr(applier_class, 'policy_branches', ()),
+                getattr(applier_class, 'policy_preferences', ()),
+                getattr(applier_class, 'reads_machine_policy', False))
+            digests[applier_name] = digest
+            always_run = digest is None or (
+                getattr(applier_class, 'time_dependent', False)
+                and any(self.storage.filter_entries(branch)
+                        for branch in applier_class.policy_branches))
+            if always_run:
+                self.always_run_appliers.append(applier_name)
+            reassert_interval = 0
+            if getattr(applier_class, 'reassert', False):
+                self.reassert_appliers.append(applier_name)
+                reassert_interval = self.reassert_interval
+            if (self.storage._force or always_run
+                    or self.applier_digests.changed(applier_name, digest, reassert_interval)):
+                selected[applier_name] = applier_class
+            else:
+                log('D337', {'applier': applier_name})
+        return self._create_appliers(selected), digests
+
+    def _prefetch_files(self, appliers):
+        '''
+        Fetch the files on SMB shares the appliers refer to at once, so
+        that they find them in the file cache.
+        '''
+        uris = list()
+        for applier_name, applier_object in appliers.items():
+            if hasattr(applier_object, 'unc_references'):
+                try:
+                    uris.extend(applier_object.unc_references())
+                except Exception as exc:
+                    log('D359', {'applier': applier_name, 'exc': str(exc)})
+        if uris:
+            self.file_cache.prefetch(uris, GPConfig().get_prefetch_workers())
+
+    def _run_appliers(self, appliers, apply):
+        '''
+        Call *apply(applier_name)* for the appliers, running those which
+        do not share state at the same time.
+        '''
+        tasks = [(applier_name,
+                  getattr(applier_object, 'reads', ()),
+                  getattr(applier_object, 'writes', None))
+                 for applier_name, applier_object in appliers.items()]
+        if self.applier_workers > 1 and len(tasks) > 1:
+            log('D360', {'workers': self.applier_workers, 'appliers': len(tasks)})
+        run_tasks(tasks, apply, self.applier_workers)
+
+    def _watch(self, applier_name, call):
+        '''
+        Run *call*, noting the applier as incomplete when it logged a
+        warning or an error, so that it runs again on the next run.
+        '''
+        with log_watch() as watch:
+            call()
+        if watch.problems:
+            log('D370', {'applier': applier_name, 'problems': watch.problems})
+            self.incomplete_appliers.append(applier_name)
+
+    def _save_applier_digests(self, appliers, digests):
+        for applier_name in digests:
+            if (applier_name in self.failed_appliers
+                    or applier_name in self.incomplete_appliers):
+                self.applier_digests.discard(applier_name)
+            elif applier_name in appliers:
+                if 'user_context' in self.failed_appliers:
+                    self.applier_digests.discard(applier_name)
+                else:
+                    self.applier_digests.update(applier_name, digests[applier_name])
+        self.applier_digests.save()
 
     def machine_apply(self):
         '''
@@ -160,44 +284,82 @@ class frontend_manager:
         log('I10')
         log('D16')
 
-        for applier_name, applier_object in self.machine_appliers.items():
+        appliers, digests = self._select_appliers()
+        self._prefetch_files(appliers)
+
+        def apply(applier_name):
             try:
-                applier_object.apply()
+                self._watch(applier_name, appliers[applier_name].apply)
             except Exception as exc:
                 logdata = {'applier_name': applier_name, 'msg': str(exc)}
                 log('E24', logdata)
+                self.failed_appliers.append(applier_name)
+
+        self._run_appliers(appliers, apply)
+        self._save_applier_digests(appliers, digests)
 
     def user_apply(self):
         '''
         Run appliers for users.
         '''
+        appliers, digests = self._select_appliers()
+        self._prefetch_files(appliers)
         if is_root():
-            for applier_name, applier_object in self.user_appliers.items():
+            def admin_context_apply(applier_name):
                 try:
-                    applier_object.admin_context_apply()
+                    self._watch(applier_name, appliers[applier_name].admin_context_apply)
                 except Exception as exc:
                     logdata = {'applier': applier_name, 'exception': str(exc)}
                     log('E19', logdata)
+                    self.failed_appliers.append(applier_name)
+
+            self._run_appliers(appliers, admin_context_apply)
 
             try:
-                with_privileges(self.username, lambda: apply_user_context(self.user_appliers))
+                incomplete = with_privileges(self.username,
+                    lambda: apply_user_context(appliers))
+                self.incomplete_appliers.extend(incomplete or ())
             except Exception as exc:
                 logdata = {'username': self.username, 'exception': str(exc)}
                 log('E30', logdata)
+                self.failed_appliers.append('user_context')
         else:
-            for applier_name, applier_object in self.user_appliers.items():
+            for applier_name, applier_object in appliers.items():
                 try:
-                    applier_object.user_context_apply()
+                    self._watch(applier_name, applier_object.user_context_apply)
                 except Exception as exc:
                     logdata = {'applier_name': applier_name, 'message': str(exc)}
                     log('E11', logdata)
+                    self.failed_appliers.append(applier_name)
+        self._save_applier_digests(appliers, digests)
+
+    def rerun_schedule(self):
+        '''
+        Return the appliers which run on every run and the time of the
+        last run of each applier which re-asserts its state, which are
+        stored with the digest of the policy (see
+        storage.policy_digest.save_policy_digest).
+        '''
+        always_run = set(self.always_run_appliers)
+        reassert = dict()
+        for applier_name in self.reassert_appliers:
+            last_run = self.applier_digests.last_run(applier_name)
+            if last_run is None:
+                always_run.add(applier_name)
+            else:
+                reassert[applier_name] = last_run
+        return sorted(always_run), reassert
 
     def apply_parameters(self):
         '''
-        Decide which appliers to run.
+        Decide which appliers to run. Returns True when every applier
+        finished without an error or a logged problem.
         '''
         if self.is_machine:
             self.machine_apply()
         else:
             self.user_apply()
+        if self._file_cache is not None:
+            self._file_cache.log_stats()
+        return not self.failed_appliers and not self.incomplete_appliers
 
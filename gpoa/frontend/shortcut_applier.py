@@ -21,12 +21,13 @@ import shutil
 
 from gpt.shortcuts import get_ttype, shortcut
 from util.logging import log
-from util.util import get_homedir, homedir_exists, string_to_literal_eval
+from util.util import get_homedir, homedir_exists
 from util.windows_vars import expand_windows_var
 from pathlib import Path
 
 from .applier_frontend import applier_frontend, check_enabled
 from storage.gpp_state import GppStateManager, get_element_type_name, cleanup_shortcut
+from storage.preference_codec import decode_preferences
 
 
 def storage_get_shortcuts(storage, username=None, shortcuts_machine=None):
@@ -108,6 +109,8 @@ class shortcut_applier(applier_frontend):
     __module_name = 'ShortcutsApplier'
     __module_experimental = False
     __module_enabled = True
+    writes = ('file:/',)
+    policy_preferences = ('Shortcuts',)
 
     def __init__(self, storage):
         self.storage = storage
@@ -170,6 +173,8 @@ class shortcut_applier_user(applier_frontend):
     __module_enabled = True
     __REGISTRY_PATH_SHORTCATSMERGE= '/Software/BaseALT/Policies/GPUpdate/ShortcutsMerge'
     __DCONF_REGISTRY_PATH_PREFERENCES_MACHINE = 'Software/BaseALT/Policies/Preferences/Machine'
+    policy_preferences = ('Shortcuts',)
+    reads_machine_policy = True
 
     def __init__(self, storage, username):
         self.storage = storage
@@ -183,7 +188,7 @@ class shortcut_applier_user(applier_frontend):
             storage_machine_dict =  self.storage.get_dictionary_from_dconf_file_db()
             machine_shortcuts = storage_machine_dict.get(
                 self.__DCONF_REGISTRY_PATH_PREFERENCES_MACHINE, dict()).get('Shortcuts')
-            shortcut_objs =  string_to_literal_eval(machine_shortcuts)
+            shortcut_objs = decode_preferences(machine_shortcuts)
             for obj in shortcut_objs:
                 shortcut_machine =shortcut(
                     obj.get('dest'),
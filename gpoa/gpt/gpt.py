@@ -16,6 +16,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, unique
 import os
 from pathlib import Path
@@ -24,6 +25,7 @@ from samba.gp_parse.gp_pol import GPPolParser
 from storage import registry_factory
 from storage.dconf_registry import add_to_dict
 import util
+from util.config import GPConfig
 from util.logging import log
 from util.paths import cache_dir, local_policy_cache, local_policy_path
 import util.preg
@@ -57,10 +59,14 @@ class FileType(Enum):
     SCRIPTS = 'scripts.ini'
     NETWORKSHARES = 'networkshares.xml'
 
-def get_preftype(path_to_file):
+def get_preftype(path_to_file, index=None):
+    '''
+    Return FileType of an existing preference file. Files found in
+    *index* (GptIndex) are not checked on disk again.
+    '''
     fpath = Path(path_to_file)
 
-    if fpath.exists():
+    if (index is not None and str(path_to_file) in index) or fpath.exists():
         file_name = fpath.name.lower()
         for item in FileType:
             if file_name == item.value:
@@ -125,10 +131,9 @@ class gpt:
         if 'default' == self.guid:
             self.guid = 'Local Policy'
 
-        self._machine_path = find_dir(self.path, 'Machine')
-        self._user_path = find_dir(self.path, 'User')
-        self._scripts_machine_path = find_dir(self._machine_path, 'Scripts')
-        self._scripts_user_path = find_dir(self._user_path, 'Scripts')
+        self._index = GptIndex(self.path)
+        self._machine_path = self._index.find_dir('Machine')
+        self._user_path = self._index.find_dir('User')
 
         self.settings_list = [
               'shortcuts'
@@ -146,11 +151,11 @@ class gpt:
         self.settings = {}
         self.settings['machine'] = {}
         self.settings['user'] = {}
-        self.settings['machine']['regpol'] = find_file(self._machine_path, 'registry.pol')
-        self.settings['user']['regpol'] = find_file(self._user_path, 'registry.pol')
+        self.settings['machine']['regpol'] = self._index.find_file('Machine', 'registry.pol')
+        self.settings['user']['regpol'] = self._index.find_file('User', 'registry.pol')
         for setting in self.settings_list:
-            machine_preffile = find_preffile(self._machine_path, setting)
-            user_preffile = find_preffile(self._user_path, setting)
+            machine_preffile = self._index.find_preffile('Machine', setting)
+            user_preffile = self._index.find_preffile('User', setting)
             mlogdata = {'setting': setting, 'prefpath': machine_preffile}
             log('D24', mlogdata)
             self.settings['machine'][setting] = machine_preffile
@@ -158,9 +163,8 @@ class gpt:
             log('D23', ulogdata)
             self.settings['user'][setting] = user_preffile
 
-        self.settings['machine']['scripts'] = find_file(self._scripts_machine_path, 'scripts.ini')
-        self.settings['user']['scripts'] = find_file(self._scripts_user_path, 'scripts.ini')
-
+        self.settings['machine']['scripts'] = self._index.find_file('Machine', 'Scripts', 'scripts.ini')
+        self.settings['user']['scripts'] = self._index.find_file('User', 'Scripts', 'scripts.ini')
 
     def set_name(self, name):
         '''
@@ -168,37 +172,76 @@ class gpt:
         '''
         self.name = name
 
-    def merge_machine(self):
+    def parse(self, part):
         '''
-        Merge machine settings to storage.
+        Parse registry.pol and preference files of the 'machine' or
+        'user' part without touching the storage. Scripts are left to
+        the merge since their numbering follows the merge order. Files
+        that fail to parse are left out, so the merge reads them again
+        and reports the error at the same point as before.
+        '''
+        parsed = {}
+        for preference_name, preference_path in self.settings[part].items():
+            if not preference_path or preference_name == 'scripts':
+                continue
+            try:
+                if preference_name == 'regpol':
+                    parsed[preference_name] = util.preg.load_preg(preference_path)
+                else:
+                    preference_parser = get_parser(get_preftype(preference_path, self._index))
+                    parsed[preference_name] = preference_parser(preference_path)
+            except Exception as exc:
+                log('D339', {'gpt': self.name, 'path': preference_path, 'msg': str(exc)})
+        return parsed
+
+    def _merge_preferences(self, part, parsed, log_code):
+        for preference_name, preference_path in self.settings[part].items():
+            if preference_path:
+                preference_type = get_preftype(preference_path, self._index)
+                logdata = {'pref': preference_type.value}
+                log(log_code, logdata)
+                preference_merger = get_merger(preference_type)
+                if preference_name not in parsed:
+                    preference_parser = get_parser(preference_type)
+                    preference_objects = preference_parser(preference_path)
+                elif preference_name == 'regpol':
+                    preference_objects = parsed['regpol'].entries
+                else:
+                    preference_objects = parsed[preference_name]
+                preference_merger(self.storage, preference_objects, self.name, self.guid)
+
+    def merge_machine(self, parsed=None):
+        '''
+        Merge machine settings to storage. *parsed* is the result of
+        parse('machine') if the files were already parsed.
         '''
         try:
+            if parsed is None:
+                parsed = self.parse('machine')
             # Merge machine policies to registry if possible
             if self.settings['machine']['regpol']:
                 mlogdata = {'polfile': self.settings['machine']['regpol']}
                 log('D34', mlogdata)
-                util.preg.merge_polfile(self.settings['machine']['regpol'], policy_name=self.name, gpo_info=self.gpo_info)
+                util.preg.merge_polfile(self.settings['machine']['regpol'],
+                                        policy_name=self.name,
+                                        gpo_info=self.gpo_info,
+                                        pregfile=parsed.get('regpol'))
             # Merge machine preferences to registry if possible
-            for preference_name, preference_path in self.settings['machine'].items():
-                if preference_path:
-                    preference_type = get_preftype(preference_path)
-                    logdata = {'pref': preference_type.value}
-                    log('D28', logdata)
-                    preference_parser = get_parser(preference_type)
-                    preference_merger = get_merger(preference_type)
-                    preference_objects = preference_parser(preference_path)
-                    preference_merger(self.storage, preference_objects, self.name, self.guid)
+            self._merge_preferences('machine', parsed, 'D28')
         except Exception as exc:
             logdata = {}
             logdata['gpt'] = self.name
             logdata['msg'] = str(exc)
             log('E28', logdata)
 
-    def merge_user(self):
+    def merge_user(self, parsed=None):
         '''
-        Merge user settings to storage.
+        Merge user settings to storage. *parsed* is the result of
+        parse('user') if the files were already parsed.
         '''
         try:
+            if parsed is None:
+                parsed = self.parse('user')
             # Merge user policies to registry if possible
             if self.settings['user']['regpol']:
                 mulogdata = {'polfile': self.settings['user']['regpol']}
@@ -206,91 +249,104 @@ class gpt:
                 util.preg.merge_polfile(self.settings['user']['regpol'],
                                         policy_name=self.name,
                                         username=self.username,
-                                        gpo_info=self.gpo_info)
+                                        gpo_info=self.gpo_info,
+                                        pregfile=parsed.get('regpol'))
             # Merge user preferences to registry if possible
-            for preference_name, preference_path in self.settings['user'].items():
-                if preference_path:
-                    preference_type = get_preftype(preference_path)
-                    logdata = {'pref': preference_type.value}
-                    log('D29', logdata)
-                    preference_parser = get_parser(preference_type)
-                    preference_merger = get_merger(preference_type)
-                    preference_objects = preference_parser(preference_path)
-                    preference_merger(self.storage, preference_objects, self.name, self.guid)
+            self._merge_preferences('user', parsed, 'D29')
         except Exception as exc:
             logdata = {}
             logdata['gpt'] = self.name
             logdata['msg'] = str(exc)
             log('E29', logdata)
 
-def find_dir(search_path, name):
+def parse_gpts(gpts, part, workers=None):
     '''
-    Attempt for case-insensitive search of directory
-
-    :param search_path: Path to get file list from
-    :param name: Name of the directory to search for
+    Parse the 'machine' or 'user' part of every GPT in a thread pool
+    of *workers* threads (``parse-workers`` of gpupdate.ini by default).
+    Results are returned in the order of *gpts*, so merging them one
+    after another keeps GPO precedence.
     '''
-    if not search_path:
-        return None
-
-    try:
-        file_list = os.listdir(search_path)
-        for entry in file_list:
-            dir_path = os.path.join(search_path, entry)
-            if os.path.isdir(dir_path) and name.lower() == str(entry).lower():
-                return dir_path
-    except Exception as exc:
-        log('D276', {'path': search_path, 'name': name, 'exc': str(exc)})
+    if workers is None:
+        workers = GPConfig().get_parse_workers()
 
-    return None
-
-def find_file(search_path, name):
-    '''
-    Attempt for case-insensitive file search in directory.
-    '''
-    if not search_path:
-        return None
+    def parse(gptobj):
+        return gptobj.parse(part)
 
-    if not name:
-        return None
+    if workers < 2 or len(gpts) < 2:
+        return [parse(gptobj) for gptobj in gpts]
+    with ThreadPoolExecutor(max_workers=min(workers, len(gpts))) as executor:
+        return list(executor.map(parse, gpts))
 
-    try:
-        file_list = os.listdir(search_path)
-        for entry in file_list:
-            file_path = os.path.join(search_path, entry)
-            if os.path.isfile(file_path) and name.lower() == str(entry).lower():
-                return file_path
-    except Exception as exc:
-        log('D277', {'path': search_path, 'name': name, 'exc': str(exc)})
-
-    return None
-
-def find_preferences(search_path):
+class GptIndex:
     '''
-    Find 'Preferences' directory
+    Case-insensitive index of the GPT files gpoa reads. The directory
+    tree is walked once with os.scandir(), descending only into the
+    Machine and User parts, their Preferences and Scripts directories
+    and the per-type directories under Preferences.
     '''
-    if not search_path:
-        return None
-
-    return find_dir(search_path, 'Preferences')
-
-def find_preffile(search_path, prefname):
-    '''
-    Find file with path like Preferences/prefname/prefname.xml
-    '''
-    # Look for 'Preferences' directory
-    prefdir = find_preferences(search_path)
-
-    if not prefdir:
-        return None
+    def __init__(self, gpt_path):
+        self.path = gpt_path
+        self._dirs = {}
+        self._files = {}
+        self._file_paths = set()
+        if gpt_path:
+            self._scan(gpt_path, ())
+
+    def _scan(self, search_path, key):
+        subdirs = []
+        try:
+            with os.scandir(search_path) as entries:
+                for entry in entries:
+                    entry_key = key + (entry.name.lower(),)
+                    try:
+                        if entry.is_dir():
+                            # Keep the first match like os.listdir() order did
+                            if entry_key not in self._dirs:
+                                self._dirs[entry_key] = entry.path
+                                if self._descend(entry_key):
+                                    subdirs.append((entry.path, entry_key))
+                        elif entry.is_file():
+                            if entry_key not in self._files:
+                                self._files[entry_key] = entry.path
+                                self._file_paths.add(entry.path)
+                    except OSError:
+                        continue
+        except Exception as exc:
+            name = os.path.basename(search_path)
+            log('D276', {'path': search_path, 'name': name, 'exc': str(exc)})
+        for subdir_path, subdir_key in subdirs:
+            self._scan(subdir_path, subdir_key)
+
+    @staticmethod
+    def _descend(key):
+        if len(key) == 1:
+            return key[0] in ('machine', 'user')
+        if len(key) == 2:
+            return key[1] in ('preferences', 'scripts')
+        return len(key) == 3 and key[1] == 'preferences'
+
+    def __contains__(self, path):
+        return path in self._file_paths
+
+    def find_dir(self, *names):
+        '''
+        Return the path of directory *names* relative to the GPT root
+        compared case-insensitively, or None.
+        '''
+        return self._dirs.get(tuple(name.lower() for name in names))
 
-    # Then search for preference directory
-    pref_dir = find_dir(prefdir, prefname)
-    file_name = '{}.xml'.format(prefname)
-    # And then try to find the corresponding file.
-    pref_file = find_file(pref_dir, file_name)
+    def find_file(self, *names):
+        '''
+        Return the path of file *names* relative to the GPT root
+        compared case-insensitively, or None.
+        '''
+        return self._files.get(tuple(name.lower() for name in names))
 
-    return pref_file
+    def find_preffile(self, part, prefname):
+        '''
+        Find file with path like <part>/Preferences/prefname/prefname.xml
+        '''
+        return self.find_file(part, 'Preferences', prefname, '{}.xml'.format(prefname))
 
 def lp2gpt():
     '''
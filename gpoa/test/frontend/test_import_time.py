@@ -0,0 +1,69 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+
+# Cold import budget of frontend.frontend_manager in milliseconds,
+# GPOA_IMPORT_BUDGET_MS overrides it on slow builders
+IMPORT_BUDGET_MS = int(os.environ.get('GPOA_IMPORT_BUDGET_MS', '1500'))
+
+# Modules only specific appliers need
+LAZY_MODULES = ('jinja2', 'cups', 'smbc', 'Crypto', 'psutil', 'libcng_dpapi')
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    '''
+    Starting gpoa must not import appliers nor their dependencies
+    '''
+    def _python(self, *args):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        result = subprocess.run([sys.executable, *args], env=env,
+                                capture_output=True, text=True, check=True)
+        return result
+
+    def test_appliers_are_not_imported(self):
+        result = self._python('-c', 'import sys, json, frontend.frontend_manager; '
+                                    'print(json.dumps(sorted(sys.modules)))')
+        modules = json.loads(result.stdout)
+        appliers = [name for name in modules
+                    if name.startswith(('frontend.', 'gpoa_lib.frontend.'))
+                    and name.endswith('_applier')]
+        self.assertEqual(appliers, [])
+        for name in LAZY_MODULES:
+            self.assertNotIn(name, modules)
+
+    def test_import_time_budget(self):
+        result = self._python('-X', 'importtime', '-c', 'import frontend.frontend_manager')
+        cumulative = None
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            _, _, us, name = (field.strip() for field in line.replace('import time:', '|').split('|'))
+            if name == 'frontend.frontend_manager':
+                cumulative = int(us)
+        self.assertIsNotNone(cumulative)
+        self.assertLess(cumulative / 1000, IMPORT_BUDGET_MS)
+
+
+if __name__ == '__main__':
+    unittest.main()
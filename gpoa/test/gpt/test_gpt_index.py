@@ -0,0 +1,104 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+
+class GptIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self._touch('MACHINE', 'Registry.pol')
+        self._touch('MACHINE', 'preferences', 'Files', 'FILES.xml')
+        self._touch('MACHINE', 'Scripts', 'Scripts.ini')
+        self._touch('MACHINE', 'Scripts', 'Startup', 'run.sh')
+        self._touch('user', 'Preferences', 'Drives', 'Drives.xml')
+        self._touch('user', 'Documents', 'Deep', 'file.txt')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _touch(self, *names):
+        path = os.path.join(self.root, *names)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w'):
+            pass
+        return path
+
+    def test_case_insensitive_lookup(self):
+        from gpt.gpt import GptIndex
+
+        index = GptIndex(self.root)
+        self.assertEqual(index.find_dir('Machine'), os.path.join(self.root, 'MACHINE'))
+        self.assertEqual(index.find_file('Machine', 'registry.pol'),
+                         os.path.join(self.root, 'MACHINE', 'Registry.pol'))
+        self.assertEqual(index.find_preffile('Machine', 'files'),
+                         os.path.join(self.root, 'MACHINE', 'preferences', 'Files', 'FILES.xml'))
+        self.assertEqual(index.find_preffile('User', 'drives'),
+                         os.path.join(self.root, 'user', 'Preferences', 'Drives', 'Drives.xml'))
+        self.assertEqual(index.find_file('Machine', 'Scripts', 'scripts.ini'),
+                         os.path.join(self.root, 'MACHINE', 'Scripts', 'Scripts.ini'))
+        self.assertIsNone(index.find_file('User', 'registry.pol'))
+        self.assertIsNone(index.find_preffile('User', 'files'))
+        # Directories are not taken for files and vice versa
+        self.assertIsNone(index.find_file('Machine', 'Scripts'))
+        self.assertIsNone(index.find_dir('Machine', 'registry.pol'))
+
+    def test_single_walk(self):
+        from gpt.gpt import GptIndex
+
+        with unittest.mock.patch('gpt.gpt.os.scandir', wraps=os.scandir) as scandir:
+            index = GptIndex(self.root)
+            for _ in range(3):
+                index.find_preffile('Machine', 'files')
+        scanned = sorted(os.path.relpath(call.args[0], self.root)
+                         for call in scandir.call_args_list)
+        self.assertEqual(scanned, [
+            '.',
+            'MACHINE',
+            'MACHINE/Scripts',
+            'MACHINE/preferences',
+            'MACHINE/preferences/Files',
+            'user',
+            'user/Preferences',
+            'user/Preferences/Drives',
+        ])
+
+    def test_indexed_preftype(self):
+        from gpt.gpt import FileType, GptIndex, get_preftype
+
+        index = GptIndex(self.root)
+        path = index.find_preffile('Machine', 'files')
+        with unittest.mock.patch('gpt.gpt.Path.exists') as exists:
+            self.assertEqual(get_preftype(path, index), FileType.FILES)
+            exists.assert_not_called()
+
+    @unittest.mock.patch('gpt.gpt.log')
+    def test_missing_gpt(self, log_mock):
+        from gpt.gpt import GptIndex
+
+        index = GptIndex(os.path.join(self.root, 'missing'))
+        self.assertIsNone(index.find_dir('Machine'))
+        self.assertEqual(log_mock.call_args.args[0], 'D276')
+
+
+if __name__ == '__main__':
+    unittest.main()
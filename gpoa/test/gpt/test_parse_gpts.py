@@ -0,0 +1,114 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+
+ENVVARS_XML = '''<?xml version="1.0" encoding="utf-8"?>
+<EnvironmentVariables clsid="{{BF141A63-327B-438a-B9BF-2C188F13B7AD}}"><EnvironmentVariable clsid="{{78570023-8373-4a19-BA80-2F150738EA19}}" name="GPOA_TEST" uid="{{{uid}}}"><Properties action="U" name="GPOA_TEST" value="{value}" user="0" partial="0"/></EnvironmentVariable>
+</EnvironmentVariables>
+'''
+
+
+class FakeStorage:
+    def __init__(self):
+        self.merged = []
+        self.envvars = {}
+
+    def add_envvar(self, envvar, policy_name, policy_guid=None):
+        self.merged.append(policy_name)
+        # A GPO merged later overrides the ones merged before it
+        self.envvars[envvar.name] = envvar.value
+
+
+class ParseGptsTestCase(unittest.TestCase):
+    GPT_COUNT = 4
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.storage = FakeStorage()
+        patchers = [
+            unittest.mock.patch('gpt.gpt.add_to_dict'),
+            unittest.mock.patch('gpt.gpt.registry_factory', return_value=self.storage),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        from gpt.gpt import gpt
+
+        self.gpts = []
+        for number in range(self.GPT_COUNT):
+            gpt_path = os.path.join(self._tmp.name, '{{GPO-{}}}'.format(number))
+            xml_path = os.path.join(gpt_path, 'Machine', 'Preferences',
+                                    'EnvironmentVariables', 'EnvironmentVariables.xml')
+            os.makedirs(os.path.dirname(xml_path))
+            with open(xml_path, 'w') as f:
+                f.write(ENVVARS_XML.format(uid='UID-{}'.format(number),
+                                           value='gpo{}'.format(number)))
+            gptobj = gpt(gpt_path)
+            gptobj.set_name('gpo{}'.format(number))
+            self.gpts.append(gptobj)
+
+    def test_results_follow_gpo_order(self):
+        import gpt.gpt as gpt_module
+
+        read_envvars = gpt_module.read_envvars
+        finished = []
+        lock = threading.Lock()
+
+        def slow_read_envvars(path):
+            # The first GPOs take the longest, so they finish last
+            number = int(path.split('GPO-')[1][0])
+            time.sleep(0.05 * (self.GPT_COUNT - number))
+            result = read_envvars(path)
+            with lock:
+                finished.append(number)
+            return result
+
+        with unittest.mock.patch('gpt.gpt.read_envvars', side_effect=slow_read_envvars):
+            results = gpt_module.parse_gpts(self.gpts, 'machine', workers=self.GPT_COUNT)
+
+        self.assertEqual(finished, list(reversed(range(self.GPT_COUNT))))
+        self.assertEqual([parsed['environmentvariables'][0].value for parsed in results],
+                         ['gpo{}'.format(number) for number in range(self.GPT_COUNT)])
+
+        with unittest.mock.patch('gpt.gpt.read_envvars', side_effect=AssertionError):
+            for gptobj, parsed in zip(self.gpts, results):
+                gptobj.merge_machine(parsed)
+        self.assertEqual(self.storage.merged,
+                         ['gpo{}'.format(number) for number in range(self.GPT_COUNT)])
+        self.assertEqual(self.storage.envvars, {'GPOA_TEST': 'gpo{}'.format(self.GPT_COUNT - 1)})
+
+    def test_sequential_and_parallel_results_match(self):
+        from gpt.gpt import parse_gpts
+
+        sequential = parse_gpts(self.gpts, 'machine', workers=1)
+        parallel = parse_gpts(self.gpts, 'machine', workers=self.GPT_COUNT)
+        self.assertEqual([[var.value for var in parsed['environmentvariables']] for parsed in sequential],
+                         [[var.value for var in parsed['environmentvariables']] for parsed in parallel])
+
+
+if __name__ == '__main__':
+    unittest.main()
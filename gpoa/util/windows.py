@@ -33,21 +33,24 @@ from samba.credentials import Credentials
 import samba.gpo
 
 try:
-    from samba.gpclass import check_refresh_gpo_list, get_dc_hostname
+    from samba.gpclass import get_dc_hostname
 except ImportError:
-    from samba.gp.gpclass import get_dc_hostname, check_refresh_gpo_list, get_gpo_list
+    from samba.gp.gpclass import get_dc_hostname, get_gpo_list
 
 from samba.net import Net
 from samba.netcmd.common import netcmd_get_domain_infos_via_cldap
 from samba.samdb import SamDB
 from storage.dconf_registry import Dconf_registry, extract_display_name_version
+from util.config import GPConfig
 from util.system import with_privileges
 
 from storage import registry_factory
 
+from .dc_topology import DcTopologyCache, rank_dcs
 from .exceptions import GetGPOListFail
 from .logging import log
 from .samba import smbopts
+from .sysvol import SysvolReplicator
 from .util import get_uid_by_username
 from .windows_vars import get_kerberos_domain_info
 
@@ -214,16 +217,11 @@ class smbcreds (smbopts):
             log('I2', logdata)
 
     def update_gpos(self, username):
-
-        list_selected_dc = set()
-
-
-
         if self.dc_site_servers:
-            self.selected_dc = self.dc_site_servers.pop()
+            # Site DCs are ordered from the fastest one
+            self.selected_dc = self.dc_site_servers.pop(0)
 
         self.all_servers = [dc for dc in self.all_servers if dc != self.selected_dc]
-        list_selected_dc.add(self.selected_dc)
 
         try:
             gpos = self.get_gpos(username)
@@ -232,61 +230,123 @@ class smbcreds (smbopts):
             self.selected_dc = self.pdc_emulator_server
             gpos = self.get_gpos(username)
 
-        while list_selected_dc:
-            logdata = {}
-            logdata['username'] = username
-            logdata['dc'] = self.selected_dc
-            try:
-                log('D49', logdata)
-                if not self.is_machine and Dconf_registry.get_info('trust'):
-                    check_refresh_gpo_list(Dconf_registry.get_info('pdc_dns_name'),
-                                           self.lp,
-                                           self.creds,
-                                           gpos)
-                else:
-                    check_refresh_gpo_list(self.selected_dc, self.lp, self.creds, gpos)
-                log('D50', logdata)
-                list_selected_dc.clear()
-            except NTSTATUSError as smb_exc:
-                logdata['smb_exc'] = str(smb_exc)
-                if not check_scroll_enabled():
-                    if self.pdc_emulator_server and self.selected_dc != self.pdc_emulator_server:
-                        self.selected_dc = self.pdc_emulator_server
-                        logdata['action'] = 'Selected pdc'
-                        logdata['pdc'] = self.selected_dc
-                        log('W11', logdata)
-                    else:
-                        log('F1', logdata)
-                        raise smb_exc
-                else:
-                    if self.dc_site_servers:
-                        self.selected_dc = self.dc_site_servers.pop()
-                    elif self.all_servers:
-                        self.selected_dc = self.all_servers.pop()
-                    else:
-                        self.selected_dc = self.pdc_emulator_server
-
-
-                    if self.selected_dc not in list_selected_dc:
-                        logdata['action'] = 'Search another dc'
-                        logdata['another_dc'] = self.selected_dc
-                        log('W11', logdata)
-                        list_selected_dc.add(self.selected_dc)
-                    else:
-                        log('F1', logdata)
-                        raise smb_exc
-            except Exception as exc:
-                logdata['exc'] = str(exc)
-                log('F1', logdata)
-                raise exc
+        if not self.is_machine and Dconf_registry.get_info('trust'):
+            servers = [Dconf_registry.get_info('pdc_dns_name')]
+        else:
+            servers = self.get_sysvol_servers()
+
+        logdata = {}
+        logdata['username'] = username
+        logdata['dc'] = servers[0] if servers else self.selected_dc
+        replicator = SysvolReplicator(self.lp, self.creds,
+                                      os.path.join(self.get_cache_dir(), 'gpo_cache'),
+                                      GPConfig().get_sysvol_workers())
+        try:
+            log('D49', logdata)
+            replicator.replicate(gpos, servers)
+            log('D50', logdata)
+        except NTSTATUSError as smb_exc:
+            logdata['smb_exc'] = str(smb_exc)
+            log('F1', logdata)
+            # The cached DC list may be outdated
+            self.sDomain.invalidate_topology()
+            raise smb_exc
+        except Exception as exc:
+            logdata['exc'] = str(exc)
+            log('F1', logdata)
+            raise exc
         return gpos
 
+    def get_sysvol_servers(self):
+        '''
+        DCs to replicate GPOs from, in order of preference: the selected
+        DC, the other DCs of the site and of the domain if ScrollSysvolDC
+        is enabled, and the PDC emulator last.
+        '''
+        servers = [self.selected_dc]
+        if check_scroll_enabled():
+            servers.extend(self.dc_site_servers)
+            servers.extend(self.all_servers)
+        servers.append(self.pdc_emulator_server)
+        return [dc for dc in dict.fromkeys(servers) if dc]
+
+
+class LazySamDB:
+    '''
+    SamDB connection opened on first use, so runs that take the DC
+    topology from the cache only bind to LDAP if an applier needs it.
+    '''
+    def __init__(self, url, creds, lp):
+        self._url = url
+        self._creds = creds
+        self._lp = lp
+        self._samdb = None
+
+    def connect(self):
+        if self._samdb is None:
+            self._samdb = SamDB(url=self._url, session_info=system_session(),
+                                credentials=self._creds, lp=self._lp)
+        return self._samdb
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.connect(), name)
+
 
 class SiteDomainScanner:
     def __init__(self, smbcreds, lp, dc):
-        self.samdb = SamDB(url='ldap://{}'.format(dc), session_info=system_session(), credentials=smbcreds, lp=lp)
-        Dconf_registry.set_info('samdb', self.samdb)
-        self.pdc_emulator = self._search_pdc_emulator()
+        self._samdb = LazySamDB('ldap://{}'.format(dc), smbcreds, lp)
+        Dconf_registry.set_info('samdb', self._samdb)
+
+        ttl = GPConfig().get_dc_cache_ttl()
+        try:
+            ip_addresses = self.get_ip_addresses()
+        except Exception as exc:
+            log('D279', {'exc': str(exc)})
+            ip_addresses = []
+            ttl = 0
+        self._cache = DcTopologyCache(lp.get('realm'), ip_addresses, ttl,
+                                      ranking_ttl=GPConfig().get_dc_ranking_ttl())
+        self._topology = self._cache.load()
+        self._cacheable = True
+        if self._topology is None:
+            self._topology = self._scan_topology(ip_addresses)
+        self.pdc_emulator = self._topology.get('pdc_emulator')
+
+    @property
+    def samdb(self):
+        return self._samdb.connect()
+
+    def _scan_topology(self, ip_addresses):
+        '''
+        Read the site DCs, all DCs and the PDC emulator from LDAP and
+        cache them if every lookup succeeded.
+        '''
+        complete = True
+        topology = {'pdc_emulator': self._search_pdc_emulator()}
+        try:
+            topology['site_servers'] = self.get_site_servers(ip_addresses)
+        except Exception as exc:
+            log('D279', {'exc': str(exc)})
+            topology['site_servers'] = []
+            complete = False
+        try:
+            topology['all_servers'] = self.get_ad_all_servers()
+        except Exception as exc:
+            log('D280', {'exc': str(exc)})
+            topology['all_servers'] = []
+            complete = False
+        self._cacheable = complete
+        if complete:
+            self._cache.save(topology)
+        return topology
+
+    def invalidate_topology(self):
+        '''
+        Make the next run read the topology from LDAP again.
+        '''
+        self._cache.invalidate()
 
     @staticmethod
     def _get_ldb_single_message_attr(ldb_message, attr_name, encoding='utf8'):
@@ -354,30 +414,31 @@ class SiteDomainScanner:
         return next((subnets_sites[subnet] for subnet in subnets_sites.keys()
                      if any(ip_address in subnet for ip_address in ip_addresses)), None)
 
-    def select_site_servers(self):
-        try:
-            ip_addresses = self.get_ip_addresses()
-            subnets_sites = self.get_ad_subnets_sites()
-
-            our_site = self.check_ip_in_subnets(ip_addresses, subnets_sites)
+    def get_site_servers(self, ip_addresses):
+        subnets_sites = self.get_ad_subnets_sites()
+        our_site = self.check_ip_in_subnets(ip_addresses, subnets_sites)
+        if our_site:
+            return self.get_ad_site_servers(our_site)
+        return []
 
-            servers = []
-            if our_site:
-                servers = self.get_ad_site_servers(our_site)
-            random.shuffle(servers)
-            return servers
-        except Exception as exc:
-            log('D279', {'exc': str(exc)})
-            return []
+    def select_site_servers(self):
+        '''
+        Return the site DCs ordered by latency. They are probed at once
+        and the order is cached for dc-ranking-ttl seconds only, since
+        latencies change much faster than the topology.
+        '''
+        servers = self._topology.get('site_servers', [])
+        ranking = self._cache.load_ranking(servers)
+        if ranking is None:
+            ranking = rank_dcs(servers)
+            if self._cacheable:
+                self._cache.save_ranking(ranking)
+        return list(ranking)
 
     def select_all_servers(self):
-        try:
-            servers = self.get_ad_all_servers()
-            random.shuffle(servers)
-            return servers
-        except Exception as exc:
-            log('D280', {'exc': str(exc)})
-            return []
+        servers = list(self._topology.get('all_servers', []))
+        random.shuffle(servers)
+        return servers
 
     def select_pdc_emulator_server(self):
         return self.pdc_emulator
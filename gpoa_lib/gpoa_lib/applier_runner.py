@@ -216,6 +216,9 @@ class ApplierRunner:
             logdata = {'applier_name': applier_name, 'msg': str(exc)}
             log('E24', logdata)
             return Result.fail(str(exc))
+        finally:
+            if self._file_cache is not None:
+                self._file_cache.save_manifest()
 
     @staticmethod
     def list_appliers():
@@ -16,24 +16,68 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import importlib
+import sys
+import types
+
 from .applier_frontend import applier_frontend, DualContextApplier
-from .chromium_applier import chromium_applier
-from .cifs_applier import cifs_applier, cifs_applier_user
-from .control_applier import control_applier
-from .envvar_applier import envvar_applier, envvar_applier_user
-from .file_applier import file_applier, file_applier_user
-from .firefox_applier import firefox_applier
-from .firewall_applier import firewall_applier
-from .folder_applier import folder_applier, folder_applier_user
-from .gsettings_applier import gsettings_applier, gsettings_applier_user
-from .ini_applier import ini_applier, ini_applier_user
-from .kde_applier import kde_applier, kde_applier_user
-from .laps_applier import laps_applier
-from .networkshare_applier import networkshare_applier
-from .ntp_applier import ntp_applier
-from .package_applier import package_applier, package_applier_user
-from .polkit_applier import polkit_applier, polkit_applier_user
-from .scripts_applier import scripts_applier, scripts_applier_user
-from .systemd_applier import systemd_applier, systemd_applier_user
-from .thunderbird_applier import thunderbird_applier
-from .yandex_browser_applier import yandex_browser_applier
+
+# Applier class -> module defining it. Modules are imported on first
+# access so that importing the package does not pull in jinja2, dbus,
+# gi or the LAPS dependencies.
+_APPLIER_MODULES = {
+    'chromium_applier': 'chromium_applier',
+    'cifs_applier': 'cifs_applier',
+    'cifs_applier_user': 'cifs_applier',
+    'control_applier': 'control_applier',
+    'envvar_applier': 'envvar_applier',
+    'envvar_applier_user': 'envvar_applier',
+    'file_applier': 'file_applier',
+    'file_applier_user': 'file_applier',
+    'firefox_applier': 'firefox_applier',
+    'firewall_applier': 'firewall_applier',
+    'folder_applier': 'folder_applier',
+    'folder_applier_user': 'folder_applier',
+    'gsettings_applier': 'gsettings_applier',
+    'gsettings_applier_user': 'gsettings_applier',
+    'ini_applier': 'ini_applier',
+    'ini_applier_user': 'ini_applier',
+    'kde_applier': 'kde_applier',
+    'kde_applier_user': 'kde_applier',
+    'laps_applier': 'laps_applier',
+    'networkshare_applier': 'networkshare_applier',
+    'ntp_applier': 'ntp_applier',
+    'package_applier': 'package_applier',
+    'package_applier_user': 'package_applier',
+    'polkit_applier': 'polkit_applier',
+    'polkit_applier_user': 'polkit_applier',
+    'scripts_applier': 'scripts_applier',
+    'scripts_applier_user': 'scripts_applier',
+    'systemd_applier': 'systemd_applier',
+    'systemd_applier_user': 'systemd_applier',
+    'thunderbird_applier': 'thunderbird_applier',
+    'yandex_browser_applier': 'yandex_browser_applier',
+}
+
+__all__ = ['applier_frontend', 'DualContextApplier', *_APPLIER_MODULES]
+
+
+def __getattr__(name):
+    module_name = _APPLIER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    module = importlib.import_module('.' + module_name, __name__)
+    return getattr(module, name)
+
+
+class _FrontendPackage(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Most modules are named after their applier class. The import
+        # system binds an imported submodule to the package attribute
+        # of that name, keep the class there as eager imports did.
+        if name in _APPLIER_MODULES and isinstance(value, types.ModuleType):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _FrontendPackage
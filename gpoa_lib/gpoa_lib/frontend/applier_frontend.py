@@ -73,6 +73,29 @@ def check_enabled(storage, module_name, is_experimental):
     return result
 
 class applier_frontend(ABC):
+    # Shared state the applier reads and writes, which decides the
+    # appliers it may run at the same time with (see util.scheduler).
+    # An applier which does not declare what it writes runs alone.
+    reads = ()
+    writes = None
+    # Policy the applier is configured from: registry branches and
+    # preference lists stored under Preferences/<Machine|username>/.
+    # An applier is skipped while these did not change since its last
+    # successful run (see storage.policy_digest); one which declares
+    # none always runs. A run which logged a warning or an error does
+    # not count as successful. A user applier which also reads the machine
+    # database sets reads_machine_policy, and one whose result may drift
+    # outside of gpupdate (services, packages, mounts, copied files)
+    # sets reassert to run again after the re-assertion interval. One
+    # whose result depends on the time of the run (password expiration)
+    # sets time_dependent to run on every run while its policy branches
+    # are set.
+    policy_branches = ()
+    policy_preferences = ()
+    reads_machine_policy = False
+    reassert = False
+    time_dependent = False
+
     def __init__(self, regobj):
         pass
 
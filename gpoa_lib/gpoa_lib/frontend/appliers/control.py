@@ -16,8 +16,72 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+import os
 import subprocess
+import tempfile
+
 from ...util.logging import log
+from ...util.paths import cache_dir
+
+CONTROL = '/usr/sbin/control'
+CONTROL_TIMEOUT = 30
+CONTROL_FACILITIES = '/etc/control.d/facilities'
+
+# Prints "<name>\t<status>\t<possible values>" for every facility given
+# as argument, "<name>\t<status>" for the facilities after "--" whose
+# possible values are already known, or only the name if the facility
+# can not be queried. Records are separated by NUL.
+_CONTROL_STATES_SCRIPT = '''
+list=1
+for name; do
+    if [ "$name" = -- ]; then
+        list=
+    elif ! status=$({control} "$name" 2>/dev/null); then
+        printf '%s\\0' "$name"
+    elif [ -z "$list" ]; then
+        printf '%s\\t%s\\0' "$name" "$status"
+    elif values=$({control} "$name" list 2>/dev/null); then
+        printf '%s\\t%s\\t%s\\0' "$name" "$status" "$values"
+    else
+        printf '%s\\0' "$name"
+    fi
+done
+'''.format(control=CONTROL)
+
+def control_values_file():
+    return os.path.join(str(cache_dir()), 'control-values.json')
+
+def _facility_mtime(name):
+    try:
+        return os.stat(os.path.join(CONTROL_FACILITIES, name)).st_mtime_ns
+    except (OSError, ValueError):
+        return None
+
+def _load_control_values(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def _save_control_values(path, cache):
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix='.control-values-',
+                                        dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(cache, f, sort_keys=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    except OSError as exc:
+        log('D369', {'path': path, 'exc': str(exc)})
 
 def control_subst(preg_name):
     '''
@@ -35,13 +99,75 @@ def control_subst(preg_name):
 
     return result
 
+def query_control_states(names, cache_path=None):
+    '''
+    Read the current status and the possible values of all control
+    facilities in *names* with one shell invocation. Returns a dict
+    {name: (status, possible values)} where both are None for facilities
+    which can not be queried, or None if the query failed as a whole.
+
+    The possible values do not change unless the facility script in
+    CONTROL_FACILITIES does, so they are cached in *cache_path* by the
+    mtime of the script and only the status is queried for them.
+    '''
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    cache_path = cache_path if cache_path is not None else control_values_file()
+    cache = _load_control_values(cache_path)
+    mtimes = {name: _facility_mtime(name) for name in names}
+    known = {}
+    for name in names:
+        entry = cache.get(name)
+        if (mtimes[name] is not None and isinstance(entry, dict)
+                and entry.get('mtime') == mtimes[name]
+                and isinstance(entry.get('values'), list)):
+            known[name] = entry['values']
+    args = [name for name in names if name not in known] + ['--'] + list(known)
+    try:
+        proc = subprocess.run(['/bin/sh', '-c', _CONTROL_STATES_SCRIPT, 'sh'] + args,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              timeout=CONTROL_TIMEOUT * 2 * len(names))
+    except Exception as exc:
+        log('D366', {'exc': exc})
+        return None
+    states = dict.fromkeys(names, (None, None))
+    changed = False
+    for record in proc.stdout.decode('utf-8').split('\0'):
+        fields = record.split('\t')
+        if len(fields) not in (2, 3) or fields[0] not in states:
+            continue
+        # Like the per-facility queries only the first lines count
+        name = fields[0]
+        status = fields[1].split('\n')[0]
+        if len(fields) == 2:
+            if name in known:
+                states[name] = (status, known[name])
+            continue
+        values = fields[2].split('\n')[0].split()
+        states[name] = (status, values)
+        if mtimes[name] is not None:
+            cache[name] = {'mtime': mtimes[name], 'values': values}
+            changed = True
+    if changed:
+        _save_control_values(cache_path, cache)
+    return states
+
 class control:
-    def __init__(self, name, value):
+    def __init__(self, name, value, state=None):
+        '''
+        *state* is the (status, possible values) of the facility from
+        query_control_states(), it is queried from control otherwise.
+        '''
         if type(value) != int and type(value) != str:
             raise Exception('Unknown type of value for control')
         self.control_name = control_subst(name)
         self.control_value = value
-        self.possible_values = self._query_control_values()
+        if state is not None:
+            self.current_status, self.possible_values = state
+        else:
+            self.current_status = None
+            self.possible_values = self._query_control_values()
         if self.possible_values == None:
             raise Exception('Unable to query possible values')
 
@@ -52,7 +178,7 @@ class control:
         '''
         values = []
 
-        popen_call = ['/usr/sbin/control', self.control_name, 'list']
+        popen_call = [CONTROL, self.control_name, 'list']
         with subprocess.Popen(popen_call, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
             values = proc.stdout.readline().decode('utf-8').split()
             valErr = proc.stderr.readline().decode('utf-8')
@@ -86,7 +212,7 @@ class control:
         '''
         line = None
 
-        popen_call = ['/usr/sbin/control', self.control_name]
+        popen_call = [CONTROL, self.control_name]
         with subprocess.Popen(popen_call, stdout=subprocess.PIPE) as proc:
             line = proc.stdout.readline().decode('utf-8').rstrip('\n\r')
             proc.wait(timeout=30)
@@ -94,6 +220,10 @@ class control:
         return line
 
     def set_control_status(self):
+        '''
+        Set the facility to the configured value. Returns False if the
+        facility already had that status and control was not run.
+        '''
         if type(self.control_value) == int:
             status = self._map_control_status(self.control_value)
             if status == None:
@@ -113,15 +243,19 @@ class control:
         logdata = {}
         logdata['control'] = self.control_name
         logdata['status'] = status
+        if status == self.current_status:
+            log('D364', logdata)
+            return False
         log('D68', logdata)
 
         try:
-            popen_call = ['/usr/sbin/control', self.control_name, status]
+            popen_call = [CONTROL, self.control_name, status]
             with subprocess.Popen(popen_call, stdout=subprocess.PIPE) as proc:
-                proc.wait(timeout=30)
+                proc.wait(timeout=CONTROL_TIMEOUT)
         except Exception as exc:
             logdata = {}
             logdata['control'] = self.control_name
             logdata['status'] = status
             logdata['exc'] = exc
             log('E43', logdata)
+        return True
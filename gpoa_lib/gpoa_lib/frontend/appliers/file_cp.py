@@ -299,6 +299,23 @@ def check_target_path(path_to_check, username = None):
 
     return rootpath.joinpath(checking)
 
+def source_files(files, username=None):
+    '''
+    Return the single source files of the enabled copy actions in *files*,
+    skipping wildcard sources which are only known after listing the share.
+    '''
+    sources = []
+    for file_obj in files:
+        if file_obj.disabled or not file_obj.fromPath:
+            continue
+        if action_letter2enum(file_obj.action) == FileAction.DELETE:
+            continue
+        fromPath = expand_windows_var(file_obj.fromPath, username).replace('\\', '/')
+        name = Path(fromPath).name
+        if name.find('*') == -1 and name.find('?') == -1:
+            sources.append(fromPath)
+    return sources
+
 class Execution_check():
 
     __extension_marker_key_name = 'ExtensionMarker'
@@ -17,7 +17,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import configparser
+import hashlib
+import io
 import os
+import tempfile
 try:
     from gi.repository import Gio, GLib
 except ImportError:
@@ -50,6 +53,64 @@ class system_gsetting:
             lock_path = dconf_path(settings, self.path)
             locks.append(lock_path)
 
+def file_digest(path):
+    '''
+    Return the SHA-256 of the file at *path* or None if it can not be read.
+    '''
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def replace_if_changed(path, content):
+    '''
+    Atomically replace the file at *path* with *content* unless it
+    already holds it. Returns True when the file was written.
+    '''
+    data = content.encode('utf-8')
+    if file_digest(path) == hashlib.sha256(data).hexdigest():
+        return False
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '-',
+                                    dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+class gsettings_schemas:
+    '''
+    Schemas of the default schema source, looked up once per run.
+    '''
+    def __init__(self):
+        self._source = None
+        self._schemas = {}
+        self._settings = {}
+
+    def lookup(self, schema):
+        if schema not in self._schemas:
+            if self._source is None:
+                self._source = Gio.SettingsSchemaSource.get_default()
+            self._schemas[schema] = self._source.lookup(schema, False)
+        return self._schemas[schema]
+
+    def has_key(self, schema, path):
+        source_schema = self.lookup(schema)
+        return bool(source_schema) and source_schema.has_key(path)
+
+    def settings(self, schema):
+        if schema not in self._settings:
+            self._settings[schema] = Gio.Settings(schema=schema)
+        return self._settings[schema]
+
 class system_gsettings:
     __path_local_dir = '/etc/dconf/db/local.d'
     __path_locks = '/etc/dconf/db/policy.d/locks/policy'
@@ -60,9 +121,10 @@ class system_gsettings:
         self.gsettings = []
         self.locks = []
         self.override_file_path = override_file_path
+        self.schemas = gsettings_schemas()
 
     def append(self, schema, path, data, lock, helper):
-        if check_existing_gsettings(schema, path):
+        if check_existing_gsettings(schema, path, self.schemas):
             self.gsettings.append(system_gsetting(schema, path, data, lock, helper))
         else:
             logdata = {}
@@ -73,6 +135,10 @@ class system_gsettings:
             log('D150', logdata)
 
     def apply(self):
+        '''
+        Render the override and the locks and replace the files whose
+        content changed. Returns (override changed, locks changed).
+        '''
         config = configparser.ConfigParser()
 
         for gsetting in self.gsettings:
@@ -81,27 +147,22 @@ class system_gsettings:
             logdata['gsetting.path'] = gsetting.path
             logdata['gsetting.value'] = gsetting.value
             logdata['gsetting.lock'] = gsetting.lock
-            settings = Gio.Settings(schema=gsetting.schema)
+            settings = self.schemas.settings(gsetting.schema)
             log('D89', logdata)
             gsetting.apply(settings, config, self.locks)
 
-        with open(self.override_file_path, 'w') as f:
-            config.write(f)
+        override = io.StringIO()
+        config.write(override)
+        override_changed = replace_if_changed(self.override_file_path, override.getvalue())
 
         os.makedirs(self.__path_local_dir, mode=0o755, exist_ok=True)
         os.makedirs(os.path.dirname(self.__path_locks), mode=0o755, exist_ok=True)
         os.makedirs(os.path.dirname(self.__path_profile), mode=0o755, exist_ok=True)
-        try:
-            os.remove(self.__path_locks)
-        except OSError as error:
-            log('D292', {'exc': str(error)})
-
-        with open(self.__path_locks,'w') as file_locks:
-            for lock in self.locks:
-                file_locks.write(lock +'\n')
 
-        with open(self.__path_profile ,'w') as profile:
-            profile.write(self.__profile_data)
+        locks_changed = replace_if_changed(self.__path_locks,
+                                           ''.join(lock + '\n' for lock in self.locks))
+        replace_if_changed(self.__path_profile, self.__profile_data)
+        return override_changed, locks_changed
 
 def glib_map(value, glib_type):
     result_value = value
@@ -124,21 +185,19 @@ def glib_value(schema, path, value, settings):
     # Build the new value with the determined type
     return glib_map(value, glib_value_type)
 
-def check_existing_gsettings (schema, path):
-    source = Gio.SettingsSchemaSource.get_default()
-    sourceSchema = (source.lookup(schema, False))
-    if bool(sourceSchema) and sourceSchema.has_key(path):
-        return True
-    else:
-        return False
+def check_existing_gsettings (schema, path, schemas=None):
+    if schemas is None:
+        schemas = gsettings_schemas()
+    return schemas.has_key(schema, path)
 
 class user_gsettings:
     def __init__(self):
         self.gsettings = []
+        self.schemas = gsettings_schemas()
 
     def append(self, schema, path, value, helper=None):
-        if check_existing_gsettings(schema, path):
-            self.gsettings.append(user_gsetting(schema, path, value, helper))
+        if check_existing_gsettings(schema, path, self.schemas):
+            self.gsettings.append(user_gsetting(schema, path, value, helper, self.schemas))
         else:
             logdata = {}
             logdata['schema'] = schema
@@ -157,15 +216,16 @@ class user_gsettings:
 
 
 class user_gsetting:
-    def __init__(self, schema, path, value, helper_function=None):
+    def __init__(self, schema, path, value, helper_function=None, schemas=None):
         self.schema = schema
         self.path = path
         self.value = value
         self.helper_function = helper_function
+        self.schemas = schemas if schemas is not None else gsettings_schemas()
 
     def apply(self):
         # Access the current schema
-        settings = Gio.Settings(schema=self.schema)
+        settings = self.schemas.settings(self.schema)
         # Update result with helper function
         value = self.value
         if self.helper_function:
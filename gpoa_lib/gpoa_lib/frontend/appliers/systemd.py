@@ -16,6 +16,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import time
+
 try:
     import dbus
 except ImportError:
@@ -23,6 +26,18 @@ except ImportError:
 
 from ...util.logging import log
 
+
+SYSTEMD_BUS_NAME = 'org.freedesktop.systemd1'
+SYSTEMD_OBJECT_PATH = '/org/freedesktop/systemd1'
+# Unit file states which need no EnableUnitFiles call
+ENABLED_FILE_STATES = ('enabled', 'static', 'indirect', 'generated', 'alias', 'transient')
+# In case the service has 'RestartSec' property set it switches to
+# 'activating (auto-restart)' state instead of 'active' so 'activating'
+# counts as running too.
+RUNNING_STATES = ('active', 'activating', 'reloading')
+# Seconds to wait for the queued start and stop jobs
+JOB_TIMEOUT = 30
+
 class systemd_unit:
     def __init__(self, unit_name, state):
         self.system_bus = dbus.SystemBus()
@@ -92,3 +107,144 @@ class systemd_unit:
         except dbus.DBusException as exc:
             log('E77', {**logdata, 'error': str(exc)})
 
+
+
+class systemd_manager:
+    '''
+    Bring units to their desired states over one system bus connection.
+
+    The unit file and active states of all units are read with one
+    ListUnitFiles and one ListUnits call, and only units whose state
+    differs are touched.  Unit file changes are made in batches followed
+    by one Reload, then all start and stop jobs are queued at once so
+    systemd runs them in parallel, and waited for together.
+    '''
+    def __init__(self, bus=None, job_timeout=JOB_TIMEOUT, poll_interval=0.1):
+        self.bus = bus if bus is not None else dbus.SystemBus()
+        self.manager = dbus.Interface(self.bus.get_object(SYSTEMD_BUS_NAME, SYSTEMD_OBJECT_PATH),
+                                      'org.freedesktop.systemd1.Manager')
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self.stats = {'changed': 0, 'unchanged': 0, 'failed': 0}
+
+    def unit_states(self):
+        '''
+        Return {unit: unit file state} and {unit: active state}.
+        '''
+        file_states = {os.path.basename(str(path)): str(state)
+                       for path, state in self.manager.ListUnitFiles()}
+        return file_states, self.active_states()
+
+    def active_states(self):
+        return {str(unit[0]): str(unit[3]) for unit in self.manager.ListUnits()}
+
+    def apply(self, units):
+        '''
+        Apply *units*, a dict {unit name: desired state} where 1 means
+        unmasked, enabled and running and 0 masked and stopped.
+        '''
+        file_states, active_states = self.unit_states()
+        unmask, enable, disable, start, stop = [], [], [], [], []
+        for name, state in units.items():
+            file_state = file_states.get(name)
+            running = active_states.get(name) in RUNNING_STATES
+            if state == 1:
+                if file_state is not None and file_state.startswith('masked'):
+                    unmask.append(name)
+                if file_state not in ENABLED_FILE_STATES:
+                    enable.append(name)
+                # gpupdate.service runs gpupdate itself, once enabled it
+                # is left to start on boot
+                if not running and not (name == 'gpupdate.service'
+                                        and (file_state == 'enabled' or name in enable)):
+                    start.append(name)
+            else:
+                if file_state != 'masked':
+                    disable.append(name)
+                if running:
+                    stop.append(name)
+
+        changed = set(unmask + enable + disable + start + stop)
+        for name in units:
+            if name not in changed:
+                self.stats['unchanged'] += 1
+                log('D362', {'unit': name})
+
+        failed = set()
+        self._call(self.manager.UnmaskUnitFiles, unmask, failed, dbus.Boolean(False))
+        self._call(self.manager.DisableUnitFiles, disable, failed, dbus.Boolean(False))
+        self._call(self.manager.MaskUnitFiles, disable, failed,
+                   dbus.Boolean(False), dbus.Boolean(True))
+        self._call(self.manager.EnableUnitFiles, enable, failed,
+                   dbus.Boolean(False), dbus.Boolean(True))
+        if unmask or disable or enable:
+            self.manager.Reload()
+
+        jobs = []
+        for name in start:
+            self._queue_job(self.manager.StartUnit, name, jobs, failed)
+        for name in stop:
+            self._queue_job(self.manager.StopUnit, name, jobs, failed)
+        if jobs:
+            self._wait(jobs)
+            self._check(start, stop, failed)
+
+        for name in units:
+            if name in changed and name not in failed:
+                self.stats['changed'] += 1
+                log('I6', {'unit': name})
+        self.stats['failed'] += len(failed)
+        log('D363', dict(self.stats))
+
+    def _call(self, method, names, failed, *args):
+        '''
+        Call *method* for all *names* not failed yet at once, and unit
+        by unit if the batch is refused to find the failing units.
+        '''
+        names = [name for name in names if name not in failed]
+        if not names:
+            return
+        try:
+            method(names, *args)
+            return
+        except Exception:
+            pass
+        for name in names:
+            try:
+                method([name], *args)
+            except Exception as exc:
+                log('E45', {'unit': name, 'exc': exc})
+                failed.add(name)
+
+    def _queue_job(self, method, name, jobs, failed):
+        if name in failed:
+            return
+        try:
+            jobs.append(str(method(name, 'replace')))
+        except Exception as exc:
+            log('E45', {'unit': name, 'exc': exc})
+            failed.add(name)
+
+    def _wait(self, jobs):
+        '''
+        Wait until none of *jobs* is queued anymore or the timeout passed.
+        '''
+        pending = set(jobs)
+        deadline = time.monotonic() + self.job_timeout
+        while True:
+            pending &= {str(job[4]) for job in self.manager.ListJobs()}
+            if not pending or time.monotonic() >= deadline:
+                return
+            time.sleep(self.poll_interval)
+
+    def _check(self, started, stopped, failed):
+        active_states = self.active_states()
+        for name in started:
+            if name in failed or active_states.get(name) in RUNNING_STATES:
+                continue
+            timer_name = name.replace('.service', '.timer')
+            if active_states.get(timer_name) not in RUNNING_STATES:
+                log('E46', {'unit': name})
+        for name in stopped:
+            if name not in failed and active_states.get(name) in RUNNING_STATES:
+                log('E46', {'unit': name})
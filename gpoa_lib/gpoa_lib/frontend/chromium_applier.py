@@ -32,6 +32,8 @@ class chromium_applier(applier_frontend):
     __registry_branch = 'Software/Policies/Google/Chrome'
     __managed_policies_path = '/etc/chromium/policies/managed'
     __recommended_policies_path = '/etc/chromium/policies/recommended'
+    writes = ('file:/etc/chromium/policies',)
+    policy_branches = (__registry_branch,)
 
     def __init__(self, storage, username):
         self.storage = storage
@@ -132,6 +132,9 @@ class cifs_applier(applier_frontend):
     __module_enabled = True
     __module_experimental = False
     __dir4clean = '/etc/auto.master.gpupdate.d'
+    writes = ('file:/etc/auto.master', 'file:/etc/auto.master.gpupdate.d', 'file:/media/gpupdate', 'systemd')
+    policy_preferences = ('Drives',)
+    reassert = True
 
     def __init__(self, storage):
         self.applier_cifs = cifs_applier_user(storage, None)
@@ -180,6 +183,9 @@ class cifs_applier_user(DualContextApplier):
     __key_preferences_previous = 'Previous/Software/BaseALT/Policies/Preferences/'
     __name_value = 'DriveMapsName'
     __name_value_user = 'DriveMapsNameUser'
+    policy_preferences = ('Drives',)
+    reads_machine_policy = True
+    reassert = True
 
     def __init__(self, storage, username):
         self.storage = storage
@@ -19,7 +19,7 @@
 from ..util.logging import log
 
 from .applier_frontend import applier_frontend, check_enabled
-from .appliers.control import control
+from .appliers.control import control, control_subst, query_control_states
 
 
 class control_applier(applier_frontend):
@@ -27,6 +27,9 @@ class control_applier(applier_frontend):
     __module_experimental = False
     __module_enabled = True
     _registry_branch = 'Software/BaseALT/Policies/Control'
+    writes = ('control', 'file:/etc')
+    policy_branches = (_registry_branch,)
+    reassert = True
 
     def __init__(self, storage):
         self.storage = storage
@@ -39,15 +42,19 @@ class control_applier(applier_frontend):
         )
 
     def run(self):
-        for setting in self.control_settings:
-            valuename = setting.hive_key.rpartition('/')[2]
+        # Current states of all configured facilities are read at once
+        # so that facilities which already have the status are skipped
+        valuenames = [setting.hive_key.rpartition('/')[2] for setting in self.control_settings]
+        states = query_control_states([control_subst(valuename) for valuename in valuenames])
+        for setting, valuename in zip(self.control_settings, valuenames):
+            state = states.get(control_subst(valuename)) if states is not None else None
             try:
-                self.controls.append(control(valuename, int(setting.data)))
+                self.controls.append(control(valuename, int(setting.data), state))
                 logdata = {'control': valuename, 'value': setting.data}
                 log('I3', logdata)
             except ValueError as exc:
                 try:
-                    ctl = control(valuename, setting.data)
+                    ctl = control(valuename, setting.data, state)
                 except Exception as exc:
                     logdata = {'Exception': exc}
                     log('I3', logdata)
@@ -60,8 +67,11 @@ class control_applier(applier_frontend):
                 log('E39', logdata)
         #for e in polfile.pol_file.entries:
         #    print('{}:{}:{}:{}:{}'.format(e.type, e.data, e.valuename, e.keyname))
+        skipped = 0
         for cont in self.controls:
-            cont.set_control_status()
+            if cont.set_control_status() is False:
+                skipped += 1
+        log('D365', {'controls': len(self.controls), 'skipped': skipped})
 
     def apply(self):
         '''
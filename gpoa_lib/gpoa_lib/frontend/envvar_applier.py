@@ -27,6 +27,8 @@ class envvar_applier(applier_frontend):
     __module_name = 'EnvvarsApplier'
     __module_experimental = False
     __module_enabled = True
+    writes = ('file:/etc/gpupdate/environment',)
+    policy_preferences = ('Environmentvariables',)
 
     def __init__(self, storage):
         self.storage = storage
@@ -79,6 +81,7 @@ class envvar_applier_user(DualContextApplier):
     __module_name = 'EnvvarsApplierUser'
     __module_experimental = False
     __module_enabled = True
+    policy_preferences = ('Environmentvariables',)
 
     def __init__(self, storage, username):
         self.storage = storage
@@ -20,7 +20,7 @@
 from ..util.logging import log
 
 from .applier_frontend import applier_frontend, DualContextApplier, check_enabled
-from .appliers.file_cp import Execution_check, Files_cp, str2bool as check_str2bool
+from .appliers.file_cp import Execution_check, Files_cp, source_files, str2bool as check_str2bool
 from ..storage.gpp_state import GppStateManager, get_element_type_name, cleanup_file
 
 SECURE_PERMS_KEY = 'Software\\BaseALT\\Policies\\GroupPolicies\\Files\\SecurePermissionsDisabled'
@@ -39,6 +39,10 @@ class file_applier(applier_frontend):
     __module_name = 'FilesApplier'
     __module_experimental = False
     __module_enabled = True
+    writes = ('file:/', 'file-cache')
+    policy_branches = ('Software\\BaseALT\\Policies\\GroupPolicies\\Files',)
+    policy_preferences = ('Files',)
+    reassert = True
 
     def __init__(self, storage, file_cache):
         self.storage = storage
@@ -77,6 +81,14 @@ class file_applier(applier_frontend):
                 logdata = {'uid': getattr(file, 'uid', 'unknown'), 'exc': str(exc)}
                 log('W47', logdata)
 
+    def unc_references(self):
+        '''
+        Files to fetch into the file cache before the appliers run.
+        '''
+        if not self.__module_enabled:
+            return []
+        return source_files(self.files)
+
     def apply(self):
         if self.__module_enabled:
             log('I32')
@@ -89,6 +101,9 @@ class file_applier_user(DualContextApplier):
     __module_name = 'FilesApplierUser'
     __module_experimental = False
     __module_enabled = True
+    policy_branches = ('Software\\BaseALT\\Policies\\GroupPolicies\\Files',)
+    policy_preferences = ('Files',)
+    reassert = True
 
     def __init__(self, storage, file_cache, username):
         self.storage = storage
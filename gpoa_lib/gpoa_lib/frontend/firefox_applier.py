@@ -40,6 +40,8 @@ class firefox_applier(applier_frontend):
     __module_enabled = True
     __registry_branch = 'Software/Policies/Mozilla/Firefox'
     __firefox_policies = '/etc/firefox/policies'
+    writes = ('file:/etc/firefox/policies',)
+    policy_branches = (__registry_branch,)
 
     def __init__(self, storage, username):
         self.storage = storage
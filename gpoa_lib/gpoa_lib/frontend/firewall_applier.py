@@ -34,6 +34,9 @@ class firewall_applier(applier_frontend):
     __firewall_switch = 'SOFTWARE\\Policies\\Microsoft\\WindowsFirewall\\DomainProfile\\EnableFirewall'
     __firewall_reset_cmd = ['/usr/bin/alterator-net-iptables', 'reset']
     __firewall_reset_cmd_path = '/usr/bin/alterator-net-iptables'
+    writes = ('file:/etc/net', 'systemd')
+    policy_branches = ('SOFTWARE\\Policies\\Microsoft\\WindowsFirewall',)
+    reassert = True
 
     def __init__(self, storage):
         self.storage = storage
@@ -31,6 +31,8 @@ class folder_applier(applier_frontend):
     __module_name = 'FoldersApplier'
     __module_experimental = False
     __module_enabled = True
+    writes = ('file:/',)
+    policy_preferences = ('Folders',)
 
     def __init__(self, storage):
         self.storage = storage
@@ -82,6 +84,7 @@ class folder_applier_user(DualContextApplier):
     __module_name = 'FoldersApplierUser'
     __module_experimental = False
     __module_enabled = True
+    policy_preferences = ('Folders',)
 
     def __init__(self, storage, username):
         self.storage = storage
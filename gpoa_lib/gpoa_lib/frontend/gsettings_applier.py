@@ -65,6 +65,9 @@ class gsettings_applier(applier_frontend):
     __global_schema = '/usr/share/glib-2.0/schemas'
     __override_priority_file = 'zzz_policy.gschema.override'
     __override_old_file = '0_policy.gschema.override'
+    writes = ('file:/usr/share/glib-2.0/schemas', 'dconf', 'file-cache')
+    policy_branches = (__registry_branch, __registry_locks_branch)
+    reassert = True
 
 
     def __init__(self, storage, file_cache):
@@ -94,16 +97,21 @@ class gsettings_applier(applier_frontend):
     def uri_fetch_helper(self, schema, path, value):
         return uri_fetch(schema, path, value, self.file_cache)
 
+    def unc_references(self):
+        '''
+        Files to fetch into the file cache before the appliers run.
+        '''
+        if not self.__module_enabled:
+            return []
+        return [setting.data for setting in self.gsettings_keys
+                if setting.hive_key.lower() == self.__wallpaper_entry.lower()]
+
     def run(self):
         # Compatility cleanup of old settings
-        if os.path.exists(self.override_old_file):
+        old_override_removed = os.path.exists(self.override_old_file)
+        if old_override_removed:
             os.remove(self.override_old_file)
 
-        # Cleanup settings from previous run
-        if os.path.exists(self.override_file):
-            log('D82')
-            os.remove(self.override_file)
-
         # Get all configured gsettings locks
         for lock in self.gsettings_locks:
             valuename = lock.hive_key.rpartition('/')[2]
@@ -125,17 +133,33 @@ class gsettings_applier(applier_frontend):
                 data = [setting.data]
             self.gsettings.append(schema, path, data, lock, helper)
 
-        # Create GSettings policy with highest available priority
-        self.gsettings.apply()
+        # Create GSettings policy with highest available priority. The
+        # override replaces the one from the previous run only if its
+        # content changed.
+        override_changed, locks_changed = self.gsettings.apply()
 
         # Recompile GSettings schemas with overrides
-        try:
-            proc = subprocess.run(args=['/usr/bin/glib-compile-schemas', self.__global_schema], capture_output=True, check=True, timeout=60)
-        except Exception as exc:
-            log('E48')
+        if override_changed or old_override_removed or not self.schemas_compiled():
+            try:
+                proc = subprocess.run(args=['/usr/bin/glib-compile-schemas', self.__global_schema], capture_output=True, check=True, timeout=60)
+            except Exception as exc:
+                log('E48')
+        else:
+            log('D361', {'override': self.override_file})
 
         # Update desktop configuration system backend
-        Dconf_registry.dconf_update()
+        if locks_changed:
+            Dconf_registry.dconf_update()
+
+    def schemas_compiled(self):
+        '''
+        Check that the compiled schemas are not older than the override.
+        '''
+        compiled = os.path.join(self.__global_schema, 'gschemas.compiled')
+        try:
+            return os.path.getmtime(compiled) >= os.path.getmtime(self.override_file)
+        except OSError:
+            return False
 
     def apply(self):
         if self.__module_enabled:
@@ -182,6 +206,13 @@ class gsettings_applier_user(DualContextApplier):
     __registry_branch = 'Software\\BaseALT\\Policies\\gsettings\\'
     __wallpaper_entry = 'Software/BaseALT/Policies/gsettings/org.mate.background.picture-filename'
     __vino_authentication_methods_entry = 'Software/BaseALT/Policies/gsettings/org.gnome.Vino.authentication-methods'
+    writes = ('file-cache',)
+    policy_branches = (
+          __registry_branch
+        , 'Software\\Policies\\Microsoft\\Windows\\Control Panel\\Desktop'
+        , 'Software\\Microsoft\\Windows\\CurrentVersion\\Policies\\System'
+    )
+    reassert = True
 
     def __init__(self, storage, file_cache, username):
         self.storage = storage
@@ -272,6 +303,15 @@ class gsettings_applier_user(DualContextApplier):
         else:
             log('D88')
 
+    def unc_references(self):
+        '''
+        Files to fetch into the file cache before the appliers run.
+        '''
+        filter_result = self.storage.get_hkcu_entry(self.__wallpaper_entry)
+        if filter_result and filter_result.data:
+            return [filter_result.data]
+        return []
+
     def admin_context_apply(self):
         # Cache files on remote locations
         try:
@@ -56,6 +56,8 @@ class ini_applier(applier_frontend):
     __module_name = 'InifilesApplier'
     __module_experimental = False
     __module_enabled = True
+    writes = ('file:/',)
+    policy_preferences = ('Inifiles',)
 
     def __init__(self, storage):
         self.storage = storage
@@ -108,6 +110,7 @@ class ini_applier_user(DualContextApplier):
     __module_name = 'InifilesApplierUser'
     __module_experimental = False
     __module_enabled = True
+    policy_preferences = ('Inifiles',)
 
     def __init__(self, storage, username):
         self.username = username
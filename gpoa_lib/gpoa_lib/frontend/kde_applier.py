@@ -18,15 +18,13 @@
 
 import os
 import re
-import shutil
-import subprocess
-from pathlib import Path
 
 try:
     import dbus
 except ImportError:
     dbus = None
 from ..util.exceptions import NotUNCPathError
+from ..util.kconfig import KConfigFile, kconfig_group
 from ..util.logging import log
 from ..util.util import get_homedir
 
@@ -39,6 +37,8 @@ class kde_applier(applier_frontend):
     __module_enabled = False
     __hklm_branch = 'Software/BaseALT/Policies/KDE/'
     __hklm_lock_branch = 'Software/BaseALT/Policies/KDELocks/'
+    writes = ('file:/etc/xdg',)
+    policy_branches = (__hklm_branch, __hklm_lock_branch)
 
     def __init__(self, storage):
         self.storage = storage
@@ -69,10 +69,11 @@ class kde_applier_user(DualContextApplier):
     __module_name = 'KdeApplierUser'
     __module_experimental = True
     __module_enabled = False
-    kde_version = None
     __hkcu_branch = 'Software/BaseALT/Policies/KDE'
     __hkcu_lock_branch = 'Software/BaseALT/Policies/KDELocks'
     __plasma_update_entry = 'Software/BaseALT/Policies/KDE/Plasma/Update'
+    writes = ('file-cache',)
+    policy_branches = (__hkcu_branch, __hkcu_lock_branch)
 
     def __init__(self, storage, username=None, file_cache = None):
         self.storage = storage
@@ -81,7 +82,6 @@ class kde_applier_user(DualContextApplier):
         self.locks_dict = {}
         self.locks_data_dict = {}
         self.all_kde_settings = {}
-        kde_applier_user.kde_version = get_kde_version()
         kde_filter = '{}%'.format(self.__hkcu_branch)
         locks_filter = '{}%'.format(self.__hkcu_lock_branch)
         self.locks_settings = self.storage.filter_hkcu_entries(locks_filter)
@@ -94,6 +94,13 @@ class kde_applier_user(DualContextApplier):
             self.__module_experimental
         )
 
+    def unc_references(self):
+        '''
+        Files to fetch into the file cache before the appliers run.
+        '''
+        return [setting.data for setting in self.kde_settings
+                if setting.keyname.split("/")[-2] == 'wallpaper'][:1]
+
     def admin_context_apply(self):
         try:
             for setting in self.kde_settings:
@@ -132,22 +139,6 @@ dbus_methods_mapping = {
     }
 }
 
-def get_kde_version():
-    try:
-        kinfo_path = shutil.which("kinfo", path="/usr/lib/kf5/bin:/usr/bin")
-        if not kinfo_path:
-            raise FileNotFoundError("Unable to find kinfo")
-        output = subprocess.check_output([kinfo_path], text=True, env={'LANG':'C'}, timeout=15)
-        for line in output.splitlines():
-            if "KDE Frameworks Version" in line:
-                frameworks_version = line.split(":", 1)[1].strip()
-                major_frameworks_version = int(frameworks_version.split(".")[0])
-                return major_frameworks_version
-    except Exception as exc:
-        log('D270', {'exc': str(exc)})
-        return None
-
-
 def create_dict(kde_settings, all_kde_settings, locks_settings, locks_dict, file_cache = None, username = None, plasmaupdate = False):
         for locks in locks_settings:
             locks_dict[locks.valuename] = locks.data
@@ -168,7 +159,11 @@ def create_dict(kde_settings, all_kde_settings, locks_settings, locks_dict, file
                 log('W16', logdata)
 
 def apply(all_kde_settings, locks_dict, username = None):
-    logdata = {}
+    '''
+    Write the settings into the system-wide KDE configuration, or into
+    the configuration of *username*. All keys of a file are written at
+    once and files whose content did not change are not rewritten.
+    '''
     modified_files = set()
     if username is None:
         system_path_settings = '/etc/xdg/'
@@ -185,92 +180,47 @@ def apply(all_kde_settings, locks_dict, username = None):
         ]
         for file in system_files:
             file_to_remove = f'{system_path_settings}{file}'
-            if os.path.exists(file_to_remove):
+            if file not in all_kde_settings and os.path.exists(file_to_remove):
                 os.remove(file_to_remove)
         for file_name, sections in all_kde_settings.items():
-            file_path = f'{system_path_settings}{file_name}'
-            with open(file_path, 'w') as file:
-                for section, keys in sections.items():
-                    section = section.replace(')(', '][')
-                    file.write(f'[{section}]\n')
-                    for key, value in keys.items():
-                        lock = f"{file_name}.{section}.{key}".replace('][', ')(')
-                        if locks_dict.get(lock) == 1:
-                            file.write(f'{key}[$i]={value}\n')
-                        else:
-                            file.write(f'{key}={value}\n')
-                    file.write('\n')
-            modified_files.add(file_name)
+            # The system-wide files hold the policy settings only
+            config = KConfigFile()
+            if write_kde_settings(config, f'{system_path_settings}{file_name}',
+                                  file_name, sections, locks_dict):
+                modified_files.add(file_name)
     else:
         for file_name, sections in all_kde_settings.items():
-            path = f'{get_homedir(username)}/.config/{file_name}'
-            if not os.path.exists(path):
-                Path(path).touch()
-            else:
-                pass
-            for section, keys in sections.items():
-                for key, value in keys.items():
-                    value = str(value)
-                    lock = f"{file_name}.{section}.{key}"
-                    if lock in locks_dict and locks_dict[lock] == 1:
-                        command = [
-                            f'kwriteconfig{kde_applier_user.kde_version}',
-                            '--file', file_name,
-                            '--group', section,
-                            '--key', key +'/$i/',
-                            '--type', 'string',
-                            value
-                        ]
-                    else:
-                        command = [
-                            f'kwriteconfig{kde_applier_user.kde_version}',
-                            '--file', file_name,
-                            '--group', section,
-                            '--key', key,
-                            '--type', 'string',
-                            value
-                        ]
-                    try:
-                        clear_locks_settings(username, file_name, key)
-                        env_path = dict(os.environ)
-                        env_path["PATH"] = "/usr/lib/kf5/bin:/usr/bin"
-                        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env_path, timeout=15)
-                    except Exception as exc:
-                            logdata = {'command': command, 'exc': exc}
-                            log('W22', logdata)
-            new_content = []
             file_path = f'{get_homedir(username)}/.config/{file_name}'
             try:
-                with open(file_path, 'r') as file:
-                    for line in file:
-                        line = line.replace('/$i/', '[$i]').replace(')(', '][')
-                        new_content.append(line)
-                with open(file_path, 'w') as file:
-                    file.writelines(new_content)
-                logdata['file'] = file_name
-                log('D202', logdata)
+                config = KConfigFile.load(file_path)
             except Exception as exc:
-                logdata['exc'] = exc
-                log('W19', logdata)
-            modified_files.add(file_name)
+                log('W19', {'file': file_name, 'exc': exc})
+                continue
+            if write_kde_settings(config, file_path, file_name, sections, locks_dict):
+                modified_files.add(file_name)
     for file_name in modified_files:
         call_dbus_method(file_name)
 
-def clear_locks_settings(username, file_name, key):
+def write_kde_settings(config, file_path, file_name, sections, locks_dict):
     '''
-    Method to remove old locked settings
+    Set *sections* in *config* and save it to *file_path*. Returns True
+    if the file changed.
     '''
-    file_path = f'{get_homedir(username)}/.config/{file_name}'
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-    with open(file_path, 'w') as file:
-        for line in lines:
-            if f'{key}[$i]=' not in line:
-                file.write(line)
-    for line in lines:
-        if f'{key}[$i]=' in line:
-            logdata = {'line': line.strip()}
-            log('I10', logdata)
+    logdata = {'file': file_name}
+    try:
+        for section, keys in sections.items():
+            for key, value in keys.items():
+                lock = f"{file_name}.{section}.{key}"
+                config.set(kconfig_group(section), key, str(value), locks_dict.get(lock) == 1)
+        if not config.save(file_path):
+            log('D367', logdata)
+            return False
+        log('D202', logdata)
+        return True
+    except Exception as exc:
+        logdata['exc'] = exc
+        log('W19', logdata)
+        return False
 
 def apply_for_wallpaper(data, file_cache, username, plasmaupdate):
     '''
@@ -285,46 +235,18 @@ def apply_for_wallpaper(data, file_cache, username, plasmaupdate):
         except NotUNCPathError:
             data = str(data)
 
-        with open(path_to_wallpaper, 'r') as file:
-            current_wallpaper = file.read()
-        match = re.search(rf'\[Containments\]\[{id_desktop}\]\[Wallpaper\]\[org\.kde\.image\]\[General\]\s+Image=(.*)', current_wallpaper)
-        if match:
-            current_wallpaper_path = match.group(1)
-            flag = (current_wallpaper_path == data)
-        else:
-            flag = False
-
-        env_path = dict(os.environ)
-        env_path["LANGUAGE"] = env_path.get("LANG", "").split(".")[0]
-        env_path["XDG_DATA_DIRS"] = "/usr/share/kf5:"
-        env_path["DISPLAY"] = ":0"
-        env_path["XDG_RUNTIME_DIR"] = f"/run/user/{os.getuid()}"
-        env_path["PATH"] = "/usr/lib/kf5/bin:/usr/bin"
-        env_path["DBUS_SESSION_BUS_ADDRESS"] = f"unix:path=/run/user/{os.getuid()}/bus"
-        if not flag:
-            if os.path.isfile(path_to_wallpaper):
-                command = [
-                    f'kwriteconfig{kde_applier_user.kde_version}',
-                    '--file', 'plasma-org.kde.plasma.desktop-appletsrc',
-                    '--group', 'Containments',
-                    '--group', id_desktop,
-                    '--group', 'Wallpaper',
-                    '--group', 'org.kde.image',
-                    '--group', 'General',
-                    '--key', 'Image',
-                    '--type', 'string',
-                    data
-                    ]
-                try:
-                    subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env_path, timeout=15)
-                except Exception as exc:
-                        logdata = {'command': command, 'exc': exc}
-                        log('E68', logdata)
-                if plasmaupdate == 1:
-                    call_dbus_method("wallpaper")
-        else:
+        if id_desktop is None or not os.path.isfile(path_to_wallpaper):
             logdata = {'file': path_to_wallpaper}
             log('W21', logdata)
+            return
+        config = KConfigFile.load(path_to_wallpaper)
+        group = ('Containments', id_desktop, 'Wallpaper', 'org.kde.image', 'General')
+        config.set(group, 'Image', data)
+        if config.save(path_to_wallpaper):
+            if plasmaupdate == 1:
+                call_dbus_method("wallpaper")
+        else:
+            log('D367', {'file': path_to_wallpaper})
     except OSError as exc:
         logdata = {'exc': exc}
         log('W17', logdata)
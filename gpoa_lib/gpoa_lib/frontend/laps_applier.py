@@ -95,6 +95,11 @@ class laps_applier(applier_frontend):
     _WINDOWS_REGISTRY_PATH = 'SOFTWARE/Microsoft/Windows/CurrentVersion/Policies/LAPS/'
     _ALT_REGISTRY_PATH = 'Software/BaseALT/Policies/Laps/'
 
+    # The password is rotated when it expires, so the applier runs on
+    # every run while LAPS is configured
+    policy_branches = (_WINDOWS_REGISTRY_PATH, _ALT_REGISTRY_PATH)
+    time_dependent = True
+
     # LDAP attributes
     _ATTR_ENCRYPTED_PASSWORD = 'msLAPS-EncryptedPassword'
     _ATTR_PASSWORD_EXPIRATION_TIME = 'msLAPS-PasswordExpirationTime'
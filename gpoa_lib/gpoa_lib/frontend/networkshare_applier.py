@@ -27,6 +27,9 @@ class networkshare_applier(applier_frontend):
     __module_name_user = 'NetworksharesApplierUser'
     __module_experimental = True
     __module_enabled = False
+    writes = ('samba-usershares',)
+    policy_preferences = ('Networkshares',)
+    reassert = True
 
     def __init__(self, storage, username = None):
         self.storage = storage
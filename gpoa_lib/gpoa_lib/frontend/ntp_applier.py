@@ -34,10 +34,13 @@ class ntp_applier(applier_frontend):
     __module_name = 'NTPApplier'
     __module_experimental = True
     __module_enabled = False
+    writes = ('file:/etc/chrony.conf', 'control', 'systemd')
 
     __ntp_branch = 'Software\\Policies\\Microsoft\\W32time\\Parameters'
     __ntp_client_branch = 'Software\\Policies\\Microsoft\\W32time\\TimeProviders\\NtpClient'
     __ntp_server_branch = 'Software\\Policies\\Microsoft\\W32time\\TimeProviders\\NtpServer'
+    policy_branches = (__ntp_branch, __ntp_client_branch, __ntp_server_branch)
+    reassert = True
 
     __ntp_key_address = 'NtpServer'
     __ntp_key_type = 'Type'
@@ -32,6 +32,9 @@ class package_applier(applier_frontend):
     __remove_key_name = 'Remove'
     __sync_key_name = 'Sync'
     __hklm_branch = 'Software\\BaseALT\\Policies\\Packages'
+    writes = ('package', 'file:/')
+    policy_branches = (__hklm_branch,)
+    reassert = True
 
     def __init__(self, storage):
         self.storage = storage
@@ -90,6 +93,8 @@ class package_applier_user(DualContextApplier):
     __remove_key_name = 'Remove'
     __sync_key_name = 'Sync'
     __hkcu_branch = 'Software\\BaseALT\\Policies\\Packages'
+    policy_branches = (__hkcu_branch,)
+    reassert = True
 
     def __init__(self, storage, username):
         self.storage = storage
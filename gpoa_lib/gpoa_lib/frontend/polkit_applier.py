@@ -39,6 +39,12 @@ class polkit_applier(applier_frontend):
         __registry_branch : ['49-alt_group_policy_permissions', {}],
         __registry_locks_branch : ['47-alt_group_policy_permissions', {}]
     }
+    writes = ('file:/etc/polkit-1/rules.d',)
+    policy_branches = (
+          __registry_branch
+        , __registry_locks_branch
+        , 'Software\\Policies\\Microsoft\\Windows\\RemovableStorageDevices'
+    )
 
     def __init__(self, storage):
         self.storage = storage
@@ -118,6 +124,10 @@ class polkit_applier_user(DualContextApplier):
             __deny_all_win: ['48-gpoa_disk_permissions_user', { 'Deny_All': 0, 'User': '' }],
             __registry_branch : ['48-alt_group_policy_permissions_user', {'User': ''}]
     }
+    policy_branches = (
+          __registry_branch
+        , 'Software\\Policies\\Microsoft\\Windows\\RemovableStorageDevices'
+    )
 
     def __init__(self, storage, username):
         self.storage = storage
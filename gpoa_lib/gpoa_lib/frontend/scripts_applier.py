@@ -31,6 +31,9 @@ class scripts_applier(applier_frontend):
     __module_experimental = False
     __module_enabled = True
     __cache_scripts = '/var/cache/gpupdate_scripts_cache/machine/'
+    writes = ('file:/var/cache/gpupdate_scripts_cache/machine',)
+    policy_preferences = ('Scripts',)
+    reassert = True
 
     def __init__(self, storage):
         self.storage = storage
@@ -81,6 +84,8 @@ class scripts_applier_user(DualContextApplier):
     __module_experimental = False
     __module_enabled = True
     __cache_scripts = '/var/cache/gpupdate_scripts_cache/users/'
+    policy_preferences = ('Scripts',)
+    reassert = True
 
     def __init__(self, storage, username):
         self.storage = storage
@@ -19,7 +19,7 @@
 from ..util.logging import log
 
 from .applier_frontend import applier_frontend, DualContextApplier, check_enabled
-from .appliers.systemd import systemd_unit
+from .appliers.systemd import systemd_manager
 
 
 class systemd_applier(applier_frontend):
@@ -27,11 +27,14 @@ class systemd_applier(applier_frontend):
     __module_experimental = False
     __module_enabled = True
     __registry_branch = 'Software/BaseALT/Policies/SystemdUnits'
+    writes = ('systemd',)
+    policy_branches = (__registry_branch,)
+    reassert = True
 
     def __init__(self, storage):
         self.storage = storage
         self.systemd_unit_settings = self.storage.filter_hklm_entries(self.__registry_branch)
-        self.units = []
+        self.units = {}
         self.__module_enabled = check_enabled(
               self.storage
             , self.__module_name
@@ -41,18 +44,19 @@ class systemd_applier(applier_frontend):
     def run(self):
         for setting in self.systemd_unit_settings:
             try:
-                self.units.append(systemd_unit(setting.valuename, int(setting.data)))
+                self.units[setting.valuename] = int(setting.data)
                 logdata = {'unit': format(setting.valuename)}
                 log('I4', logdata)
             except Exception as exc:
                 logdata = {'unit': format(setting.valuename), 'exc': exc}
                 log('I5', logdata)
-        for unit in self.units:
-            try:
-                unit.apply()
-            except Exception as exc:
-                logdata = {'unit': unit.unit_name, 'exc': exc}
-                log('E45', logdata)
+        if not self.units:
+            return
+        try:
+            systemd_manager().apply(self.units)
+        except Exception as exc:
+            logdata = {'unit': ', '.join(self.units), 'exc': exc}
+            log('E45', logdata)
 
     def apply(self):
         '''
@@ -70,6 +74,8 @@ class systemd_applier_user(DualContextApplier):
     __module_experimental = False
     __module_enabled = True
     __registry_branch = 'Software/BaseALT/Policies/SystemdUnits'
+    policy_branches = (__registry_branch,)
+    reassert = True
 
     def __init__(self, storage, username):
         self.storage = storage
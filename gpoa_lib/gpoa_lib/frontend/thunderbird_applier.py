@@ -30,6 +30,8 @@ class thunderbird_applier(applier_frontend):
     __module_enabled = True
     __registry_branch = 'Software/Policies/Mozilla/Thunderbird'
     __thunderbird_policies = '/etc/thunderbird/policies'
+    writes = ('file:/etc/thunderbird/policies',)
+    policy_branches = (__registry_branch,)
 
     def __init__(self, storage, username):
         self.storage = storage
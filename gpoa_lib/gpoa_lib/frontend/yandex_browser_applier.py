@@ -32,6 +32,8 @@ class yandex_browser_applier(applier_frontend):
     __registry_branch = 'Software/Policies/YandexBrowser'
     __managed_policies_path = '/etc/opt/yandex/browser/policies/managed'
     __recommended_policies_path = '/etc/opt/yandex/browser/policies/recommended'
+    writes = ('file:/etc/opt/yandex/browser/policies',)
+    policy_branches = (__registry_branch,)
 
     def __init__(self, storage, username):
         self.storage = storage
@@ -57,6 +57,8 @@ _INFO_MESSAGES = {
     34: 'Running INI applier for machine',
     35: 'Running NetworkShare applier for machine',
     36: 'Running LAPS applier for machine',
+    37: 'Policies did not change since the last successful run, appliers are skipped',
+    38: 'Serving gpoa runs',
 }
 
 _ERROR_MESSAGES = {
@@ -140,6 +142,7 @@ _ERROR_MESSAGES = {
     79: 'Unable to initialize Freeipa backend',
     80: 'FreeIPA API error',
     81: 'Error setting trust attribute for shortcut',
+    82: 'Error processing gpoa service request',
 }
 
 _DEBUG_MESSAGES = {
@@ -394,7 +397,6 @@ _DEBUG_MESSAGES = {
     274: 'Failed to parse dict literal',
     275: 'Failed to clean data',
     276: 'Failed to search for directory',
-    277: 'Failed to search for file',
     278: 'Failed to get GPO list for trust user',
     279: 'Failed to select AD site servers',
     280: 'Failed to select all AD servers',
@@ -448,6 +450,48 @@ _DEBUG_MESSAGES = {
     328: 'Failed to read key from dconf binary database fallback',
     329: 'Failed to read password last modified time from dconf binary database',
     330: 'Failed to start D-Bus session for dconf operations',
+    331: 'dconf database compiled in-process',
+    332: 'Unable to compile dconf database in-process, falling back to dconf compile',
+    333: 'No dconf sections changed since the last commit, database is left as is',
+    334: 'Committing changed dconf sections',
+    335: 'Policy digest is not used because preferences have state-dependent filters',
+    336: 'Applier always runs because its preferences have state-dependent filters',
+    337: 'Applier inputs did not change since the last run, applier is skipped',
+    338: 'Unable to decode stored preferences',
+    339: 'Unable to parse GPT file in advance, it will be parsed during merge',
+    340: 'GPO replicated from SYSVOL',
+    341: 'Opening SMB session to DC for GPO replication',
+    342: 'Cached GPO matches the GPT.INI version on the server, download skipped',
+    343: 'GPO synchronized with the server',
+    344: 'Using cached AD site and DC topology',
+    345: 'Unable to cache AD site and DC topology',
+    346: 'Measured SMB negotiate latency of DC',
+    347: 'Reusing the cached machine Kerberos ticket',
+    348: 'Renewed the cached machine Kerberos ticket',
+    349: 'gpoa service request processed',
+    350: 'Waiting for another gpoa run to finish applying policies',
+    351: 'Running computer and user policy passes concurrently',
+    352: 'Failed to save the file cache manifest',
+    353: 'Remote file unchanged, using the cached copy',
+    354: 'Remote file fetched into the file cache',
+    355: 'File cache statistics',
+    356: 'File copied from the prefetched cache copy',
+    357: 'Failed to prefetch file into the file cache',
+    358: 'Files prefetched into the file cache',
+    359: 'Failed to collect files referenced by applier',
+    360: 'Running appliers which do not share state concurrently',
+    361: 'GSettings policy is unchanged, schemas are not recompiled',
+    362: 'Systemd unit is already in the desired state',
+    363: 'Systemd units applied',
+    364: 'Control facility already has the desired status',
+    365: 'Control facilities applied',
+    366: 'Unable to query states of control facilities',
+    367: 'KDE configuration file is unchanged',
+    368: 'Waiting for the computer pass to finish before applying user policies',
+    369: 'Unable to cache possible values of control facilities',
+    370: 'Applier logged problems and will run again on the next run',
+    371: 'Waiting for another gpoa run replicating the same GPO',
+    372: 'Policies did not change, but appliers have to run again',
 }
 
 _WARNING_MESSAGES = {
@@ -513,6 +557,7 @@ _WARNING_MESSAGES = {
     54: 'Failed to get domain info for filter context',
     55: 'Failed to get group SIDs for filter',
     56: 'dconf database not found',
+    57: 'Rejected gpoa service request',
 }
 
 _FATAL_MESSAGES = {
@@ -87,6 +87,7 @@ class plugin_manager:
                     log('D236', {'plugin_name': plugin_obj.plugin_name})
             else:
                 log('W44', {'plugin_name': getattr(plugin_obj, 'plugin_name', 'unknown')})
+        self.file_cache.save_manifest()
 
     def load_plugins(self):
         """Load plugins from multiple directories"""
@@ -0,0 +1,506 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+In-process replacement for ``dconf compile``.
+
+Keyfiles of a ``<db>.d`` directory and the lock lists in its ``locks``
+subdirectory are merged the way ``dconf compile`` merges them, and the
+result is written with the GVDB builder.  The registry dictionary the
+keyfile was generated from can be passed directly, so the values do not
+have to be parsed back from text.
+
+Anything outside the GVariant text subset understood here raises
+:class:`DconfCompileError`; callers are expected to fall back to the
+``dconf compile`` utility in that case.
+'''
+
+import os
+import re
+import stat
+import tempfile
+
+from .gvdb import GvdbBuilder
+from ..util.ini_writer import format_ini_value
+
+
+DCONF_LOCKS_DIR = 'locks'
+DCONF_LOCKS_TABLE = '.locks'
+
+
+class DconfCompileError(Exception):
+    pass
+
+
+class _InvalidValue(Exception):
+    '''
+    The value is not valid GVariant text; ``dconf compile`` warns and
+    skips such keys.
+    '''
+
+
+_NUMBER = re.compile(r'[0-9a-zA-Z.+-]+')
+_INTEGER = re.compile(r'[+-]?(0|[1-9][0-9]*)\Z')
+_DOUBLE = re.compile(r'[+-]?[0-9]+\.[0-9]*([eE][+-]?[0-9]+)?\Z|[+-]?[0-9]+[eE][+-]?[0-9]+\Z')
+_IDENTIFIER = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')
+
+_INTEGER_RANGES = {
+    'y': (0, 0xff),
+    'n': (-0x8000, 0x7fff),
+    'q': (0, 0xffff),
+    'i': (-0x80000000, 0x7fffffff),
+    'u': (0, 0xffffffff),
+    'h': (-0x80000000, 0x7fffffff),
+    'x': (-0x8000000000000000, 0x7fffffffffffffff),
+    't': (0, 0xffffffffffffffff),
+}
+_TYPE_KEYWORDS = {
+    'boolean': 'b',
+    'byte': 'y',
+    'int16': 'n',
+    'uint16': 'q',
+    'int32': 'i',
+    'uint32': 'u',
+    'handle': 'h',
+    'int64': 'x',
+    'uint64': 't',
+    'double': 'd',
+    'string': 's',
+    'objectpath': 'o',
+    'signature': 'g',
+}
+_STRING_ESCAPES = {
+    'a': '\a',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+    'v': '\v',
+}
+# Untyped integer literals may still become any numeric type
+_ANY_NUMBER = 'N'
+
+
+class _ValueParser:
+    '''
+    Parser for the part of the GVariant text format that appears in
+    dconf keyfiles: basic values, type keywords, ``@type`` annotations
+    and arrays of basic values.
+    '''
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def _skip_space(self):
+        while self.pos < len(self.text) and self.text[self.pos] in ' \t\n\r\f\v':
+            self.pos += 1
+
+    def _peek(self):
+        self._skip_space()
+        return self.text[self.pos] if self.pos < len(self.text) else ''
+
+    def parse(self):
+        signature, value = self._parse_value(None)
+        if self._peek():
+            raise _InvalidValue('Unexpected text after value')
+        if signature == _ANY_NUMBER:
+            signature, value = 'i', self._integer(value, 'i')
+        return signature, value
+
+    def _parse_value(self, expected):
+        char = self._peek()
+        if not char:
+            raise _InvalidValue('Expected value')
+        if char == '@':
+            self.pos += 1
+            signature = self._parse_type()
+            return signature, self._coerce(self._parse_value(signature), signature)
+        if char in '\'"':
+            return 's', self._parse_string()
+        if char == '[':
+            return self._parse_array(expected)
+        if char in '+-.0123456789':
+            return self._parse_number()
+        match = _IDENTIFIER.match(self.text, self.pos)
+        if match is None:
+            raise DconfCompileError('Unsupported value: {}'.format(self.text))
+        word = match.group()
+        self.pos = match.end()
+        if word in ('true', 'false'):
+            return 'b', word == 'true'
+        if word in ('inf', 'nan'):
+            return 'd', float(word)
+        if word in _TYPE_KEYWORDS:
+            signature = _TYPE_KEYWORDS[word]
+            return signature, self._coerce(self._parse_value(signature), signature)
+        if word in ('nothing', 'just') or (word == 'b' and self.text[self.pos:self.pos + 1] in ('"', "'")):
+            raise DconfCompileError('Unsupported value: {}'.format(self.text))
+        raise _InvalidValue('Unknown keyword: {}'.format(word))
+
+    def _parse_type(self):
+        self._skip_space()
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] == 'a':
+            self.pos += 1
+        if self.pos - start > 1 or self.pos >= len(self.text) \
+                or self.text[self.pos] not in _TYPE_KEYWORDS.values():
+            raise DconfCompileError('Unsupported type annotation: {}'.format(self.text))
+        self.pos += 1
+        return self.text[start:self.pos]
+
+    def _parse_string(self):
+        quote = self.text[self.pos]
+        pos = self.pos + 1
+        result = []
+        while True:
+            if pos >= len(self.text):
+                raise _InvalidValue('Unterminated string constant')
+            char = self.text[pos]
+            if char == quote:
+                break
+            if char != '\\':
+                result.append(char)
+                pos += 1
+                continue
+            pos += 1
+            if pos >= len(self.text):
+                raise _InvalidValue('Unterminated string constant')
+            char = self.text[pos]
+            if char in 'uU':
+                length = 4 if char == 'u' else 8
+                digits = self.text[pos + 1:pos + 1 + length]
+                if (len(digits) != length
+                        or any(d not in '0123456789abcdefABCDEF' for d in digits)
+                        or int(digits, 16) == 0 or int(digits, 16) > 0x10ffff
+                        or 0xd800 <= int(digits, 16) <= 0xdfff):
+                    raise _InvalidValue('Invalid unicode escape')
+                result.append(chr(int(digits, 16)))
+                pos += 1 + length
+            elif char in _STRING_ESCAPES:
+                result.append(_STRING_ESCAPES[char])
+                pos += 1
+            elif char == '\n':
+                pos += 1
+            else:
+                result.append(char)
+                pos += 1
+        self.pos = pos + 1
+        return ''.join(result)
+
+    def _parse_number(self):
+        match = _NUMBER.match(self.text, self.pos)
+        token = match.group() if match else ''
+        self.pos += len(token)
+        if _INTEGER.match(token):
+            return _ANY_NUMBER, int(token)
+        if _DOUBLE.match(token):
+            return 'd', float(token)
+        raise DconfCompileError('Unsupported number: {}'.format(token))
+
+    def _parse_array(self, expected):
+        if expected is not None and not expected.startswith('a'):
+            raise _InvalidValue('Array where {} is expected'.format(expected))
+        element = expected[1:] if expected else None
+        self.pos += 1
+        items = []
+        if self._peek() == ']':
+            self.pos += 1
+        else:
+            while True:
+                items.append(self._parse_value(element))
+                char = self._peek()
+                self.pos += 1
+                if char == ']':
+                    break
+                if char != ',':
+                    raise _InvalidValue('Expected , or ]')
+        if element is None:
+            element = self._unify([signature for signature, _ in items])
+        return 'a' + element, [self._coerce(item, element) for item in items]
+
+    @staticmethod
+    def _unify(signatures):
+        kinds = set(signatures)
+        if not kinds:
+            raise DconfCompileError('Unable to infer type of empty array')
+        if kinds == {_ANY_NUMBER}:
+            return 'i'
+        kinds.discard(_ANY_NUMBER)
+        if len(kinds) != 1:
+            raise DconfCompileError('Array elements of different types')
+        element = kinds.pop()
+        if _ANY_NUMBER in signatures and element not in _INTEGER_RANGES and element != 'd':
+            raise _InvalidValue('Number in array of {}'.format(element))
+        if element.startswith('a'):
+            raise DconfCompileError('Nested arrays are not supported')
+        return element
+
+    def _coerce(self, item, signature):
+        item_signature, value = item
+        if item_signature == signature:
+            return value
+        if item_signature == _ANY_NUMBER:
+            if signature == 'd':
+                return float(value)
+            if signature in _INTEGER_RANGES:
+                return self._integer(value, signature)
+        if item_signature == 's' and signature in 'og':
+            return value
+        raise _InvalidValue('Value of type {} where {} is expected'.format(item_signature, signature))
+
+    @staticmethod
+    def _integer(value, signature):
+        low, high = _INTEGER_RANGES[signature]
+        if not low <= value <= high:
+            raise _InvalidValue('Number out of range')
+        return value
+
+
+def parse_value(text):
+    '''
+    Parse the GVariant text of a keyfile value into ``(signature, value)``.
+
+    Returns None for text ``dconf compile`` would reject and raises
+    :class:`DconfCompileError` for valid text this parser does not handle.
+    '''
+    try:
+        return _ValueParser(text).parse()
+    except _InvalidValue:
+        return None
+
+
+def _check_group(group):
+    if not group or any(char in group for char in '[]') or any(ord(char) < 0x20 for char in group):
+        raise DconfCompileError('Invalid keyfile group name: {}'.format(group))
+
+
+def _check_key(key):
+    if not key or any(char in key for char in '=[]\n\r'):
+        raise DconfCompileError('Unsupported keyfile key name: {}'.format(key))
+
+
+def parse_keyfile(content):
+    '''
+    Split keyfile *content* into ``[(group, [(key, raw_value)])]`` as
+    GKeyFile does.  Repeated groups are merged, later keys win.
+    '''
+    groups = {}
+    current = None
+    for line in content.split('\n'):
+        line = line.rstrip('\r').lstrip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('['):
+            closing = line.find(']')
+            if closing < 0 or line[closing + 1:].strip(' \t'):
+                raise DconfCompileError('Invalid keyfile group line: {}'.format(line))
+            group = line[1:closing]
+            _check_group(group)
+            current = groups.setdefault(group, {})
+            continue
+        if current is None or '=' not in line or line.startswith('='):
+            raise DconfCompileError('Invalid keyfile line: {}'.format(line))
+        key, value = line.split('=', 1)
+        key = key.rstrip()
+        _check_key(key)
+        current[key] = value.lstrip(' ')
+    return [(group, list(items.items())) for group, items in groups.items()]
+
+
+def _is_key(path):
+    return path.startswith('/') and not path.endswith('/') and '//' not in path
+
+
+def _is_dir(path):
+    return path.startswith('/') and path.endswith('/') and '//' not in path
+
+
+def _group_path(group):
+    if group == '/':
+        return '/'
+    return '/{}/'.format(group)
+
+
+class DconfDatabase:
+    '''
+    Values and locks of one dconf database under construction.
+    '''
+
+    def __init__(self):
+        self.values = {}
+        self.locks = None
+
+    def add_group(self, group, items):
+        '''
+        Add ``(key, raw_value)`` pairs of a keyfile *group*.  Invalid
+        paths and values are skipped like ``dconf compile`` skips them.
+        '''
+        path = _group_path(group)
+        if not _is_dir(path):
+            return
+        for key, raw_value in items:
+            key_path = path + key
+            if not _is_key(key_path):
+                continue
+            value = parse_value(raw_value)
+            if value is not None:
+                self.values[key_path] = value
+
+    def add_keyfile(self, content):
+        for group, items in parse_keyfile(content):
+            self.add_group(group, items)
+
+    def add_registry(self, data):
+        '''
+        Add a ``{section: {valuename: data}}`` dictionary, taking every
+        value the way ``write_ini_sections()`` writes it into a keyfile.
+        '''
+        for section, section_data in data.items():
+            if not section:
+                continue
+            _check_group(section)
+            if not isinstance(section_data, dict):
+                continue
+            items = []
+            for key, value in section_data.items():
+                if not key:
+                    continue
+                key = str(key).strip()
+                if key.startswith('#'):
+                    continue
+                _check_key(key)
+                text = format_ini_value(value)
+                if '\n' in text or '\r' in text:
+                    raise DconfCompileError('Value of {}/{} spans several lines'.format(section, key))
+                items.append((key, text))
+            self.add_group(section, items)
+
+    def add_locks(self, content):
+        if self.locks is None:
+            self.locks = []
+        for line in content.split('\n'):
+            if line.startswith('#'):
+                continue
+            line = line.strip()
+            if line and (_is_key(line) or _is_dir(line)):
+                self.locks.append(line)
+
+    def to_bytes(self):
+        builder = GvdbBuilder()
+        for key in sorted(self.values):
+            signature, value = self.values[key]
+            item = builder.insert_value(key, signature, value)
+            self._set_parent(builder, item)
+        if self.locks is not None:
+            locks = builder.insert_table(DCONF_LOCKS_TABLE)
+            for lock in self.locks:
+                locks.insert_value(lock, 's', '')
+        return builder.write()
+
+    @classmethod
+    def _set_parent(cls, builder, item):
+        key = item.key
+        if key == '/':
+            return
+        parent_name = key[:key.rstrip('/').rfind('/') + 1]
+        created = parent_name not in builder
+        parent = builder.insert(parent_name)
+        item.set_parent(parent)
+        if created:
+            cls._set_parent(builder, parent)
+
+
+def _list_files(directory):
+    names = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith('.') and entry.is_file():
+                names.append(entry.name)
+    return names
+
+
+def _read_text(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError as exc:
+        raise DconfCompileError('{} is not valid UTF-8'.format(path)) from exc
+
+
+def build_database(keyfile_dir, data=None, data_file=None):
+    '''
+    Merge the keyfiles of *keyfile_dir* in name order and return the
+    :class:`DconfDatabase`.
+
+    When *data* is given it replaces the keyfile *data_file* (a path in
+    *keyfile_dir*, which does not have to exist yet) at its place in
+    the merge order.
+    '''
+    if not os.path.isdir(keyfile_dir):
+        raise DconfCompileError('{} is not a directory'.format(keyfile_dir))
+    database = DconfDatabase()
+    names = set(_list_files(keyfile_dir))
+    data_name = os.path.basename(data_file) if data is not None and data_file else None
+    if data_name:
+        names.add(data_name)
+    for name in sorted(names):
+        if name == data_name:
+            database.add_registry(data)
+        else:
+            database.add_keyfile(_read_text(os.path.join(keyfile_dir, name)))
+
+    locks_dir = os.path.join(keyfile_dir, DCONF_LOCKS_DIR)
+    if os.path.isdir(locks_dir):
+        database.locks = []
+        for name in sorted(_list_files(locks_dir)):
+            database.add_locks(_read_text(os.path.join(locks_dir, name)))
+    return database
+
+
+def write_database(db_file, content):
+    '''
+    Atomically replace *db_file* with *content*: the data goes to a
+    temporary file in the same directory which is renamed over it.
+    '''
+    directory = os.path.dirname(db_file) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.{}.'.format(os.path.basename(db_file)), dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fchmod(f.fileno(), stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, db_file)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def compile_database(db_file, keyfile_dir, data=None, data_file=None):
+    '''
+    Build the dconf database *db_file* from *keyfile_dir* without
+    running ``dconf compile``.  Returns the number of keys written.
+    '''
+    database = build_database(keyfile_dir, data, data_file)
+    write_database(db_file, database.to_bytes())
+    return len(database.values)
@@ -0,0 +1,225 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+In-process replacement for ``dconf read`` and ``dconf list``.
+
+The profile named by ``DCONF_PROFILE`` is resolved the same way
+libdconf does it and every database it lists is opened directly
+with the GVDB reader, so no ``dconf`` process has to be spawned.
+'''
+
+import os
+import threading
+
+from .gvdb import GvdbTable, variant_decode
+
+
+DCONF_PROFILE_DIRS = ['/etc/dconf/profile']
+DCONF_SYSTEM_DB_DIR = '/etc/dconf/db'
+DCONF_LOCKS_TABLE = '.locks'
+DCONF_DEFAULT_PROFILE = 'user-db:user\n'
+
+
+def _user_config_dir(env):
+    config_dir = env.get('XDG_CONFIG_HOME')
+    if config_dir:
+        return config_dir
+    home = env.get('HOME') or os.path.expanduser('~')
+    return os.path.join(home, '.config')
+
+
+def _data_dirs(env):
+    data_dirs = env.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+    return [os.path.join(d, 'dconf', 'profile') for d in data_dirs.split(':') if d]
+
+
+def find_profile(profile, env=None):
+    '''
+    Return the path of the profile file for *profile* or None.
+
+    Absolute names are used as is, other names are searched in
+    ``/etc/dconf/profile`` and ``$XDG_DATA_DIRS/dconf/profile``.
+    '''
+    if not profile:
+        return None
+    if profile.startswith('/'):
+        return profile if os.path.isfile(profile) else None
+    env = os.environ if env is None else env
+    for directory in DCONF_PROFILE_DIRS + _data_dirs(env):
+        path = os.path.join(directory, profile)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def parse_profile(content, env=None):
+    '''
+    Turn profile *content* into an ordered list of ``(kind, path)``
+    database sources.  ``service-db`` lines are skipped since they
+    are not backed by a file.
+    '''
+    env = os.environ if env is None else env
+    sources = []
+    for line in content.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line or ':' not in line:
+            continue
+        kind, name = (part.strip() for part in line.split(':', 1))
+        if not name:
+            continue
+        if kind == 'user-db':
+            sources.append((kind, os.path.join(_user_config_dir(env), 'dconf', name)))
+        elif kind == 'system-db':
+            sources.append((kind, os.path.join(DCONF_SYSTEM_DB_DIR, name)))
+        elif kind == 'file-db':
+            sources.append((kind, name))
+    return sources
+
+
+class DconfSource:
+    '''
+    One database listed in a dconf profile.
+
+    The GVDB file is re-read only when its inode, size or mtime
+    change, so repeated lookups during a single run cost one ``stat``.
+    '''
+
+    def __init__(self, kind, path):
+        self.kind = kind
+        self.path = path
+        self.values = None
+        self.locks = None
+        self._stamp = None
+
+    def refresh(self):
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except OSError:
+            stamp = None
+        if stamp == self._stamp:
+            return
+        self.values = None
+        self.locks = None
+        self._stamp = None
+        if stamp is None:
+            return
+        self.values = GvdbTable.from_file(self.path)
+        if self.kind != 'user-db':
+            self.locks = self.values.get_table(DCONF_LOCKS_TABLE)
+        self._stamp = stamp
+
+
+class DconfEngine:
+    '''
+    Read-only view of the databases listed in a dconf profile.
+
+    Lookups follow ``dconf_engine_read()``: a lock in any system
+    database hides the user database and all databases before the one
+    holding the lock; otherwise the first database holding the key wins.
+
+    Parameters
+    ----------
+    sources : list[tuple[str, str]]
+        ``(kind, path)`` pairs as returned by :func:`parse_profile`.
+    '''
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, sources):
+        self.sources = [DconfSource(kind, path) for kind, path in sources]
+
+    @classmethod
+    def from_env(cls, env=None):
+        '''
+        Return the engine for the profile named by ``DCONF_PROFILE``
+        in *env*.  Engines are cached per profile file and content.
+        '''
+        env = os.environ if env is None else env
+        profile = env.get('DCONF_PROFILE')
+        path = find_profile(profile, env) if profile else find_profile('user', env)
+        if path:
+            with open(path) as f:
+                content = f.read()
+        elif profile:
+            # Like libdconf: a missing explicit profile gives no databases
+            content = ''
+        else:
+            content = DCONF_DEFAULT_PROFILE
+
+        cache_key = (path, content, _user_config_dir(env))
+        with cls._cache_lock:
+            engine = cls._cache.get(cache_key)
+            if engine is None:
+                engine = cls(parse_profile(content, env))
+                cls._cache[cache_key] = engine
+        return engine
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._cache = {}
+
+    def _refresh(self):
+        for source in self.sources:
+            source.refresh()
+
+    def _lock_level(self, key):
+        for index in range(len(self.sources) - 1, 0, -1):
+            locks = self.sources[index].locks
+            if locks is not None and locks.has_value(key):
+                return index
+        return 0
+
+    def is_writable(self, key):
+        self._refresh()
+        return self._lock_level(key) == 0
+
+    def read(self, key):
+        '''
+        Return the value of *key* or None when no database holds it.
+        '''
+        self._refresh()
+        for source in self.sources[self._lock_level(key):]:
+            if source.values is None:
+                continue
+            raw = source.values.get_raw_value(key)
+            if raw is not None:
+                return variant_decode('v', raw, source.values.byteorder)
+        return None
+
+    def list_keys(self, directory):
+        '''
+        Return all keys (not directories) below *directory*, in the
+        order they are first seen across the profile databases.
+        '''
+        if not directory.startswith('/'):
+            directory = '/' + directory
+        if not directory.endswith('/'):
+            directory += '/'
+        self._refresh()
+        keys = dict()
+        for source in self.sources:
+            if source.values is None:
+                continue
+            for name in source.values.get_names():
+                if name.startswith(directory) and not name.endswith('/'):
+                    keys[name] = None
+        return list(keys)
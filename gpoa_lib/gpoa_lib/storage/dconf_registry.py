@@ -32,11 +32,25 @@ DCONF_DB_DIR_SUFFIX = '.d/'
 INI_EXTENSION = '.ini'
 POL_EXTENSION = '.pol'
 
+from .dconf_compile import compile_database
+from .dconf_engine import DconfEngine
 from .dynamic_attributes import RegistryKeyMetadata
+from .preference_codec import encode_preferences
+from .policy_digest import (
+    GPUPDATE_BRANCH,
+    PREFERENCES_BRANCH,
+    PREVIOUS_PREFIX,
+    compute_entries_digest,
+    compute_policy_digest,
+    file_stamp,
+    find_volatile_filters,
+    user_session_stamp,
+)
+from .registry_index import RegistryDict
 from ..util.constants import TRUE_STRINGS
-from ..util.ini_writer import write_ini_sections
+from ..util.ini_writer import format_ini_value, write_ini_sections
 from ..util.logging import log
-from ..util.paths import get_dconf_config_path
+from ..util.paths import get_dconf_config_file, get_dconf_config_path
 from ..util.util import (
     add_prefix_to_keys,
     clean_data,
@@ -88,7 +102,7 @@ class Dconf_registry():
     '''
     _GpoPriority = 'Software/BaseALT/Policies/GpoPriority'
     _gpo_name = set()
-    global_registry_dict = {_GpoPriority:{}}
+    global_registry_dict = RegistryDict({_GpoPriority:{}})
     previous_global_registry_dict = {}
     __template_file = '/usr/share/dconf/user_mandatory.template'
     _policies_path = 'Software/'
@@ -107,6 +121,8 @@ class Dconf_registry():
     list_keys = []
     _info = {}
     _counter_gpt = itertools.count(0)
+    _committed = {}
+    _preferences_dirty = True
 
     shortcuts = []
     folders = []
@@ -128,7 +144,7 @@ class Dconf_registry():
     def reset(cls):
         with cls._lock:
             cls._gpo_name = set()
-            cls.global_registry_dict = {cls._GpoPriority: {}}
+            cls.global_registry_dict = RegistryDict({cls._GpoPriority: {}})
             cls.previous_global_registry_dict = {}
             cls._gpt_read_flag = False
             cls._force = False
@@ -153,6 +169,8 @@ class Dconf_registry():
             cls.printers = []
             cls.scripts = []
             cls.networkshares = []
+            cls._committed = {}
+            cls._preferences_dirty = True
 
     @classmethod
     def set_info(cls, key , data):
@@ -171,22 +189,15 @@ class Dconf_registry():
     def get_matching_keys(path):
         if path[0] != '/':
             path = '/' + path
-        logdata = {}
-        envprofile = get_dconf_envprofile()
+        logdata = {'path': path}
+        log('D204', logdata)
         try:
-            with subprocess.Popen(['dconf', 'list', path],
-                                       env=envprofile, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as process:
-                logdata['path'] = path
-                log('D204', logdata)
-                output, error = process.communicate(timeout=10)
-            if not output and not error:
-                return
-            if not error:
-                keys = output.strip().split('\n')
-                for key in keys:
-                    Dconf_registry.get_matching_keys(f'{path}{key}')
-            else:
-                Dconf_registry.list_keys.append(path)
+            engine = DconfEngine.from_env(get_dconf_envprofile())
+            known_keys = set(Dconf_registry.list_keys)
+            for key in engine.list_keys(path):
+                if key not in known_keys:
+                    known_keys.add(key)
+                    Dconf_registry.list_keys.append(key)
             return Dconf_registry.list_keys
         except Exception as exc:
             logdata['exc'] = exc
@@ -196,25 +207,16 @@ class Dconf_registry():
     @staticmethod
     def get_key_values(keys):
         key_values = {}
-        for key in keys:
+        for key in keys or []:
             key_values[key] = Dconf_registry.get_key_value(key)
         return key_values
 
     @staticmethod
     def get_key_value(key):
-        logdata = {}
-        envprofile = get_dconf_envprofile()
+        logdata = {'key': key}
         try:
-            with subprocess.Popen(['dconf', 'read', key],
-                                       env=envprofile, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as process:
-                logdata['key'] = key
-                output, error = process.communicate(timeout=10)
-
-            if not error:
-                return string_to_literal_eval(string_to_literal_eval(output))
-            else:
-                logdata['error'] = error
-                log('D327', logdata)
+            engine = DconfEngine.from_env(get_dconf_envprofile())
+            return string_to_literal_eval(engine.read('/' + key.lstrip('/')))
         except Exception as exc:
             logdata['exc'] = exc
             log('E70', logdata)
@@ -232,7 +234,16 @@ class Dconf_registry():
         return result
 
     @staticmethod
-    def dconf_update(uid=None, db_name=None):
+    def dconf_update(uid=None, db_name=None, data=None, data_file=None):
+        '''
+        Rebuild the compiled dconf database from its keyfile directory.
+
+        The database is written in-process; *data* may stand in for the
+        keyfile *data_file* it was written to, so its values are taken
+        from the dictionary instead of being parsed back.  ``dconf
+        compile`` is used only for keyfiles the native writer can not
+        reproduce exactly.
+        '''
         logdata = {}
         if db_name:
             path_dconf_config = f'/etc/dconf/db/{db_name}.d/'
@@ -240,6 +251,15 @@ class Dconf_registry():
         else:
             path_dconf_config = get_dconf_config_path(uid)
             db_file = path_dconf_config.removesuffix(DCONF_DB_DIR_SUFFIX)
+        try:
+            keys = compile_database(db_file, path_dconf_config, data, data_file)
+            logdata['path'] = db_file
+            logdata['keys'] = keys
+            log('I16', logdata)
+            log('D331', logdata)
+            return
+        except Exception as exc:
+            log('D332', {'path': db_file, 'exc': exc})
         try:
             with subprocess.Popen(['dconf', 'compile', db_file, path_dconf_config],
                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as process:
@@ -256,6 +276,133 @@ class Dconf_registry():
             logdata['exc'] = exc
             log('E72', logdata)
 
+    @classmethod
+    def mark_preferences_dirty(cls):
+        '''
+        Make the next commit serialize the preference lists again, e.g.
+        after an applier stored an ``applied`` timestamp on an element.
+        '''
+        cls._preferences_dirty = True
+
+    @classmethod
+    def dirty_sections(cls, target_file):
+        '''
+        Return the sections of the registry dictionary whose keyfile
+        contents differ from what was last committed to *target_file*,
+        including sections that were removed since.
+        '''
+        committed = cls._committed.get(target_file)
+        snapshot = _sections_snapshot(cls.global_registry_dict)
+        if committed is None:
+            return list(snapshot), snapshot
+        dirty = [section for section, lines in snapshot.items() if committed.get(section) != lines]
+        dirty.extend(section for section in committed if section not in snapshot)
+        return dirty, snapshot
+
+    @classmethod
+    def commit(cls, username, is_machine, nodomain=None, previous=False):
+        '''
+        Write the registry dictionary to the dconf database of the
+        machine or of *username*.
+
+        Preference lists are serialized only when they changed, and when
+        no section differs from the previous commit of this run the
+        keyfile is not rewritten and the database is not recompiled.
+
+        Parameters
+        ----------
+        username : str
+            User the policies are applied to.
+        is_machine : bool
+            Write the machine database instead of the user one.
+        nodomain : bool, optional
+            Append to the keyfile instead of replacing it.
+        previous : bool, optional
+            Also store the values of the last run under ``Previous/``.
+
+        Returns
+        -------
+        bool
+            True if the database was written.
+        '''
+        uid = None if is_machine else get_uid_by_username(username)
+        target_file = get_dconf_config_file(uid)
+        if target_file not in cls._committed:
+            touch_file(target_file)
+            cls.apply_template(uid)
+        if cls._preferences_dirty:
+            cls._preferences_dirty = False
+            add_preferences_to_global_registry_dict(username, is_machine)
+        if previous:
+            cls.update_dict_to_previous()
+
+        dirty, snapshot = cls.dirty_sections(target_file)
+        logdata = {'path': target_file, 'sections': len(dirty)}
+        if not dirty and target_file in cls._committed:
+            log('D333', logdata)
+            return False
+        log('D334', logdata)
+        create_dconf_ini_file(target_file, cls.global_registry_dict, uid, nodomain)
+        cls._committed[target_file] = snapshot
+        return True
+
+    @classmethod
+    def policy_digest(cls, username, is_machine):
+        '''
+        Return the digest of the merged registry and preference lists of
+        the machine or *username*, or None when preferences carry filters
+        whose result may change between runs with the same policy.
+        '''
+        volatile = find_volatile_filters(itertools.chain(
+            cls.shortcuts, cls.folders, cls.files, cls.drives, cls.scheduledtasks,
+            cls.environmentvariables, cls.inifiles, cls.services, cls.printers,
+            cls.scripts, cls.networkshares))
+        if volatile:
+            log('D335', {'filters': volatile})
+            return None
+        if cls._preferences_dirty:
+            cls._preferences_dirty = False
+            add_preferences_to_global_registry_dict(username, is_machine)
+        if is_machine:
+            context = ('machine',)
+        else:
+            # User appliers may also read the machine database
+            context = ('user', username, user_session_stamp(username),
+                       file_stamp(cls._path_bin_system))
+        return compute_policy_digest(_sections_snapshot(cls.global_registry_dict), context)
+
+    @classmethod
+    def applier_digest(cls, applier_name, username, is_machine,
+                       branches=(), preferences=(), reads_machine_policy=False):
+        '''
+        Return the digest of the registry *branches* and *preferences*
+        read by *applier_name*, or None when the applier has to run
+        anyway because it declares no inputs or its preferences carry
+        filters whose result may change between runs.
+        '''
+        if not branches and not preferences:
+            return None
+        volatile = find_volatile_filters(itertools.chain.from_iterable(
+            getattr(cls, name.lower()) for name in preferences))
+        if volatile:
+            log('D336', {'applier': applier_name, 'filters': volatile})
+            return None
+        owner = 'Machine' if is_machine else username
+        inputs = [GPUPDATE_BRANCH]
+        inputs.extend(branches)
+        inputs.extend('{}/{}/{}'.format(PREFERENCES_BRANCH, owner, name) for name in preferences)
+        entries = []
+        for branch in inputs:
+            entries.extend(cls.filter_entries(branch).items())
+            entries.extend(cls.filter_entries(PREVIOUS_PREFIX + branch).items())
+        if is_machine:
+            context = ('machine', applier_name)
+        else:
+            context = ('user', username, user_session_stamp(username), applier_name)
+            if reads_machine_policy:
+                context += (file_stamp(cls._path_bin_system),)
+        return compute_entries_digest(entries, context)
+
     @classmethod
     def check_profile_template(cls):
         if Path(cls.__template_file).exists():
@@ -308,7 +455,7 @@ class Dconf_registry():
 
     @classmethod
     def get_dictionary_from_dconf(cls, *startswith_list):
-        output_dict = {}
+        output_dict = RegistryDict()
         for startswith in startswith_list:
             dconf_dict = cls.get_key_values(cls.get_matching_keys(startswith))
             for key, value in dconf_dict.items():
@@ -368,7 +515,8 @@ class Dconf_registry():
             startswith = startswith[:-1]
             if startswith[-1] == '/' or startswith[-1] == '\\':
                 startswith = startswith[:-1]
-            return filter_dict_keys(startswith, flatten_dictionary(registry_dict))
+        if isinstance(registry_dict, RegistryDict):
+            return registry_dict.filter(startswith)
         return filter_dict_keys(startswith, flatten_dictionary(registry_dict))
 
 
@@ -465,6 +613,7 @@ class Dconf_registry():
         sc_obj.policy_guid = policy_guid
         with cls._lock:
             cls.shortcuts.append(sc_obj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -473,6 +622,7 @@ class Dconf_registry():
         pobj.policy_guid = policy_guid
         with cls._lock:
             cls.printers.append(pobj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -481,6 +631,7 @@ class Dconf_registry():
         dobj.policy_guid = policy_guid
         with cls._lock:
             cls.drives.append(dobj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -489,6 +640,7 @@ class Dconf_registry():
         fobj.policy_guid = policy_guid
         with cls._lock:
             cls.folders.append(fobj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -497,6 +649,7 @@ class Dconf_registry():
         evobj.policy_guid = policy_guid
         with cls._lock:
             cls.environmentvariables.append(evobj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -505,6 +658,7 @@ class Dconf_registry():
         scrobj.policy_guid = policy_guid
         with cls._lock:
             cls.scripts.append(scrobj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -513,6 +667,7 @@ class Dconf_registry():
         fileobj.policy_guid = policy_guid
         with cls._lock:
             cls.files.append(fileobj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -521,6 +676,7 @@ class Dconf_registry():
         iniobj.policy_guid = policy_guid
         with cls._lock:
             cls.inifiles.append(iniobj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -529,6 +685,7 @@ class Dconf_registry():
         networkshareobj.policy_guid = policy_guid
         with cls._lock:
             cls.networkshares.append(networkshareobj)
+            cls._preferences_dirty = True
 
 
     @classmethod
@@ -657,7 +814,7 @@ class Dconf_registry():
     @classmethod
     def wipe_hklm(cls):
         with cls._lock:
-            cls.global_registry_dict = {cls._GpoPriority: {}}
+            cls.global_registry_dict = RegistryDict({cls._GpoPriority: {}})
             cls.list_keys = []
 
 
@@ -909,7 +1066,28 @@ def create_dconf_ini_file(filename, data, uid=None, nodomain=None):
     logdata = {'path': filename}
     log('D209', logdata)
     create_dconf_file_locks(filename, data)
-    Dconf_registry.dconf_update(uid)
+    if nodomain:
+        # The keyfile also keeps what was appended before, so it is read back
+        Dconf_registry.dconf_update(uid)
+    else:
+        Dconf_registry.dconf_update(uid, data=data, data_file=filename)
+
+
+def _sections_snapshot(data):
+    '''
+    Map every section of *data* to its keyfile lines, the form in which
+    ``write_ini_sections()`` would store it.
+    '''
+    snapshot = {}
+    for section, section_data in data.items():
+        if not section:
+            continue
+        if isinstance(section_data, dict):
+            snapshot[section] = tuple((key, format_ini_value(value))
+                                      for key, value in section_data.items() if key)
+        else:
+            snapshot[section] = ()
+    return snapshot
 
 
 def create_dconf_file_locks(filename_ini, data):
@@ -1074,7 +1252,7 @@ def add_preferences_to_global_registry_dict(username, is_machine):
     preferences_global_dict[prefix] = dict()
 
     for key, val in preferences_global:
-        preferences_global_dict[prefix].update({key:clean_data(str(val))})
+        preferences_global_dict[prefix].update({key:encode_preferences(val)})
 
     update_dict(Dconf_registry.global_registry_dict, preferences_global_dict)
 
@@ -17,24 +17,68 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import os
 import os.path
 from pathlib import Path
+import shutil
 import tempfile
+import threading
+import time
 
-import smbc
 from ..util.exceptions import NotUNCPathError
 from ..util.logging import log
 from ..util.paths import UNCPath, file_cache_dir, file_cache_path_home
 from ..util.util import get_machine_name
 
 
+MANIFEST_FORMAT = 1
+MANIFEST_NAME = '.manifest.json'
+READ_BLOCKSIZE = 1024 * 1024
+
+
+def samba_context_factory():
+    import smbc
+    return smbc.Context(use_kerberos=1)
+
+
+def file_sha256(path, blocksize=READ_BLOCKSIZE):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(blocksize)
+            if not data:
+                break
+            digest.update(data)
+    return digest.hexdigest()
+
+
 class fs_file_cache:
-    __read_blocksize = 4096
+    '''
+    Local copies of files from SMB shares.
 
-    def __init__(self, cache_name, username = None):
+    The cache keeps a manifest with the remote size and modification time
+    and the SHA-256 of the local copy of every stored file, keyed by the
+    local path. A file is only transferred again when the remote file or
+    the local copy changed. Files prefetched at the start of a run are
+    taken from the cache by later store() calls. The manifest is
+    updated in memory and written by save_manifest(), which prefetch()
+    and log_stats() call.
+    '''
+
+    def __init__(self, cache_name, username = None, blocksize = READ_BLOCKSIZE,
+                 context_factory = samba_context_factory):
         self.cache_name = cache_name
         self.username = username
+        self.blocksize = blocksize
+        self.stats = {'hits': 0, 'misses': 0, 'bytes': 0}
+        self._manifest = None
+        self._manifest_changed = False
+        self._prefetched = dict()
+        self._context_factory = context_factory
+        self._lock = threading.Lock()
         if username and username != get_machine_name():
             try:
                 self.storage_uri = file_cache_path_home(username)
@@ -45,20 +89,107 @@ class fs_file_cache:
             self.storage_uri = file_cache_dir()
         logdata = {'cache_file': self.storage_uri}
         log('D20', logdata)
-        self.samba_context = smbc.Context(use_kerberos=1)
-                #, debug=10)
+        self._samba_context = None
+
+    @property
+    def samba_context(self):
+        '''
+        libsmbclient context, made when the first file is fetched.
+        '''
+        if self._samba_context is None:
+            self._samba_context = self._context_factory()
+        return self._samba_context
+
+    @property
+    def manifest_path(self):
+        return os.path.join(str(self.storage_uri), MANIFEST_NAME)
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+            if not isinstance(manifest, dict) or manifest.get('format') != MANIFEST_FORMAT:
+                manifest = {}
+            files = manifest.get('files')
+            self._manifest = files if isinstance(files, dict) else {}
+        return self._manifest
+
+    def save_manifest(self):
+        '''
+        Write the manifest if files were recorded since it was saved.
+        '''
+        with self._lock:
+            if not self._manifest_changed:
+                return
+            self._manifest_changed = False
+            self._write_manifest()
+
+    def _write_manifest(self):
+        try:
+            os.makedirs(str(self.storage_uri), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=MANIFEST_NAME + '-',
+                                            dir=str(self.storage_uri))
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'format': MANIFEST_FORMAT, 'files': self.manifest},
+                              f, sort_keys=True)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.manifest_path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as exc:
+            log('D352', {'path': self.manifest_path, 'exc': str(exc)})
+
+    def _is_unchanged(self, uri, destfile, remote_stat):
+        '''
+        Check the manifest entry of *destfile* against the remote file
+        and the local copy.
+        '''
+        entry = self.manifest.get(str(destfile))
+        if (not isinstance(entry, dict) or entry.get('uri') != uri
+                or entry.get('size') != remote_stat[6]
+                or entry.get('mtime') != remote_stat[8]):
+            return False
+        try:
+            if os.stat(destfile).st_size != remote_stat[6]:
+                return False
+            return file_sha256(destfile, self.blocksize) == entry.get('sha256')
+        except OSError:
+            return False
+
+    def _cache_file(self, uri_path):
+        return Path('{}/{}/{}'.format(self.storage_uri,
+            uri_path.get_domain(),
+            uri_path.get_path()))
+
+    def _count(self, stat_name, size=0):
+        with self._lock:
+            self.stats[stat_name] += 1
+            self.stats['bytes'] += size
+
+    def _record(self, uri, destfile, remote_stat, sha256):
+        with self._lock:
+            self.manifest[str(destfile)] = {
+                'uri': uri,
+                'size': remote_stat[6],
+                'mtime': remote_stat[8],
+                'sha256': sha256,
+            }
+            self._manifest_changed = True
 
     def store(self, uri, destfile = None):
         try:
             uri_path = UNCPath(uri)
             if not destfile:
-                file_name = os.path.basename(uri_path.get_path())
-                file_path = os.path.dirname(uri_path.get_path())
-                destdir = Path('{}/{}/{}'.format(self.storage_uri,
-                    uri_path.get_domain(),
-                    file_path))
-            else:
-                destdir = destfile.parent
+                destfile = self._cache_file(uri_path)
         except NotUNCPathError:
             return None
 
@@ -67,38 +198,135 @@ class fs_file_cache:
             log('D144', logdata)
             raise exc
 
-        if not destdir.exists():
-            destdir.mkdir(parents=True, exist_ok=True)
+        if not destfile.parent.exists():
+            destfile.parent.mkdir(parents=True, exist_ok=True)
 
-        if not destfile:
-            destfile = Path('{}/{}/{}'.format(self.storage_uri,
-                uri_path.get_domain(),
-                uri_path.get_path()))
+        try:
+            remote_stat = self._prefetched.get(str(uri_path))
+            if remote_stat is not None:
+                self._copy_prefetched(uri_path, destfile, remote_stat)
+            else:
+                self._fetch(self.samba_context, uri_path, destfile)
+        except Exception as exc:
+            logdata = {'exception': str(exc)}
+            log('W25', logdata)
 
+    def _fetch(self, context, uri_path, destfile):
+        '''
+        Copy the remote file to *destfile* unless the local copy is up to
+        date and return the stat of the remote file.
+        '''
+        uri = str(uri_path)
+        file_handler = context.open(uri, os.O_RDONLY)
+        tmpfile = None
         try:
+            remote_stat = file_handler.fstat()
+            if self._is_unchanged(uri, destfile, remote_stat):
+                self._count('hits')
+                log('D353', {'uri': uri, 'cache_file': str(destfile)})
+                return remote_stat
             fd, tmpfile = tempfile.mkstemp('', str(destfile))
-            df = os.fdopen(fd, 'wb')
-            try:
-                file_handler = self.samba_context.open(str(uri_path), os.O_RDONLY)
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, 'wb') as df:
                 while True:
-                    data = file_handler.read(self.__read_blocksize)
+                    data = file_handler.read(self.blocksize)
                     if not data:
                         break
                     df.write(data)
-            finally:
-                try:
-                    file_handler.close()
-                except Exception as exc:
-                    log('D321', {'exc': str(exc)})
-                df.close()
+                    digest.update(data)
+                    size += len(data)
             os.rename(tmpfile, destfile)
-            os.chmod(destfile, 0o644)
-        except Exception as exc:
-            logdata = {'exception': str(exc)}
-            log('W25', logdata)
-            tmppath = Path(tmpfile)
-            if tmppath.exists():
-                tmppath.unlink()
+        except BaseException:
+            if tmpfile and os.path.exists(tmpfile):
+                os.unlink(tmpfile)
+            raise
+        finally:
+            try:
+                file_handler.close()
+            except Exception as exc:
+                log('D321', {'exc': str(exc)})
+        os.chmod(destfile, 0o644)
+        self._count('misses', size)
+        log('D354', {'uri': uri, 'cache_file': str(destfile), 'bytes': size})
+        self._record(uri, destfile, remote_stat, digest.hexdigest())
+        return remote_stat
+
+    def _copy_prefetched(self, uri_path, destfile, remote_stat):
+        '''
+        Put the copy of a prefetched file at *destfile* without going to
+        the share again.
+        '''
+        uri = str(uri_path)
+        cache_file = self._cache_file(uri_path)
+        if Path(destfile) == cache_file or self._is_unchanged(uri, destfile, remote_stat):
+            self._count('hits')
+            log('D353', {'uri': uri, 'cache_file': str(destfile)})
+            return
+        fd, tmpfile = tempfile.mkstemp('', str(destfile))
+        try:
+            with os.fdopen(fd, 'wb') as df, open(cache_file, 'rb') as src:
+                shutil.copyfileobj(src, df, self.blocksize)
+            os.rename(tmpfile, destfile)
+        except BaseException:
+            if os.path.exists(tmpfile):
+                os.unlink(tmpfile)
+            raise
+        os.chmod(destfile, 0o644)
+        self._count('hits')
+        log('D356', {'uri': uri, 'cache_file': str(destfile)})
+        self._record(uri, destfile, remote_stat, self.manifest[str(cache_file)]['sha256'])
+
+    def prefetch(self, uris, workers=4):
+        '''
+        Fetch the files at *uris* into the cache with *workers* threads,
+        each with its own libsmbclient context. store() then uses the
+        local copies of the fetched files for the rest of the run.
+        '''
+        pending = dict()
+        for uri in uris:
+            try:
+                uri_path = UNCPath(uri)
+            except Exception:
+                continue
+            if str(uri_path) not in self._prefetched:
+                pending.setdefault(str(uri_path), uri_path)
+        if not pending:
+            return
+        # Loaded before the workers start so that they share one manifest
+        self.manifest
+        start = time.monotonic()
+        local = threading.local()
+
+        def fetch(uri_path):
+            context = getattr(local, 'context', None)
+            if context is None:
+                context = local.context = self._context_factory()
+            destfile = self._cache_file(uri_path)
+            try:
+                destfile.parent.mkdir(parents=True, exist_ok=True)
+                remote_stat = self._fetch(context, uri_path, destfile)
+            except Exception as exc:
+                log('D357', {'uri': str(uri_path), 'exc': str(exc)})
+                return
+            with self._lock:
+                self._prefetched[str(uri_path)] = remote_stat
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as executor:
+            list(executor.map(fetch, pending.values()))
+        self.save_manifest()
+        log('D358', {'files': len(pending),
+                     'fetched': sum(uri in self._prefetched for uri in pending),
+                     'seconds': round(time.monotonic() - start, 3)})
+
+    def log_stats(self):
+        '''
+        Report the cache hits, misses and transferred bytes of the run
+        and save the manifest.
+        '''
+        self.save_manifest()
+        if self.stats['hits'] or self.stats['misses']:
+            log('D355', dict(self.stats, cache_file=str(self.storage_uri)))
 
     def get(self, uri):
         destfile = uri
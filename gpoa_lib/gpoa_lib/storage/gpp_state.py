@@ -29,10 +29,10 @@ import os
 import shutil
 from datetime import datetime
 from typing import Callable, Dict, List, Set
-from ast import literal_eval
 from pathlib import Path
 
 from .dconf_registry import Dconf_registry
+from .preference_codec import decode_preferences
 from ..util.logging import log
 from ..util.util import get_homedir
 from ..util.windows_vars import expand_windows_var
@@ -61,20 +61,7 @@ def get_previous_elements(element_type: str, username: str = None) -> List[Dict]
     if prefix not in registry:
         return []
 
-    elements_data = registry[prefix].get(element_type, [])
-    if not elements_data:
-        return []
-
-    try:
-        if isinstance(elements_data, str):
-            elements = literal_eval(elements_data)
-        else:
-            elements = elements_data
-        return elements if isinstance(elements, list) else []
-    except Exception as e:
-        logdata = {'element_type': element_type, 'error': str(e)}
-        log('E74', logdata)
-        return []
+    return decode_preferences(registry[prefix].get(element_type, []))
 
 
 def find_removed_elements(
@@ -183,6 +170,7 @@ def mark_element_applied(
 
     if element_obj is not None:
         element_obj.applied = timestamp
+        Dconf_registry.mark_preferences_dirty()
 
 
 def get_current_gpo_guids() -> Set[str]:
@@ -209,9 +197,62 @@ def get_current_gpo_guids() -> Set[str]:
     return guids
 
 
+class PreviousElementsIndex:
+    '''
+    Elements of one type stored by the previous gpupdate run, indexed by
+    UID with their applyOnce timestamps, plus the elements that have
+    removePolicy set.
+    '''
+
+    def __init__(self, elements: List[Dict]):
+        self.elements = elements
+        self.by_uid: Dict[str, List[Dict]] = {}
+        self.applied: Dict[str, str] = {}
+        self.removable: List[Dict] = []
+
+        for elem in elements:
+            uid = elem.get('uid')
+            if uid:
+                self.by_uid.setdefault(uid, []).append(elem)
+                applied = elem.get('applied')
+                if applied and uid not in self.applied:
+                    self.applied[uid] = applied
+            if elem.get('remove_policy'):
+                self.removable.append(elem)
+
+    def find_removed(self, current: List[Dict], current_gpos: Set[str],
+                     key_field: str = 'uid') -> List[Dict]:
+        '''
+        Same result as :func:`find_removed_elements` followed by
+        :func:`find_gpo_removed_elements`, looking at the removable
+        elements only.
+        '''
+        current_uids = set()
+        for elem in current:
+            uid = elem.get(key_field) or elem.get('uid')
+            if uid:
+                current_uids.add(uid)
+
+        removed = []
+        for elem in self.removable:
+            uid = elem.get(key_field) or elem.get('uid')
+            if uid and uid not in current_uids:
+                removed.append(elem)
+        for elem in self.removable:
+            elem_gpo = elem.get('policy_guid')
+            if elem_gpo and elem_gpo not in current_gpos:
+                removed.append(elem)
+
+        return removed
+
+
 class GppStateManager:
     '''
     Manages GPP element state across gpupdate runs.
+
+    Previous elements of every type are decoded and indexed once, so
+    ``should_skip()`` is a dictionary lookup per element and
+    ``find_removed()`` is linear in the number of elements.
     '''
 
     def __init__(self, username: str = None):
@@ -220,9 +261,23 @@ class GppStateManager:
 
         self.current_gpos = get_current_gpo_guids()
 
-        self._previous_elements: Dict[str, List[Dict]] = {}
+        self._previous_index: Dict[str, PreviousElementsIndex] = {}
         self._removed_elements: Dict[str, List[Dict]] = {}
 
+    def get_index(self, element_type: str) -> PreviousElementsIndex:
+        '''
+        Get the index of previous elements for a type, building it on
+        first use.
+
+        :param element_type: Type of element
+        :return: Index of previous elements
+        '''
+        index = self._previous_index.get(element_type)
+        if index is None:
+            index = PreviousElementsIndex(get_previous_elements(element_type, self.username))
+            self._previous_index[element_type] = index
+        return index
+
     def get_previous(self, element_type: str) -> List[Dict]:
         '''
         Get previous elements for a type, caching the result.
@@ -230,11 +285,7 @@ class GppStateManager:
         :param element_type: Type of element
         :return: List of previous element dictionaries
         '''
-        if element_type not in self._previous_elements:
-            self._previous_elements[element_type] = get_previous_elements(
-                element_type, self.username
-            )
-        return self._previous_elements[element_type]
+        return self.get_index(element_type).elements
 
     def find_removed(self, element_type: str, current: List[Dict]) -> List[Dict]:
         '''
@@ -244,13 +295,7 @@ class GppStateManager:
         :param current: Current element list
         :return: List of removed elements
         '''
-        previous = self.get_previous(element_type)
-        removed = find_removed_elements(current, previous)
-
-        removed.extend(
-            find_gpo_removed_elements(self.current_gpos, previous)
-        )
-
+        removed = self.get_index(element_type).find_removed(current, self.current_gpos)
         self._removed_elements[element_type] = removed
         return removed
 
@@ -262,7 +307,25 @@ class GppStateManager:
         :param element_type: Type of element
         :return: True if should skip application
         '''
-        return is_element_applied(element, element_type, self.username)
+        if not element.get('apply_once'):
+            return False
+
+        index = self.get_index(element_type)
+        elem_uid = element.get('uid')
+
+        logdata = {
+            'element_type': element_type,
+            'uid': elem_uid,
+            'previous_count': len(index.elements)
+        }
+        log('D251', logdata)
+
+        if elem_uid not in index.by_uid:
+            return False
+        applied = index.applied.get(elem_uid)
+        logdata = {'uid': elem_uid, 'applied': applied}
+        log('D252', logdata)
+        return bool(applied)
 
     def mark_applied(self, element: Dict, element_type: str, element_obj=None) -> None:
         '''
@@ -0,0 +1,610 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Pure Python access to GVDB files (the on-disk format of compiled
+dconf databases) and to the GVariant serialization they contain.
+
+Only what dconf needs is implemented: hash table lookup, nested tables
+(used for ``.locks``), list items (dconf directories) and encoding and
+decoding of GVariant values.
+'''
+
+import struct
+
+
+GVDB_SIGNATURE = b'GVariant'
+GVDB_SIGNATURE_SWAPPED = b'raVGtnai'
+GVDB_HEADER_SIZE = 24
+GVDB_HASH_HEADER_SIZE = 8
+GVDB_HASH_ITEM_SIZE = 24
+GVDB_NO_PARENT = 0xffffffff
+
+GVDB_ITEM_VALUE = 'v'
+GVDB_ITEM_TABLE = 'H'
+GVDB_ITEM_LIST = 'L'
+
+
+class GvdbError(Exception):
+    pass
+
+
+def gvdb_hash(key):
+    '''
+    djb hash over the UTF-8 bytes of *key*, treating bytes as signed
+    chars exactly like ``gvdb_table_hash_key()`` does.
+    '''
+    hash_value = 5381
+    for byte in key.encode('utf-8'):
+        if byte > 0x7f:
+            byte -= 0x100
+        hash_value = (hash_value * 33 + byte) & 0xffffffff
+    return hash_value
+
+
+_FIXED_BASIC = {
+    'b': (1, 'B'),
+    'y': (1, 'B'),
+    'n': (2, 'h'),
+    'q': (2, 'H'),
+    'i': (4, 'i'),
+    'u': (4, 'I'),
+    'h': (4, 'i'),
+    'x': (8, 'q'),
+    't': (8, 'Q'),
+    'd': (8, 'd'),
+}
+_STRING_TYPES = 'sog'
+
+
+def _split_type(signature, pos=0):
+    '''
+    Return the end index of the single complete type starting at *pos*.
+    '''
+    char = signature[pos]
+    if char in 'am':
+        return _split_type(signature, pos + 1)
+    if char in '({':
+        closing = ')' if char == '(' else '}'
+        pos += 1
+        while signature[pos] != closing:
+            pos = _split_type(signature, pos)
+        return pos + 1
+    return pos + 1
+
+
+def _member_types(signature):
+    '''
+    Split the contents of a tuple or dict entry type into member types.
+    '''
+    inner = signature[1:-1]
+    members = []
+    pos = 0
+    while pos < len(inner):
+        end = _split_type(inner, pos)
+        members.append(inner[pos:end])
+        pos = end
+    return members
+
+
+def _alignment(signature):
+    char = signature[0]
+    if char in _FIXED_BASIC:
+        return _FIXED_BASIC[char][0]
+    if char in _STRING_TYPES:
+        return 1
+    if char == 'v':
+        return 8
+    if char in 'am':
+        return _alignment(signature[1:])
+    if char in '({':
+        return max([_alignment(member) for member in _member_types(signature)] or [1])
+    raise GvdbError('Unsupported GVariant type: {}'.format(signature))
+
+
+def _fixed_size(signature):
+    '''
+    Return the serialized size of a fixed-size type or None for
+    variable-size types.
+    '''
+    char = signature[0]
+    if char in _FIXED_BASIC:
+        return _FIXED_BASIC[char][0]
+    if char in '({':
+        members = _member_types(signature)
+        if not members:
+            return 1
+        size = 0
+        for member in members:
+            member_size = _fixed_size(member)
+            if member_size is None:
+                return None
+            size = _align(size, _alignment(member)) + member_size
+        return _align(size, _alignment(signature))
+    return None
+
+
+def _align(offset, alignment):
+    return (offset + alignment - 1) & ~(alignment - 1)
+
+
+def _offset_size(length):
+    if length == 0:
+        return 0
+    if length <= 0xff:
+        return 1
+    if length <= 0xffff:
+        return 2
+    if length <= 0xffffffff:
+        return 4
+    return 8
+
+
+def _read_offset(data, pos, size, byteorder):
+    return int.from_bytes(data[pos:pos + size], byteorder)
+
+
+def variant_decode(signature, data, byteorder='little'):
+    '''
+    Deserialize GVariant *data* of type *signature* into Python objects.
+
+    Strings become ``str``, integers ``int``, booleans ``bool``,
+    arrays ``list`` (arrays of dict entries become ``dict``), tuples
+    ``tuple``, maybes ``None`` or the contained value and variants
+    their contained value.
+    '''
+    data = bytes(data)
+    char = signature[0]
+    prefix = '<' if byteorder == 'little' else '>'
+
+    if char in _FIXED_BASIC:
+        size, code = _FIXED_BASIC[char]
+        if len(data) != size:
+            # Invalid serialized data is read as the default value
+            data = bytes(size)
+        value = struct.unpack(prefix + code, data)[0]
+        return bool(value) if char == 'b' else value
+
+    if char in _STRING_TYPES:
+        if not data or data[-1] != 0:
+            return ''
+        return data[:-1].decode('utf-8', errors='replace')
+
+    if char == 'v':
+        separator = data.rfind(b'\x00')
+        if separator < 0:
+            return None
+        child_type = data[separator + 1:].decode('ascii', errors='replace')
+        if not child_type:
+            return None
+        return variant_decode(child_type, data[:separator], byteorder)
+
+    if char == 'm':
+        if not data:
+            return None
+        element = signature[1:]
+        if _fixed_size(element) is not None:
+            return variant_decode(element, data, byteorder)
+        return variant_decode(element, data[:-1], byteorder)
+
+    if char == 'a':
+        return _decode_array(signature[1:], data, byteorder)
+
+    if char in '({':
+        members = _decode_tuple(_member_types(signature), data, byteorder)
+        return tuple(members)
+
+    raise GvdbError('Unsupported GVariant type: {}'.format(signature))
+
+
+def _decode_array(element, data, byteorder):
+    elements = []
+    element_size = _fixed_size(element)
+    if element_size is not None:
+        for pos in range(0, len(data) - len(data) % element_size, element_size):
+            elements.append(variant_decode(element, data[pos:pos + element_size], byteorder))
+    elif data:
+        offset_size = _offset_size(len(data))
+        offsets_start = _read_offset(data, len(data) - offset_size, offset_size, byteorder)
+        if offsets_start > len(data):
+            return []
+        count = (len(data) - offsets_start) // offset_size
+        alignment = _alignment(element)
+        start = 0
+        for index in range(count):
+            end = _read_offset(data, offsets_start + index * offset_size, offset_size, byteorder)
+            start = _align(start, alignment)
+            elements.append(variant_decode(element, data[start:end], byteorder))
+            start = end
+
+    if element.startswith('{'):
+        return dict(elements)
+    return elements
+
+
+def _frame_offset_size(body_size, n_offsets):
+    '''
+    Smallest offset size that can address a container of *body_size*
+    bytes plus *n_offsets* framing offsets of that size.
+    '''
+    for size in (1, 2, 4):
+        if body_size + n_offsets * size <= (1 << (size * 8)) - 1:
+            return size
+    return 8
+
+
+def variant_encode(signature, value):
+    '''
+    Serialize *value* as GVariant of type *signature* in little endian
+    byte order.  Accepts the Python objects :func:`variant_decode`
+    returns; a ``v`` value is a ``(signature, value)`` pair.
+    '''
+    char = signature[0]
+
+    if char in _FIXED_BASIC:
+        return struct.pack('<' + _FIXED_BASIC[char][1], value)
+
+    if char in _STRING_TYPES:
+        return value.encode('utf-8') + b'\x00'
+
+    if char == 'v':
+        child_type, child_value = value
+        return variant_encode(child_type, child_value) + b'\x00' + child_type.encode('ascii')
+
+    if char == 'm':
+        if value is None:
+            return b''
+        element = signature[1:]
+        data = variant_encode(element, value)
+        return data if _fixed_size(element) is not None else data + b'\x00'
+
+    if char == 'a':
+        element = signature[1:]
+        if isinstance(value, dict):
+            value = list(value.items())
+        return _encode_array(element, value)
+
+    if char in '({':
+        return _encode_tuple(_member_types(signature), value)
+
+    raise GvdbError('Unsupported GVariant type: {}'.format(signature))
+
+
+def _encode_array(element, values):
+    if _fixed_size(element) is not None:
+        return b''.join(variant_encode(element, value) for value in values)
+    if not values:
+        return b''
+    alignment = _alignment(element)
+    body = bytearray()
+    ends = []
+    for value in values:
+        body.extend(bytes(_align(len(body), alignment) - len(body)))
+        body.extend(variant_encode(element, value))
+        ends.append(len(body))
+    offset_size = _frame_offset_size(len(body), len(ends))
+    for end in ends:
+        body.extend(end.to_bytes(offset_size, 'little'))
+    return bytes(body)
+
+
+def _encode_tuple(members, values):
+    if not members:
+        return b'\x00'
+    body = bytearray()
+    ends = []
+    for index, (member, value) in enumerate(zip(members, values)):
+        body.extend(bytes(_align(len(body), _alignment(member)) - len(body)))
+        body.extend(variant_encode(member, value))
+        if _fixed_size(member) is None and index != len(members) - 1:
+            ends.append(len(body))
+    signature = '(' + ''.join(members) + ')'
+    if _fixed_size(signature) is not None:
+        body.extend(bytes(_fixed_size(signature) - len(body)))
+        return bytes(body)
+    offset_size = _frame_offset_size(len(body), len(ends))
+    for end in reversed(ends):
+        body.extend(end.to_bytes(offset_size, 'little'))
+    return bytes(body)
+
+
+def _decode_tuple(members, data, byteorder):
+    values = []
+    offset_size = _offset_size(len(data))
+    frame_end = len(data)
+    start = 0
+    for index, member in enumerate(members):
+        start = _align(start, _alignment(member))
+        member_size = _fixed_size(member)
+        if member_size is not None:
+            end = start + member_size
+        elif index == len(members) - 1:
+            end = frame_end
+        else:
+            frame_end -= offset_size
+            end = _read_offset(data, frame_end, offset_size, byteorder)
+        values.append(variant_decode(member, data[start:end], byteorder))
+        start = end
+    return values
+
+
+class GvdbTable:
+    '''
+    Read-only view of a GVDB hash table.
+
+    Parameters
+    ----------
+    data : bytes
+        Contents of a GVDB file.
+    '''
+
+    def __init__(self, data, _root=None, _byteorder=None):
+        self._data = memoryview(data) if not isinstance(data, memoryview) else data
+        if _root is None:
+            _root, _byteorder = self._read_header()
+        self._byteorder = _byteorder
+        self._parse_hash_table(*_root)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def _read_header(self):
+        if len(self._data) < GVDB_HEADER_SIZE:
+            raise GvdbError('File is too small to be a GVDB table')
+        signature = bytes(self._data[:8])
+        if signature == GVDB_SIGNATURE:
+            byteorder = 'little'
+        elif signature == GVDB_SIGNATURE_SWAPPED:
+            byteorder = 'big'
+        else:
+            raise GvdbError('Invalid GVDB signature')
+        fmt = '<II' if byteorder == 'little' else '>II'
+        root = struct.unpack_from(fmt, self._data, 16)
+        return root, byteorder
+
+    @property
+    def byteorder(self):
+        return self._byteorder
+
+    def _u32(self, pos):
+        return int.from_bytes(self._data[pos:pos + 4], self._byteorder)
+
+    def _parse_hash_table(self, start, end):
+        self._buckets = []
+        self._items = []
+        self._names = []
+        if start >= end or end > len(self._data) or end - start < GVDB_HASH_HEADER_SIZE:
+            return
+        bloom_words = self._u32(start) & ((1 << 27) - 1)
+        n_buckets = self._u32(start + 4)
+        pos = start + GVDB_HASH_HEADER_SIZE + bloom_words * 4
+        buckets_end = pos + n_buckets * 4
+        if buckets_end > end:
+            return
+        self._buckets = [self._u32(pos + i * 4) for i in range(n_buckets)]
+        n_items = (end - buckets_end) // GVDB_HASH_ITEM_SIZE
+        fmt = '<IIIHcxII' if self._byteorder == 'little' else '>IIIHcxII'
+        for i in range(n_items):
+            self._items.append(struct.unpack_from(fmt, self._data, buckets_end + i * GVDB_HASH_ITEM_SIZE))
+        self._names = [None] * n_items
+
+    def _item_key(self, item):
+        return bytes(self._data[item[2]:item[2] + item[3]]).decode('utf-8', errors='replace')
+
+    def _item_name(self, index):
+        name = self._names[index]
+        if name is None:
+            parts = []
+            seen = 0
+            while index != GVDB_NO_PARENT and index < len(self._items) and seen <= len(self._items):
+                if self._names[index] is not None:
+                    parts.append(self._names[index])
+                    break
+                parts.append(self._item_key(self._items[index]))
+                index = self._items[index][1]
+                seen += 1
+            name = ''.join(reversed(parts))
+        return name
+
+    def _lookup(self, key, item_type):
+        if not self._buckets or not self._items:
+            return None
+        hash_value = gvdb_hash(key)
+        bucket = hash_value % len(self._buckets)
+        itemno = self._buckets[bucket]
+        if bucket == len(self._buckets) - 1:
+            lastno = len(self._items)
+        else:
+            lastno = min(self._buckets[bucket + 1], len(self._items))
+        while itemno < lastno:
+            item = self._items[itemno]
+            if (item[0] == hash_value
+                    and item[4].decode('ascii') == item_type
+                    and self._item_name(itemno) == key):
+                return item
+            itemno += 1
+        return None
+
+    def get_names(self):
+        '''
+        Return the full names of all items in the table.
+        '''
+        names = []
+        for index in range(len(self._items)):
+            name = self._item_name(index)
+            self._names[index] = name
+            names.append(name)
+        return names
+
+    def has_value(self, key):
+        return self._lookup(key, GVDB_ITEM_VALUE) is not None
+
+    def get_raw_value(self, key):
+        '''
+        Return the serialized ``v`` GVariant stored for *key* or None.
+        '''
+        item = self._lookup(key, GVDB_ITEM_VALUE)
+        if item is None:
+            return None
+        return bytes(self._data[item[5]:item[6]])
+
+    def get_value(self, key, default=None):
+        '''
+        Return the decoded value stored for *key*.
+        '''
+        raw = self.get_raw_value(key)
+        if raw is None:
+            return default
+        return variant_decode('v', raw, self._byteorder)
+
+    def get_table(self, key):
+        '''
+        Return the nested table stored under *key* (e.g. ``.locks``).
+        '''
+        item = self._lookup(key, GVDB_ITEM_TABLE)
+        if item is None:
+            return None
+        return GvdbTable(self._data, _root=(item[5], item[6]), _byteorder=self._byteorder)
+
+
+class GvdbItem:
+    '''
+    Entry of a :class:`GvdbBuilder` table.  Holds either a value
+    (``(signature, value)``), a list of child items or a nested table.
+    '''
+
+    def __init__(self, key):
+        self.key = key
+        self.parent = None
+        self.value = None
+        self.children = []
+        self.table = None
+
+    def set_parent(self, parent):
+        self.parent = parent
+        parent.children.append(self)
+
+
+class GvdbBuilder:
+    '''
+    Writer for GVDB files, laid out like ``gvdb-builder.c`` does it:
+    one bucket per item and no bloom filter.
+    '''
+
+    def __init__(self):
+        self._items = {}
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        return self._items.get(key)
+
+    def insert(self, key):
+        '''
+        Return the item for *key*, creating an empty one if needed.
+        '''
+        item = self._items.get(key)
+        if item is None:
+            item = GvdbItem(key)
+            self._items[key] = item
+        return item
+
+    def insert_value(self, key, signature, value):
+        item = self.insert(key)
+        item.value = (signature, value)
+        return item
+
+    def insert_table(self, key):
+        item = self.insert(key)
+        if item.table is None:
+            item.table = GvdbBuilder()
+        return item.table
+
+    def write(self):
+        '''
+        Return the serialized GVDB file as bytes.
+        '''
+        blob = bytearray(GVDB_HEADER_SIZE)
+        root = self._write_hash(blob)
+        blob[:GVDB_HEADER_SIZE] = GVDB_SIGNATURE + struct.pack('<IIII', 0, 0, *root)
+        return bytes(blob)
+
+    @staticmethod
+    def _allocate(blob, size, alignment):
+        blob.extend(bytes(_align(len(blob), alignment) - len(blob)))
+        start = len(blob)
+        blob.extend(bytes(size))
+        return start, start + size
+
+    @classmethod
+    def _add_chunk(cls, blob, data, alignment):
+        start, end = cls._allocate(blob, len(data), alignment)
+        blob[start:end] = data
+        return start, end
+
+    def _write_hash(self, blob):
+        items = list(self._items.values())
+        n_buckets = len(items)
+        chains = [[] for _ in range(n_buckets)]
+        for item in items:
+            chains[gvdb_hash(item.key) % n_buckets].append(item)
+        ordered = [item for chain in chains for item in chain]
+        assigned = {id(item): index for index, item in enumerate(ordered)}
+
+        buckets = []
+        index = 0
+        for chain in chains:
+            buckets.append(index)
+            index += len(chain)
+
+        size = GVDB_HASH_HEADER_SIZE + n_buckets * 4 + len(ordered) * GVDB_HASH_ITEM_SIZE
+        start, end = self._allocate(blob, size, 4)
+        # bloom_shift 5 and no bloom words, as gvdb-builder writes it
+        header = struct.pack('<II', 5 << 27, n_buckets) + struct.pack('<%dI' % n_buckets, *buckets)
+        blob[start:start + len(header)] = header
+
+        pos = start + len(header)
+        for item in ordered:
+            if item.parent is not None:
+                parent = assigned[id(item.parent)]
+                basename = item.key[len(item.parent.key):]
+            else:
+                parent = GVDB_NO_PARENT
+                basename = item.key
+            key_start, key_end = self._add_chunk(blob, basename.encode('utf-8'), 1)
+            if item.value is not None:
+                item_type = GVDB_ITEM_VALUE
+                pointer = self._add_chunk(blob, variant_encode('v', item.value), 8)
+            elif item.table is not None:
+                item_type = GVDB_ITEM_TABLE
+                pointer = item.table._write_hash(blob)
+            else:
+                item_type = GVDB_ITEM_LIST
+                children = [assigned[id(child)] for child in item.children]
+                pointer = self._add_chunk(blob, struct.pack('<%dI' % len(children), *children), 4)
+            blob[pos:pos + GVDB_HASH_ITEM_SIZE] = struct.pack(
+                '<IIIHcxII', gvdb_hash(item.key), parent, key_start, key_end - key_start,
+                item_type.encode('ascii'), *pointer)
+            pos += GVDB_HASH_ITEM_SIZE
+        return start, end
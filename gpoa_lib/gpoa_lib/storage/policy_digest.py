@@ -0,0 +1,285 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Digests of the merged policy of a run and of the policy inputs of the
+appliers.
+
+When the digest of the merged policy matches the one stored by the
+previous successful run for the same target and no applier has to run
+again because of time, the applier phase is skipped.  Otherwise an
+applier whose inputs match the digest stored by its previous successful
+run would produce exactly the same result and is skipped by itself.
+Digests live under ``/run`` so the first run after boot applies
+everything.
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from ..util.paths import policy_state_dir
+from ..util.util import get_uid_by_username
+
+
+POLICY_DIGEST_VERSION = b'gpoa-policy-digest-1'
+PREVIOUS_PREFIX = 'Previous/'
+# The GPUpdate branch with the module switches and the ``Previous/``
+# copy of every branch are inputs of every applier which declares its
+# inputs (see applier_frontend.policy_branches).
+GPUPDATE_BRANCH = 'Software/BaseALT/Policies/GPUpdate'
+PREFERENCES_BRANCH = 'Software/BaseALT/Policies/Preferences'
+
+# Item-level targeting filters whose result only depends on the policy
+# and on the identity of the machine or user. Any other filter (date,
+# time, battery, disk, files, addresses, environment, group membership
+# and unknown ones) may give another answer on the next run.
+STABLE_FILTER_TYPES = frozenset({
+    'FilterComputer',
+    'FilterDomain',
+    'FilterUser',
+    'FilterCpu',
+    'FilterRam',
+    'FilterRunOnce',
+})
+
+
+def find_volatile_filters(objects):
+    '''
+    Return the sorted types of filters attached to *objects* that are
+    not in :data:`STABLE_FILTER_TYPES`.
+    '''
+    found = set()
+    for obj in objects:
+        for filter_obj in getattr(obj, 'filters', None) or []:
+            filter_type = getattr(filter_obj, 'filter_type', None)
+            if filter_type is None and isinstance(filter_obj, dict):
+                filter_type = filter_obj.get('filter_type')
+            if filter_type not in STABLE_FILTER_TYPES:
+                found.add(str(filter_type))
+    return sorted(found)
+
+
+def compute_policy_digest(snapshot, context=()):
+    '''
+    Return the hex SHA-256 digest of a sections snapshot (``{section:
+    ((key, text), ...)}``) and of *context*.  ``Previous/`` sections are
+    left out since they always hold the state of the run before, and
+    sections and keys are sorted so merge order does not matter.
+    '''
+    digest = hashlib.sha256(POLICY_DIGEST_VERSION)
+    for item in context:
+        digest.update(repr(item).encode('utf-8', errors='surrogatepass') + b'\0')
+    for section in sorted(snapshot):
+        if section.startswith(PREVIOUS_PREFIX):
+            continue
+        digest.update(b'[' + section.encode('utf-8', errors='surrogatepass') + b']\0')
+        for key, text in sorted(snapshot[section]):
+            digest.update('{}={}'.format(key, text).encode('utf-8', errors='surrogatepass') + b'\0')
+    return digest.hexdigest()
+
+
+def compute_entries_digest(entries, context=()):
+    '''
+    Return the hex SHA-256 digest of flattened registry *entries*
+    (``[(path, data)]``) and of *context*, independent of their order.
+    '''
+    digest = hashlib.sha256(POLICY_DIGEST_VERSION)
+    for item in context:
+        digest.update(repr(item).encode('utf-8', errors='surrogatepass') + b'\0')
+    for path, data in sorted(set((str(path), repr(data)) for path, data in entries)):
+        digest.update('{}={}'.format(path, data).encode('utf-8', errors='surrogatepass') + b'\0')
+    return digest.hexdigest()
+
+
+def file_stamp(path):
+    '''
+    Identify the current version of an atomically replaced file.
+    '''
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def policy_digest_target(username, is_machine):
+    '''
+    Name under which the digest of the machine or user pass is stored.
+    '''
+    if is_machine:
+        return 'machine'
+    return str(get_uid_by_username(username))
+
+
+def user_session_stamp(username):
+    '''
+    Identify the current login session of *username* by the inode of
+    its runtime directory, which is recreated for every new session.
+    '''
+    try:
+        return os.stat('/run/user/{}'.format(get_uid_by_username(username))).st_ino
+    except OSError:
+        return None
+
+
+def _digest_file(target):
+    return os.path.join(policy_state_dir(), 'policy-digest-{}'.format(target))
+
+
+def load_policy_digest(target):
+    '''
+    Return the record stored for *target* by the last successful run,
+    a dict with the ``digest`` of the merged policy, the appliers which
+    run on every run (``always_run``) and the time of the last run of
+    every applier which re-asserts its state (``reassert``), or None.
+    '''
+    try:
+        with open(_digest_file(target)) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or not record.get('digest'):
+        return None
+    return record
+
+
+def save_policy_digest(target, digest, always_run=(), reassert=None):
+    '''
+    Store *digest* for *target* with the appliers which have to run
+    again although the policy does not change, see
+    :func:`policy_rerun_due`; None removes the stored record so the
+    next run applies everything.  Returns False if the state directory
+    is not writable, e.g. when gpoa is not run by root.
+    '''
+    try:
+        path = _digest_file(target)
+        if digest is None:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            return True
+        _write_atomic(path, json.dumps({
+            'digest': digest,
+            'always_run': sorted(always_run),
+            'reassert': dict(reassert or {}),
+        }, sort_keys=True))
+    except OSError:
+        return False
+    return True
+
+
+def policy_rerun_due(record, reassert_interval, now=None):
+    '''
+    Return the sorted names of the appliers of a stored *record* which
+    have to run although the policy did not change: those which run on
+    every run and those whose re-assertion interval passed.
+    '''
+    due = set(record.get('always_run') or ())
+    if reassert_interval > 0:
+        now = time.time() if now is None else now
+        for applier_name, last_run in (record.get('reassert') or {}).items():
+            if not isinstance(last_run, (int, float)) or now - last_run >= reassert_interval:
+                due.add(applier_name)
+    return sorted(due)
+
+
+def _write_atomic(path, content):
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '-',
+                                    dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ApplierDigests:
+    '''
+    Input digests of the appliers that completed during the previous
+    runs for *target*, with the time each of them last ran.
+    '''
+
+    def __init__(self, target):
+        self.target = target
+        self._entries = {}
+        try:
+            with open(self._path()) as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries = entries
+        except (OSError, ValueError):
+            pass
+
+    def _path(self):
+        return os.path.join(policy_state_dir(), 'applier-digests-{}'.format(self.target))
+
+    def changed(self, applier_name, digest, reassert_interval=0, now=None):
+        '''
+        Return False when *applier_name* already ran with the inputs of
+        *digest* and does not have to re-assert its state yet; appliers
+        which re-assert their state pass the interval since their last
+        run after which they run again.
+        '''
+        entry = self._entries.get(applier_name)
+        if digest is None or not isinstance(entry, dict) or entry.get('digest') != digest:
+            return True
+        if reassert_interval > 0:
+            now = time.time() if now is None else now
+            return now - entry.get('time', 0) >= reassert_interval
+        return False
+
+    def last_run(self, applier_name):
+        '''
+        Return the time *applier_name* last ran with its stored digest.
+        '''
+        entry = self._entries.get(applier_name)
+        if isinstance(entry, dict):
+            return entry.get('time')
+        return None
+
+    def update(self, applier_name, digest, now=None):
+        if digest is None:
+            self.discard(applier_name)
+            return
+        self._entries[applier_name] = {
+            'digest': digest,
+            'time': time.time() if now is None else now,
+        }
+
+    def discard(self, applier_name):
+        self._entries.pop(applier_name, None)
+
+    def save(self):
+        '''
+        Store the digests; returns False if the state directory is not
+        writable.
+        '''
+        try:
+            _write_atomic(self._path(), json.dumps(self._entries, sort_keys=True))
+        except OSError:
+            return False
+        return True
@@ -0,0 +1,74 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Encoding of the GPP preference lists stored in dconf.
+
+Every preference type (``Files``, ``Shortcuts``...) is kept in its own
+key under ``Software/BaseALT/Policies/Preferences/<Machine|username>``
+as ``gpp1:`` followed by base64 of zlib-compressed JSON.  The base64
+alphabet passes unchanged through the dconf keyfile quoting, so strings
+of any content round-trip, and a type is only decoded when it is read.
+Values written by older versions as ``str()`` of a list are still read
+with :func:`ast.literal_eval`.
+'''
+
+import ast
+import base64
+import binascii
+import json
+import zlib
+
+from ..util.logging import log
+
+
+PREFERENCES_FORMAT_PREFIX = 'gpp1:'
+
+
+def encode_preferences(elements):
+    '''
+    Encode a list of preference dictionaries for storing in dconf.
+    '''
+    data = json.dumps(elements, ensure_ascii=False, separators=(',', ':'))
+    packed = zlib.compress(data.encode('utf-8', errors='surrogatepass'))
+    return PREFERENCES_FORMAT_PREFIX + base64.b64encode(packed).decode('ascii')
+
+
+def decode_preferences(value):
+    '''
+    Return the list of preference dictionaries stored in *value*, which
+    may be in the current format, in the ``str()`` format of older
+    versions or already decoded.  Invalid values give an empty list.
+    '''
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str):
+        return []
+    try:
+        if value.startswith(PREFERENCES_FORMAT_PREFIX):
+            packed = base64.b64decode(value[len(PREFERENCES_FORMAT_PREFIX):], validate=True)
+            elements = json.loads(zlib.decompress(packed).decode('utf-8', errors='surrogatepass'))
+        else:
+            elements = ast.literal_eval(value)
+    except (ValueError, SyntaxError, MemoryError, RecursionError,
+            binascii.Error, zlib.error) as exc:
+        log('D338', {'exc': str(exc)})
+        return []
+    return elements if isinstance(elements, list) else []
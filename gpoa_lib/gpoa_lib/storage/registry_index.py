@@ -0,0 +1,221 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import itertools
+import re
+
+
+_SEGMENT_SEPARATOR = re.compile(r'[\\/]+')
+
+
+def split_registry_path(path):
+    '''
+    Split a registry path on both ``\\`` and ``/`` dropping empty
+    segments, so ``Software\\BaseALT/`` gives ``['Software', 'BaseALT']``.
+    '''
+    return [segment for segment in _SEGMENT_SEPARATOR.split(path) if segment]
+
+
+def _fold(segments):
+    return [segment.casefold() for segment in segments]
+
+
+def _flatten_section(section_key, value, prefix_segments, result):
+    '''
+    Add leaves of *value* stored under *section_key* to *result* as
+    ``flatten_dictionary()`` would name them, keeping only the leaves
+    whose relative path starts with the folded *prefix_segments*.
+    '''
+    if not isinstance(value, dict):
+        if not prefix_segments:
+            result.append((section_key, value))
+        return
+    for key, item in value.items():
+        segments = prefix_segments
+        if segments:
+            key_segments = _fold(split_registry_path(str(key)))
+            matched = key_segments[:len(segments)]
+            if matched != segments[:len(matched)]:
+                continue
+            segments = segments[len(key_segments):]
+        _flatten_section('{}/{}'.format(section_key, key), item, segments, result)
+
+
+class _Node:
+    __slots__ = ('children', 'sections')
+
+    def __init__(self):
+        self.children = {}
+        self.sections = {}
+
+
+class RegistryIndex:
+    '''
+    Segment trie over the section keys of a registry dictionary.
+
+    Section keys are split on ``\\`` and ``/`` and case-folded, so a
+    branch query walks only the matching part of the trie instead of
+    scanning every key of the registry.
+    '''
+
+    def __init__(self):
+        self._root = _Node()
+        self._order = {}
+        self._counter = itertools.count()
+
+    def add(self, section_key):
+        if section_key in self._order:
+            return
+        self._order[section_key] = next(self._counter)
+        node = self._root
+        for segment in _fold(split_registry_path(str(section_key))):
+            node = node.children.setdefault(segment, _Node())
+        node.sections[section_key] = None
+
+    def remove(self, section_key):
+        if self._order.pop(section_key, None) is None:
+            return
+        path = [self._root]
+        for segment in _fold(split_registry_path(str(section_key))):
+            node = path[-1].children.get(segment)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].sections.pop(section_key, None)
+        segments = _fold(split_registry_path(str(section_key)))
+        for depth in range(len(segments), 0, -1):
+            node = path[depth]
+            if node.children or node.sections:
+                break
+            del path[depth - 1].children[segments[depth - 1]]
+
+    def clear(self):
+        self.__init__()
+
+    def find(self, prefix):
+        '''
+        Return ``[(section_key, remaining_segments)]`` for every section
+        that can hold values below *prefix*, in section insertion order.
+        ``remaining_segments`` is the folded part of *prefix* that has to
+        be matched inside the section.
+        '''
+        segments = _fold(split_registry_path(prefix))
+        found = []
+        node = self._root
+        for depth, segment in enumerate(segments):
+            for section_key in node.sections:
+                found.append((section_key, segments[depth:]))
+            node = node.children.get(segment)
+            if node is None:
+                break
+        else:
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                for section_key in current.sections:
+                    found.append((section_key, []))
+                stack.extend(current.children.values())
+        found.sort(key=lambda item: self._order[item[0]])
+        return found
+
+
+class RegistryDict(dict):
+    '''
+    Registry dictionary (``{section: {valuename: data}}``) that keeps a
+    :class:`RegistryIndex` of its sections up to date on every top-level
+    insertion and removal, so ``update_dict()`` and the other merge
+    helpers maintain the index as a side effect.
+    '''
+
+    _index = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.update(*args, **kwargs)
+
+    def _registry_index(self):
+        if self._index is None:
+            self._index = RegistryIndex()
+            for key in dict.keys(self):
+                self._index.add(key)
+        return self._index
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._registry_index().add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._registry_index().remove(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            self._registry_index().remove(key)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._registry_index().remove(key)
+        return key, value
+
+    def clear(self):
+        super().clear()
+        self._registry_index().clear()
+
+    def filter(self, startswith):
+        '''
+        Same result as ``filter_dict_keys(startswith, flatten_dictionary(self))``
+        but with case-insensitive matching and cost proportional to the
+        size of the result.
+        '''
+        result = []
+        for section_key, remaining in self._registry_index().find(startswith):
+            _flatten_section(section_key, self[section_key], remaining, result)
+        return dict(result)
+
+    def lookup(self, path):
+        '''
+        Return ``(found, section_key, valuename, data)`` for the exact
+        flattened *path* without flattening the whole dictionary.
+        '''
+        parts = path.replace('\\', '/').strip('/').split('/')
+        for split in range(len(parts), 0, -1):
+            section_key = '/'.join(parts[:split])
+            if section_key not in self:
+                continue
+            value = self[section_key]
+            for part in parts[split:]:
+                if not isinstance(value, dict) or part not in value:
+                    break
+                value = value[part]
+            else:
+                if not isinstance(value, dict):
+                    return True, '/'.join(parts[:-1]), parts[-1], value
+        return False, None, None, None
@@ -21,10 +21,9 @@ import copy
 from .dconf_registry import (
     PregDconf,
     convert_string_dconf,
-    filter_dict_keys,
     find_preg_type,
-    flatten_dictionary,
 )
+from .registry_index import RegistryDict
 from ..util.constants import TRUE_STRINGS
 from ..util.logging import log
 
@@ -82,11 +81,11 @@ class StorageAdapter:
 
     def __init__(self, db_name=None, uid=None, prefix=None, keys=None, data=None):
         if data is not None:
-            self._data = dict(data)
+            self._data = RegistryDict(data)
         elif db_name is not None:
-            self._data = self._load_from_db(db_name, uid)
+            self._data = RegistryDict(self._load_from_db(db_name, uid))
         else:
-            self._data = {}
+            self._data = RegistryDict()
 
         if prefix:
             self._data = self._filter_prefix(prefix)
@@ -205,9 +204,8 @@ class StorageAdapter:
             return {}
 
     def _filter_prefix(self, prefix):
-        flat = flatten_dictionary(self._data)
-        filtered = filter_dict_keys(prefix, flat)
-        result = {}
+        filtered = self._data.filter(prefix)
+        result = RegistryDict()
         for key, value in filtered.items():
             parts = key.rsplit('/', 1)
             if len(parts) == 2:
@@ -218,25 +216,23 @@ class StorageAdapter:
         return result
 
     def _filter_keys(self, keys):
-        flat = flatten_dictionary(self._data)
-        result = {}
+        result = RegistryDict()
         for key in keys:
             norm_key = key.lstrip('/')
-            if norm_key in flat:
-                parts = norm_key.rsplit('/', 1)
-                if len(parts) == 2:
-                    section = result.setdefault(parts[0], {})
-                    section[parts[1]] = flat[norm_key]
+            found, section_key, valuename, data = self._data.lookup(norm_key)
+            if found:
+                if section_key:
+                    section = result.setdefault(section_key, {})
+                    section[valuename] = data
                 else:
-                    result[norm_key] = flat[norm_key]
+                    result[norm_key] = data
         return result
 
     def filter_hklm_entries(self, startswith):
         pregs = []
-        flat = flatten_dictionary(self._data)
         if startswith and startswith[-1] == '%':
             startswith = startswith[:-1]
-        filtered = filter_dict_keys(startswith, flat)
+        filtered = self._data.filter(startswith)
         for keyname, value in filtered.items():
             if isinstance(value, dict):
                 for valuename, data in value.items():
@@ -267,13 +263,8 @@ class StorageAdapter:
         return self.get_entry(hive_key)
 
     def get_entry(self, path, preg=True):
-        flat = flatten_dictionary(self._data)
-        norm = path.replace('\\', '/').lstrip('/')
-        if norm in flat:
-            data = flat[norm]
-            keys = norm.rsplit('/', 1)
-            key = keys[0] if len(keys) == 2 else ''
-            valuename = keys[-1]
+        found, key, valuename, data = self._data.lookup(path)
+        if found:
             if preg:
                 return PregDconf(
                     key, convert_string_dconf(valuename),
@@ -207,6 +207,7 @@ class StorageWriter:
         '''
         Compile the database from its INI sources.
 
-        Calls ``dconf compile`` for this database.
+        The GVDB file is written in-process, ``dconf compile`` is only
+        used for keyfiles the native writer does not support.
         '''
         Dconf_registry.dconf_update(uid=self.uid, db_name=self.db_name)
@@ -0,0 +1,95 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pathlib
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from gpoa_lib.util.system import machine_pass_lock, policy_apply_lock, wait_machine_pass
+
+
+class PolicyApplyLockTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        patcher = patch('gpoa_lib.util.system.policy_state_dir',
+                        return_value=pathlib.Path(self._tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_second_run_waits(self):
+        events = []
+        second_started = threading.Event()
+
+        def second_run():
+            second_started.set()
+            with policy_apply_lock():
+                events.append('second')
+
+        with patch('gpoa_lib.util.system.log') as log:
+            with policy_apply_lock():
+                thread = threading.Thread(target=second_run)
+                thread.start()
+                second_started.wait()
+                thread.join(0.2)
+                self.assertTrue(thread.is_alive())
+                events.append('first')
+            thread.join()
+        self.assertEqual(events, ['first', 'second'])
+        log.assert_called_with('D350')
+
+    def test_free_lock_is_taken_at_once(self):
+        with patch('gpoa_lib.util.system.log') as log:
+            with policy_apply_lock():
+                pass
+            with policy_apply_lock():
+                pass
+        log.assert_not_called()
+
+    def test_user_pass_waits_for_computer_pass(self):
+        events = []
+        waiting = threading.Event()
+
+        def user_pass():
+            waiting.set()
+            wait_machine_pass()
+            events.append('user')
+
+        with patch('gpoa_lib.util.system.log') as log:
+            with machine_pass_lock():
+                # Computer passes do not wait for each other
+                with machine_pass_lock():
+                    thread = threading.Thread(target=user_pass)
+                    thread.start()
+                    waiting.wait()
+                    thread.join(0.2)
+                    self.assertTrue(thread.is_alive())
+                events.append('computer')
+            thread.join()
+            self.assertEqual(events, ['computer', 'user'])
+            log.assert_called_with('D368')
+            log.reset_mock()
+            # Nothing to wait for without a computer pass
+            wait_machine_pass()
+            log.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
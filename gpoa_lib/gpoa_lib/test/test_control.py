@@ -16,10 +16,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import subprocess
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
-from gpoa_lib.frontend.appliers.control import control_subst, control
+from gpoa_lib.frontend.appliers import control as control_module
+from gpoa_lib.frontend.appliers.control import control_subst, control, query_control_states
 
 
 def _mock_popen(stdout_data=b'default unknown\n', stderr_data=b''):
@@ -92,3 +96,102 @@ class ControlSetStatusTestCase(unittest.TestCase):
         c.set_control_status()
         last_call_args = mock_popen_cls.call_args_list[-1][0][0]
         self.assertEqual(last_call_args, ['/usr/sbin/control', 'testctrl', 'deny'])
+
+
+FAKE_CONTROL = '''#!/bin/sh
+echo "$@" >> "{calls}"
+case "$1" in
+    su) [ "$2" = list ] && echo "public wheel restricted" || echo wheel ;;
+    dvd+rw-format) [ "$2" = list ] && echo "public restricted" || echo restricted ;;
+    *) echo "control: unknown facility: $1" >&2; exit 1 ;;
+esac
+'''
+
+
+class QueryControlStatesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.calls = os.path.join(self._tmp.name, 'calls')
+        self.control = os.path.join(self._tmp.name, 'control')
+        self.cache = os.path.join(self._tmp.name, 'control-values.json')
+        self.facilities = os.path.join(self._tmp.name, 'facilities')
+        with open(self.control, 'w') as f:
+            f.write(FAKE_CONTROL.format(calls=self.calls))
+        os.chmod(self.control, 0o755)
+        os.mkdir(self.facilities)
+        for name in ('su', 'dvd+rw-format'):
+            open(os.path.join(self.facilities, name), 'w').close()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _query(self, names):
+        script = control_module._CONTROL_STATES_SCRIPT.replace(control_module.CONTROL, self.control)
+        with patch.object(control_module, '_CONTROL_STATES_SCRIPT', script), \
+             patch.object(control_module, 'CONTROL_FACILITIES', self.facilities):
+            return query_control_states(names, cache_path=self.cache)
+
+    def _calls(self):
+        if not os.path.exists(self.calls):
+            return []
+        with open(self.calls) as f:
+            calls = f.read().splitlines()
+        os.unlink(self.calls)
+        return calls
+
+    def test_one_pass(self):
+        states = self._query(['su', 'dvd+rw-format', 'missing', 'su'])
+        self.assertEqual(states, {
+            'su': ('wheel', ['public', 'wheel', 'restricted']),
+            'dvd+rw-format': ('restricted', ['public', 'restricted']),
+            'missing': (None, None),
+        })
+
+    def test_possible_values_cached(self):
+        first = self._query(['su', 'dvd+rw-format', 'missing'])
+        self.assertIn('su list', self._calls())
+
+        # Only the status is queried for facilities with cached values
+        self.assertEqual(self._query(['su', 'dvd+rw-format', 'missing']), first)
+        self.assertEqual(sorted(self._calls()), ['dvd+rw-format', 'missing', 'su'])
+
+        # A changed facility script invalidates its values
+        stat = os.stat(os.path.join(self.facilities, 'su'))
+        os.utime(os.path.join(self.facilities, 'su'),
+                 ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(self._query(['su', 'dvd+rw-format']), {
+            'su': first['su'],
+            'dvd+rw-format': first['dvd+rw-format'],
+        })
+        self.assertEqual(sorted(self._calls()), ['dvd+rw-format', 'su', 'su list'])
+
+    @patch('gpoa_lib.frontend.appliers.control.log')
+    @patch('gpoa_lib.frontend.appliers.control.subprocess.run')
+    def test_failed_query(self, mock_run, mock_log):
+        mock_run.side_effect = OSError('No such file')
+        self.assertIsNone(query_control_states(['su'], cache_path=self.cache))
+        self.assertEqual(query_control_states([]), {})
+
+
+class ControlSkipTestCase(unittest.TestCase):
+
+    @patch('gpoa_lib.frontend.appliers.control.log')
+    @patch('gpoa_lib.frontend.appliers.control.subprocess.Popen')
+    def test_matching_status_is_not_set(self, mock_popen_cls, mock_log):
+        c = control('su', 'wheel', state=('wheel', ['public', 'wheel']))
+        self.assertFalse(c.set_control_status())
+        mock_popen_cls.assert_not_called()
+
+    @patch('gpoa_lib.frontend.appliers.control.log')
+    @patch('gpoa_lib.frontend.appliers.control.subprocess.Popen')
+    def test_differing_status_is_set(self, mock_popen_cls, mock_log):
+        mock_popen_cls.return_value = _mock_popen()
+        c = control('su', 0, state=('wheel', ['public', 'wheel']))
+        self.assertTrue(c.set_control_status())
+        mock_popen_cls.assert_called_once_with(['/usr/sbin/control', 'su', 'public'],
+                                               stdout=subprocess.PIPE)
+
+    def test_unqueryable_facility(self):
+        with self.assertRaises(Exception):
+            control('missing', 0, state=(None, None))
@@ -0,0 +1,186 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ipaddress
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from gpoa_lib.util import dc_topology
+from gpoa_lib.util.dc_topology import DcTopologyCache, probe_dc, rank_dcs
+
+
+TOPOLOGY = {
+    'pdc_emulator': 'dc1.domain.test',
+    'site_servers': ['dc2.domain.test'],
+    'all_servers': ['dc1.domain.test', 'dc2.domain.test', 'dc3.domain.test'],
+}
+ADDRESSES = [ipaddress.ip_address('10.0.0.5'), ipaddress.ip_address('fe80::1')]
+
+
+class DcTopologyCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'dc-topology.json')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _cache(self, realm='DOMAIN.TEST', addresses=ADDRESSES, ttl=3600):
+        return DcTopologyCache(realm, addresses, ttl, path=self.path)
+
+    def test_round_trip(self):
+        self.assertIsNone(self._cache().load(now=1000))
+        self.assertTrue(self._cache().save(TOPOLOGY, now=1000))
+        # Address order and realm case do not matter
+        cache = self._cache(realm='domain.test', addresses=list(reversed(ADDRESSES)))
+        self.assertEqual(cache.load(now=1500), TOPOLOGY)
+
+    def test_expired(self):
+        self._cache().save(TOPOLOGY, now=1000)
+        self.assertIsNone(self._cache().load(now=1000 + 3600))
+        # A clock that went back does not extend the lifetime
+        self.assertIsNone(self._cache().load(now=900))
+
+    def test_address_or_realm_change(self):
+        self._cache().save(TOPOLOGY, now=1000)
+        moved = [ipaddress.ip_address('192.168.1.5')]
+        self.assertIsNone(self._cache(addresses=moved).load(now=1001))
+        self.assertIsNone(self._cache(realm='OTHER.TEST').load(now=1001))
+
+    def test_disabled(self):
+        cache = self._cache(ttl=0)
+        self.assertFalse(cache.save(TOPOLOGY, now=1000))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(cache.load(now=1000))
+
+    def test_invalidate(self):
+        self._cache().save(TOPOLOGY, now=1000)
+        self._cache().invalidate()
+        self.assertIsNone(self._cache().load(now=1001))
+        # Nothing to remove is not an error
+        self._cache().invalidate()
+
+    def test_unwritable(self):
+        cache = DcTopologyCache('DOMAIN.TEST', ADDRESSES, 3600,
+                                path=os.path.join(self.path, 'missing', 'dc-topology.json'))
+        self.assertFalse(cache.save(TOPOLOGY, now=1000))
+
+    def test_ranking_expires_before_topology(self):
+        cache = self._cache()
+        cache.save(TOPOLOGY, now=1000)
+        self.assertIsNone(cache.load_ranking(['dc2.domain.test', 'dc4.domain.test'], now=1000))
+        self.assertTrue(cache.save_ranking(['dc4.domain.test', 'dc2.domain.test'], now=1000))
+        self.assertEqual(cache.load_ranking(['dc2.domain.test', 'dc4.domain.test'], now=1100),
+                         ['dc4.domain.test', 'dc2.domain.test'])
+        # Other servers need another ranking
+        self.assertIsNone(cache.load_ranking(['dc2.domain.test'], now=1100))
+        self.assertIsNone(cache.load_ranking(['dc2.domain.test', 'dc4.domain.test'],
+                                             now=1000 + cache.ranking_ttl))
+        # Storing a ranking does not extend the lifetime of the topology
+        cache.save_ranking(['dc2.domain.test'], now=4000)
+        self.assertEqual(cache.load(now=4000), TOPOLOGY)
+        self.assertIsNone(cache.load(now=1000 + 3600))
+
+    def test_ranking_without_topology(self):
+        self.assertFalse(self._cache().save_ranking(['dc2.domain.test'], now=1000))
+        self._cache().save(TOPOLOGY, now=1000)
+        uncached = DcTopologyCache('DOMAIN.TEST', ADDRESSES, 3600, path=self.path, ranking_ttl=0)
+        self.assertFalse(uncached.save_ranking(['dc2.domain.test'], now=1000))
+        self.assertIsNone(self._cache().load_ranking(['dc2.domain.test'], now=1000))
+
+
+class RankDcsTestCase(unittest.TestCase):
+    def test_rank_by_latency(self):
+        latencies = {'slow': 0.03, 'dead': None, 'fast': 0.01, 'mid': 0.02, 'down': None}
+        ranking = rank_dcs(['slow', 'dead', 'fast', None, 'mid', 'fast', 'down'],
+                           probe=latencies.get)
+        self.assertEqual(ranking, ['fast', 'mid', 'slow', 'dead', 'down'])
+
+    def test_probes_run_concurrently(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def probe(dc):
+            with lock:
+                active.append(dc)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(dc)
+            return 0.001
+
+        rank_dcs(['dc{}'.format(number) for number in range(4)], probe=probe)
+        self.assertEqual(max(peak), 4)
+
+    def test_empty(self):
+        self.assertEqual(rank_dcs([], probe=None), [])
+
+
+class ProbeDcTestCase(unittest.TestCase):
+    def setUp(self):
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.addCleanup(self.listener.close)
+        self.requests = []
+        patcher = patch.object(dc_topology, 'DC_PROBE_PORT', self.listener.getsockname()[1])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _serve(self, reply):
+        def serve():
+            conn, _ = self.listener.accept()
+            with conn:
+                length = struct.unpack('>I', conn.recv(4))[0]
+                self.requests.append(conn.recv(length))
+                if reply is None:
+                    conn.recv(1)
+                else:
+                    conn.sendall(struct.pack('>I', len(reply)) + reply)
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_negotiate(self):
+        self._serve(b'\xfeSMB' + bytes(60))
+        self.assertIsNotNone(probe_dc('127.0.0.1'))
+        request = self.requests[0]
+        self.assertEqual(request[:4], b'\xfeSMB')
+        # NEGOTIATE command
+        self.assertEqual(struct.unpack('<H', request[12:14])[0], 0)
+
+    def test_server_not_answering(self):
+        self._serve(None)
+        start = time.monotonic()
+        self.assertIsNone(probe_dc('127.0.0.1', timeout=0.2))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_not_smb2(self):
+        self._serve(b'\xffSMB' + bytes(60))
+        self.assertIsNone(probe_dc('127.0.0.1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from gpoa_lib.storage.dconf_compile import (
+    DconfCompileError,
+    build_database,
+    compile_database,
+    parse_keyfile,
+    parse_value,
+)
+from gpoa_lib.storage.dconf_engine import DconfEngine
+from gpoa_lib.storage.gvdb import GvdbBuilder, GvdbTable, variant_decode, variant_encode
+from gpoa_lib.util.ini_writer import write_ini_sections
+
+
+class VariantEncodeTestCase(unittest.TestCase):
+
+    def test_round_trip(self):
+        for signature, value in (('i', -7), ('s', 'строка'), ('b', True), ('d', 1.5),
+                                 ('as', ['a', '', 'bc']), ('ai', [1, 2, 3]),
+                                 ('(si)', ('x', 7)), ('a{ss}', {'k': 'v'}),
+                                 ('v', ('s', 'inner')), ('ms', 'x'), ('ms', None)):
+            data = variant_encode(signature, value)
+            decoded = variant_decode(signature, data)
+            expected = value[1] if signature == 'v' else value
+            self.assertEqual(decoded, expected, signature)
+
+    def test_large_array_offsets(self):
+        value = ['x' * 100] * 10
+        self.assertEqual(variant_decode('as', variant_encode('as', value)), value)
+
+
+class GvdbBuilderTestCase(unittest.TestCase):
+
+    def test_nested_table_and_parents(self):
+        builder = GvdbBuilder()
+        root = builder.insert('/')
+        directory = builder.insert('/a/')
+        directory.set_parent(root)
+        builder.insert_value('/a/b', 's', 'value').set_parent(directory)
+        builder.insert_table('.locks').insert_value('/a/b', 's', '')
+        table = GvdbTable(builder.write())
+        self.assertEqual(table.get_value('/a/b'), 'value')
+        self.assertEqual(sorted(table.get_names()), ['.locks', '/', '/a/', '/a/b'])
+        self.assertTrue(table.get_table('.locks').has_value('/a/b'))
+
+    def test_empty_table(self):
+        table = GvdbTable(GvdbBuilder().write())
+        self.assertEqual(table.get_names(), [])
+        self.assertIsNone(table.get_value('/a'))
+
+
+class ParseValueTestCase(unittest.TestCase):
+
+    def test_basic_values(self):
+        self.assertEqual(parse_value('5'), ('i', 5))
+        self.assertEqual(parse_value('"a\\\\b"'), ('s', 'a\\b'))
+        self.assertEqual(parse_value("'x\\u0430'"), ('s', 'xа'))
+        self.assertEqual(parse_value('true'), ('b', True))
+        self.assertEqual(parse_value('uint32 7'), ('u', 7))
+        self.assertEqual(parse_value("['a', 'b']"), ('as', ['a', 'b']))
+        self.assertEqual(parse_value('@as []'), ('as', []))
+        self.assertEqual(parse_value('[1, 2.5]'), ('ad', [1.0, 2.5]))
+
+    def test_values_dconf_rejects(self):
+        for text in ('"unterminated', '"a"b"', '"C:\\Users"', '5000000000', 'True', '[1, "a"]'):
+            self.assertIsNone(parse_value(text), text)
+
+    def test_unsupported_values(self):
+        for text in ('(1, 2)', '{"a": 1}', 'nothing', '[]'):
+            with self.assertRaises(DconfCompileError, msg=text):
+                parse_value(text)
+
+
+class ParseKeyfileTestCase(unittest.TestCase):
+
+    def test_groups_merge(self):
+        content = '# comment\n[a/b]\nx = 1\n\n[c]\ny=\'v\'\n[a/b]\nx = 2\n'
+        self.assertEqual(parse_keyfile(content), [('a/b', [('x', '2')]), ('c', [('y', "'v'")])])
+
+    def test_invalid_line(self):
+        with self.assertRaises(DconfCompileError):
+            parse_keyfile('[a]\nnot a pair\n')
+
+
+class CompileDatabaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.keyfile_dir = os.path.join(self.tmp.name, 'policy.d')
+        os.makedirs(os.path.join(self.keyfile_dir, 'locks'))
+        self.db_file = os.path.join(self.tmp.name, 'policy')
+        self.data = {
+            'Software/BaseALT/Policies/Control': {'sshd-gssapi-auth': '1', 'count': 3},
+            'Software/BaseALT/Policies/GpoPriority': {'1': '\\\\dom\\sysvol'},
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        DconfEngine.clear_cache()
+
+    def _write(self, name, content):
+        with open(os.path.join(self.keyfile_dir, name), 'w') as f:
+            f.write(content)
+
+    def _engine(self):
+        return DconfEngine([('system-db', self.db_file)])
+
+    def test_data_replaces_own_keyfile(self):
+        self._write('policy.ini', '[Software/BaseALT/Policies/Control]\nstale = "1"\n')
+        keys = compile_database(self.db_file, self.keyfile_dir, self.data,
+                                os.path.join(self.keyfile_dir, 'policy.ini'))
+        engine = self._engine()
+        self.assertEqual(keys, 3)
+        self.assertEqual(engine.read('/Software/BaseALT/Policies/Control/count'), 3)
+        # Unknown escapes lose the backslash, as in g_variant_parse()
+        self.assertEqual(engine.read('/Software/BaseALT/Policies/GpoPriority/1'), '\\domsysvol')
+        self.assertIsNone(engine.read('/Software/BaseALT/Policies/Control/stale'))
+        self.assertEqual(sorted(engine.list_keys('/Software/BaseALT/Policies/Control')),
+                         ['/Software/BaseALT/Policies/Control/count',
+                          '/Software/BaseALT/Policies/Control/sshd-gssapi-auth'])
+
+    def test_data_matches_keyfile(self):
+        path = os.path.join(self.keyfile_dir, 'policy.ini')
+        with open(path, 'w') as f:
+            write_ini_sections(f, self.data)
+        from_text = build_database(self.keyfile_dir)
+        from_data = build_database(self.keyfile_dir, self.data, path)
+        self.assertEqual(from_text.values, from_data.values)
+
+    def test_later_keyfile_wins_and_locks(self):
+        self._write('policy.ini', '[org/test]\nkey = "policy"\n')
+        self._write('zz-local', "[org/test]\nkey = 'local'\nother = @as ['a']\n")
+        self._write(os.path.join('locks', 'policy'), '/org/test/key\n# /org/test/other\nnot-a-path\n')
+        compile_database(self.db_file, self.keyfile_dir)
+        engine = self._engine()
+        self.assertEqual(engine.read('/org/test/key'), 'local')
+        self.assertEqual(engine.read('/org/test/other'), ['a'])
+        self.assertFalse(DconfEngine([('user-db', os.path.join(self.tmp.name, 'user')),
+                                      ('system-db', self.db_file)]).is_writable('/org/test/key'))
+        self.assertTrue(engine.is_writable('/org/test/other'))
+
+    def test_replace_is_atomic(self):
+        compile_database(self.db_file, self.keyfile_dir, self.data, 'policy.ini')
+        inode = os.stat(self.db_file).st_ino
+        compile_database(self.db_file, self.keyfile_dir, {}, 'policy.ini')
+        self.assertNotEqual(os.stat(self.db_file).st_ino, inode)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['policy', 'policy.d'])
+
+    def test_unsupported_keyfile(self):
+        self._write('foreign', '[org/test]\nkey = (1, 2)\n')
+        with self.assertRaises(DconfCompileError):
+            compile_database(self.db_file, self.keyfile_dir)
+        self.assertFalse(os.path.exists(self.db_file))
+
+    @unittest.skipUnless(shutil.which('dconf'), 'dconf utility is not installed')
+    def test_same_result_as_dconf_compile(self):
+        path = os.path.join(self.keyfile_dir, 'policy.ini')
+        with open(path, 'w') as f:
+            write_ini_sections(f, self.data)
+        self._write(os.path.join('locks', 'policy'), '/org/test/key\n')
+        reference = os.path.join(self.tmp.name, 'reference')
+        subprocess.run(['dconf', 'compile', reference, self.keyfile_dir], check=True)
+        compile_database(self.db_file, self.keyfile_dir, self.data, path)
+        native = GvdbTable.from_file(self.db_file)
+        expected = GvdbTable.from_file(reference)
+        self.assertEqual(sorted(native.get_names()), sorted(expected.get_names()))
+        for name in expected.get_names():
+            self.assertEqual(native.get_raw_value(name), expected.get_raw_value(name), name)
+
+
+class DconfUpdateTestCase(unittest.TestCase):
+
+    def test_falls_back_to_dconf_compile(self):
+        from gpoa_lib.storage.dconf_registry import Dconf_registry
+        with patch('gpoa_lib.storage.dconf_registry.compile_database',
+                   side_effect=DconfCompileError('unsupported')), \
+                patch('subprocess.Popen') as popen:
+            popen.return_value.__enter__.return_value.communicate.return_value = ('', '')
+            Dconf_registry.dconf_update(db_name='test')
+        popen.assert_called_once()
+        self.assertEqual(popen.call_args[0][0][:2], ['dconf', 'compile'])
+
+    def test_native_compile_does_not_fork(self):
+        from gpoa_lib.storage.dconf_registry import Dconf_registry
+        with patch('gpoa_lib.storage.dconf_registry.compile_database', return_value=1) as native, \
+                patch('subprocess.Popen') as popen:
+            Dconf_registry.dconf_update(uid=1000, data={}, data_file='policy1000.ini')
+        native.assert_called_once_with('/etc/dconf/db/policy1000', '/etc/dconf/db/policy1000.d/',
+                                       {}, 'policy1000.ini')
+        popen.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import struct
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from gpoa_lib.storage.dconf_engine import DconfEngine, parse_profile
+from gpoa_lib.storage.gvdb import GvdbTable, gvdb_hash, variant_decode
+
+
+def _variant(value):
+    if isinstance(value, int):
+        return struct.pack('<i', value) + b'\x00i'
+    return value.encode('utf-8') + b'\x00\x00s'
+
+
+def _build_table(entries, locks=None):
+    '''
+    Build a minimal GVDB file: one item per full key, no parents and
+    no bloom filter.  Locks go into a nested ``.locks`` table.
+    '''
+    blob = bytearray(24)
+
+    def add_chunk(data, alignment):
+        while len(blob) % alignment:
+            blob.append(0)
+        start = len(blob)
+        blob.extend(data)
+        return start, len(blob)
+
+    def add_hash(items):
+        names = sorted(items, key=lambda name: gvdb_hash(name) % max(len(items), 1))
+        n_buckets = max(len(names), 1)
+        buckets = [len(names)] * n_buckets
+        for index in reversed(range(len(names))):
+            buckets[gvdb_hash(names[index]) % n_buckets] = index
+        for bucket in reversed(range(n_buckets - 1)):
+            buckets[bucket] = min(buckets[bucket], buckets[bucket + 1])
+        records = []
+        for name in names:
+            kind, payload = items[name]
+            key_start, key_end = add_chunk(name.encode('utf-8'), 1)
+            if kind == 'H':
+                value_start, value_end = payload
+            else:
+                value_start, value_end = add_chunk(payload, 8)
+            records.append(struct.pack('<IIIHcxII', gvdb_hash(name), 0xffffffff,
+                key_start, key_end - key_start, kind.encode(), value_start, value_end))
+        table = struct.pack('<II', 0, n_buckets) + struct.pack('<%dI' % n_buckets, *buckets)
+        return add_chunk(table + b''.join(records), 4)
+
+    items = {name: ('v', _variant(value)) for name, value in entries.items()}
+    if locks is not None:
+        items['.locks'] = ('H', add_hash({name: ('v', _variant('')) for name in locks}))
+    root = add_hash(items)
+    blob[:24] = b'GVariant' + struct.pack('<IIII', 0, 0, *root)
+    return bytes(blob)
+
+
+class VariantDecodeTestCase(unittest.TestCase):
+
+    def test_basic_types(self):
+        self.assertEqual(variant_decode('v', b'abc\x00\x00s'), 'abc')
+        self.assertEqual(variant_decode('v', struct.pack('<i', -5) + b'\x00i'), -5)
+        self.assertIs(variant_decode('b', b'\x01'), True)
+
+    def test_string_array(self):
+        self.assertEqual(variant_decode('as', b'a\x00bc\x00\x02\x05'), ['a', 'bc'])
+
+    def test_tuple_with_framing_offset(self):
+        data = b'x\x00\x00\x00' + struct.pack('<i', 7) + b'\x02'
+        self.assertEqual(variant_decode('(si)', data), ('x', 7))
+
+
+class GvdbTableTestCase(unittest.TestCase):
+
+    def test_lookup(self):
+        table = GvdbTable(_build_table({'/a/b': 'value', '/a/c': 3}))
+        self.assertEqual(table.get_value('/a/b'), 'value')
+        self.assertEqual(table.get_value('/a/c'), 3)
+        self.assertIsNone(table.get_value('/a/missing'))
+        self.assertEqual(sorted(table.get_names()), ['/a/b', '/a/c'])
+
+    def test_nested_locks_table(self):
+        table = GvdbTable(_build_table({'/a/b': 'value'}, locks=['/a/b']))
+        self.assertTrue(table.get_table('.locks').has_value('/a/b'))
+        self.assertIsNone(table.get_table('.missing'))
+
+
+class DconfEngineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        DconfEngine.clear_cache()
+
+    def _db(self, name, entries, locks=None):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(_build_table(entries, locks))
+        return path
+
+    def test_parse_profile(self):
+        sources = parse_profile('# comment\nuser-db:user\nsystem-db:policy\nservice-db:x\n',
+                                {'HOME': '/home/u'})
+        self.assertEqual(sources, [('user-db', '/home/u/.config/dconf/user'),
+                                   ('system-db', '/etc/dconf/db/policy')])
+
+    def test_first_database_wins(self):
+        user = self._db('user', {'/k/v': 'user'})
+        policy = self._db('policy', {'/k/v': 'policy', '/k/w': 'only-policy'})
+        engine = DconfEngine([('user-db', user), ('system-db', policy)])
+        self.assertEqual(engine.read('/k/v'), 'user')
+        self.assertEqual(engine.read('/k/w'), 'only-policy')
+        self.assertIsNone(engine.read('/k/none'))
+
+    def test_lock_skips_earlier_databases(self):
+        user = self._db('user', {'/k/v': 'user'})
+        local = self._db('local', {'/k/v': 'local'})
+        policy = self._db('policy', {'/k/v': 'policy'}, locks=['/k/v'])
+        engine = DconfEngine([('user-db', user), ('system-db', local), ('system-db', policy)])
+        self.assertEqual(engine.read('/k/v'), 'policy')
+        self.assertFalse(engine.is_writable('/k/v'))
+
+    def test_missing_database_is_skipped(self):
+        policy = self._db('policy', {'/k/v': 1})
+        engine = DconfEngine([('user-db', os.path.join(self.tmp.name, 'none')),
+                              ('system-db', policy)])
+        self.assertEqual(engine.read('/k/v'), 1)
+
+    def test_list_keys_merges_databases(self):
+        first = self._db('first', {'/Software/A/x': 1, '/Other/y': 2})
+        second = self._db('second', {'/Software/A/x': 3, '/Software/B/z': 4})
+        engine = DconfEngine([('system-db', first), ('system-db', second)])
+        self.assertEqual(engine.list_keys('Software'), ['/Software/A/x', '/Software/B/z'])
+
+    def test_reload_on_change(self):
+        policy = self._db('policy', {'/k/v': 'old'})
+        engine = DconfEngine([('system-db', policy)])
+        self.assertEqual(engine.read('/k/v'), 'old')
+        os.remove(policy)
+        self._db('policy', {'/k/v': 'new value'})
+        self.assertEqual(engine.read('/k/v'), 'new value')
+
+    def test_from_env_absolute_profile(self):
+        policy = self._db('policy', {'/k/v': 'value'})
+        profile = os.path.join(self.tmp.name, 'profile')
+        with open(profile, 'w') as f:
+            f.write('file-db:{}\n'.format(policy))
+        engine = DconfEngine.from_env({'DCONF_PROFILE': profile, 'HOME': self.tmp.name})
+        self.assertEqual(engine.read('/k/v'), 'value')
+
+    def test_registry_get_key_value_does_not_fork(self):
+        from gpoa_lib.storage.dconf_registry import Dconf_registry
+        policy = self._db('policy', {'/Software/BaseALT/Policies/GPUpdate/Flag': '1'})
+        engine = DconfEngine([('system-db', policy)])
+        with patch('gpoa_lib.storage.dconf_registry.DconfEngine.from_env', return_value=engine), \
+                patch('subprocess.Popen') as popen:
+            value = Dconf_registry.get_key_value('/Software/BaseALT/Policies/GPUpdate/Flag')
+        self.assertEqual(value, 1)
+        popen.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,6 +17,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import unittest
+from unittest.mock import patch
 
 from gpoa_lib.storage.dconf_registry import (
     Dconf_registry,
@@ -195,6 +196,49 @@ class DconfRegistryAddGetTestCase(unittest.TestCase):
         self.assertEqual(len(logon), 1)
 
 
+class DconfRegistryCommitTestCase(unittest.TestCase):
+
+    def setUp(self):
+        Dconf_registry.reset()
+        Dconf_registry.global_registry_dict['Software/BaseALT/Policies/Control'] = {'sshd': '1'}
+        module = 'gpoa_lib.storage.dconf_registry'
+        patchers = [
+            patch(module + '.create_dconf_ini_file'),
+            patch(module + '.add_preferences_to_global_registry_dict'),
+            patch(module + '.touch_file'),
+            patch.object(Dconf_registry, 'apply_template'),
+        ]
+        self.write, self.preferences, _, _ = [p.start() for p in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        self.addCleanup(Dconf_registry.reset)
+
+    def test_unchanged_second_commit_is_skipped(self):
+        self.assertTrue(Dconf_registry.commit('root', True, previous=True))
+        self.assertFalse(Dconf_registry.commit('root', True))
+        self.write.assert_called_once()
+        self.preferences.assert_called_once()
+
+    def test_changed_section_is_written(self):
+        Dconf_registry.commit('root', True)
+        Dconf_registry.global_registry_dict['Software/BaseALT/Policies/Control']['sshd'] = '0'
+        self.assertEqual(Dconf_registry.dirty_sections('/etc/dconf/db/policy.d/policy.ini')[0],
+                         ['Software/BaseALT/Policies/Control'])
+        self.assertTrue(Dconf_registry.commit('root', True))
+        self.assertEqual(self.write.call_count, 2)
+
+    def test_removed_section_is_dirty(self):
+        Dconf_registry.commit('root', True)
+        del Dconf_registry.global_registry_dict['Software/BaseALT/Policies/Control']
+        self.assertTrue(Dconf_registry.commit('root', True))
+
+    def test_marked_preferences_are_serialized_again(self):
+        Dconf_registry.commit('root', True)
+        Dconf_registry.mark_preferences_dirty()
+        Dconf_registry.commit('root', True)
+        self.assertEqual(self.preferences.call_count, 2)
+
+
 class FilterDictKeysTestCase(unittest.TestCase):
 
     def test_exact_prefix(self):
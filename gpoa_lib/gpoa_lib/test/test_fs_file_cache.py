@@ -0,0 +1,223 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from gpoa_lib.storage.fs_file_cache import MANIFEST_NAME, fs_file_cache
+
+
+URI = 'smb://domain.test/share/wallpaper.png'
+
+
+class FakeHandle(io.BytesIO):
+    def __init__(self, context, data, mtime):
+        super().__init__(data)
+        self.context = context
+        self.mtime = mtime
+
+    def fstat(self):
+        size = len(self.getvalue())
+        return (0o100644, 0, 0, 1, 0, 0, size, self.mtime, self.mtime, self.mtime)
+
+    def read(self, size=-1):
+        self.context.reads.append(size)
+        return super().read(size)
+
+
+class FakeContext:
+    def __init__(self, data=b'image', mtime=100):
+        self.data = data
+        self.mtime = mtime
+        self.reads = []
+        self.opened = []
+
+    def open(self, url, flags):
+        self.opened.append(url)
+        return FakeHandle(self, self.data, self.mtime)
+
+
+class FsFileCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        patcher = patch('gpoa_lib.storage.fs_file_cache.file_cache_dir',
+                        return_value=pathlib.Path(self._tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.context = FakeContext()
+
+    def _cache(self, **kwargs):
+        cache = fs_file_cache('file_cache', **kwargs)
+        cache._samba_context = self.context
+        return cache
+
+    def _store(self, *args):
+        cache = self._cache()
+        cache.store(URI, *args)
+        cache.save_manifest()
+        return cache
+
+    def _local(self):
+        with open(self._cache().get(URI), 'rb') as f:
+            return f.read()
+
+    def test_unchanged_file_is_not_transferred(self):
+        cache = self._store()
+        self.assertEqual(cache.stats, {'hits': 0, 'misses': 1, 'bytes': 5})
+        self.assertEqual(self._local(), b'image')
+
+        self.context.reads.clear()
+        cache = self._cache()
+        cache.store(URI)
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 0, 'bytes': 0})
+        self.assertEqual(self.context.reads, [])
+
+    def test_remote_change_is_fetched(self):
+        self._store()
+        self.context.data, self.context.mtime = b'new image', 200
+        cache = self._cache()
+        cache.store(URI)
+        self.assertEqual(cache.stats['misses'], 1)
+        self.assertEqual(self._local(), b'new image')
+
+    def test_local_change_is_fetched(self):
+        self._store()
+        with open(self._cache().get(URI), 'wb') as f:
+            f.write(b'IMAGE')
+        cache = self._cache()
+        cache.store(URI)
+        self.assertEqual(cache.stats['misses'], 1)
+        self.assertEqual(self._local(), b'image')
+
+    def test_destination_is_part_of_the_key(self):
+        dest = pathlib.Path(self._tmp.name, 'copy', 'wallpaper.png')
+        self._store()
+        cache = self._cache()
+        cache.store(URI, dest)
+        cache.store(URI, dest)
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 1, 'bytes': 5})
+
+    def test_block_size(self):
+        self.context.data = b'x' * 10
+        self._cache(blocksize=4).store(URI)
+        self.assertEqual(self.context.reads, [4, 4, 4, 4])
+
+    def test_unreadable_remote_keeps_cached_copy(self):
+        self._store()
+
+        def denied(url, flags):
+            raise OSError('Access denied')
+
+        self.context.open = denied
+        cache = self._cache()
+        cache.store(URI)
+        self.assertEqual(cache.stats, {'hits': 0, 'misses': 0, 'bytes': 0})
+        self.assertEqual(self._local(), b'image')
+        self.assertEqual(sorted(os.listdir(os.path.join(self._tmp.name, 'domain.test', 'share'))),
+                         ['wallpaper.png'])
+
+    def test_manifest_is_saved_once(self):
+        manifest = os.path.join(self._tmp.name, MANIFEST_NAME)
+        dest = pathlib.Path(self._tmp.name, 'copy', 'wallpaper.png')
+        cache = self._cache()
+        with patch.object(cache, '_write_manifest', wraps=cache._write_manifest) as write:
+            cache.store(URI)
+            cache.store(URI, dest)
+            self.assertFalse(os.path.exists(manifest))
+            cache.log_stats()
+            cache.log_stats()
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(len(self._cache().manifest), 2)
+
+
+class FsFileCachePrefetchTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        patcher = patch('gpoa_lib.storage.fs_file_cache.file_cache_dir',
+                        return_value=pathlib.Path(self._tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.contexts = []
+        self.lock = threading.Lock()
+
+    def _context_factory(self):
+        context = FakeContext()
+        with self.lock:
+            self.contexts.append(context)
+        return context
+
+    def _cache(self):
+        return fs_file_cache('file_cache', context_factory=self._context_factory)
+
+    def test_prefetched_files_are_local_hits(self):
+        uris = ['smb://domain.test/share/{}.png'.format(number) for number in range(6)]
+        cache = self._cache()
+        cache.prefetch(uris + ['/usr/share/local.png', uris[0]], workers=3)
+        self.assertEqual(cache.stats, {'hits': 0, 'misses': 6, 'bytes': 30})
+        self.assertLessEqual(len(self.contexts), 3)
+        self.assertEqual(len(self._cache().manifest), 6)
+
+        dest = pathlib.Path(self._tmp.name, 'copy', 'wallpaper.png')
+        dest.parent.mkdir()
+        for uri in uris:
+            cache.store(uri)
+        cache.store(uris[0], dest)
+        self.assertEqual(cache.stats, {'hits': 7, 'misses': 6, 'bytes': 30})
+        self.assertEqual(dest.read_bytes(), b'image')
+        # store() did not go to the share at all
+        self.assertEqual(sum(len(context.opened) for context in self.contexts), 6)
+        self.assertIsNone(cache._samba_context)
+
+    def test_connections_are_bounded(self):
+        active = []
+        peak = []
+
+        class SlowContext(FakeContext):
+            def open(context, url, flags):
+                with self.lock:
+                    active.append(url)
+                    peak.append(len(active))
+                time.sleep(0.02)
+                with self.lock:
+                    active.remove(url)
+                return super().open(url, flags)
+
+        cache = fs_file_cache('file_cache', context_factory=SlowContext)
+        cache.prefetch(['smb://domain.test/share/{}'.format(number) for number in range(8)],
+                       workers=2)
+        self.assertEqual(max(peak), 2)
+
+    def test_failed_prefetch_falls_back_to_share(self):
+        cache = self._cache()
+        with patch.object(FakeContext, 'open', side_effect=OSError('Access denied')):
+            cache.prefetch(['smb://domain.test/share/file'])
+        cache.store('smb://domain.test/share/file')
+        self.assertEqual(cache.stats['misses'], 1)
+        self.assertEqual(len(self.contexts), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
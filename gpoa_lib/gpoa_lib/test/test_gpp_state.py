@@ -139,14 +139,33 @@ class GppStateManagerTestCase(unittest.TestCase):
         self.assertFalse(sm.should_skip(element, 'Files'))
 
     @patch('gpoa_lib.storage.gpp_state.get_current_gpo_guids')
-    @patch('gpoa_lib.storage.gpp_state.is_element_applied')
-    def test_should_skip_applied(self, mock_applied, mock_gpos):
+    @patch('gpoa_lib.storage.gpp_state.get_previous_elements')
+    def test_should_skip_applied(self, mock_prev, mock_gpos):
         mock_gpos.return_value = set()
-        mock_applied.return_value = True
+        mock_prev.return_value = [{'uid': 'test-0'}, {'uid': 'test-1', 'applied': '01.01.2026 10:00:00'}]
         sm = GppStateManager()
-        sm._previous_elements = {}
-        element = {'uid': 'test-1'}
-        self.assertTrue(sm.should_skip(element, 'Files'))
+        self.assertTrue(sm.should_skip({'uid': 'test-1', 'apply_once': True}, 'Files'))
+        self.assertFalse(sm.should_skip({'uid': 'test-0', 'apply_once': True}, 'Files'))
+        self.assertFalse(sm.should_skip({'uid': 'test-1'}, 'Files'))
+        mock_prev.assert_called_once_with('Files', None)
+
+    @patch('gpoa_lib.storage.gpp_state.get_current_gpo_guids')
+    @patch('gpoa_lib.storage.gpp_state.get_previous_elements')
+    def test_find_removed_matches_module_functions(self, mock_prev, mock_gpos):
+        mock_gpos.return_value = {'{GPO1}'}
+        previous = [
+            {'uid': 'a', 'remove_policy': True, 'policy_guid': '{GPO1}'},
+            {'uid': 'b', 'remove_policy': True, 'policy_guid': '{GPO2}'},
+            {'uid': 'c', 'remove_policy': False, 'policy_guid': '{GPO2}'},
+            {'uid': 'd', 'remove_policy': True, 'policy_guid': '{GPO1}'},
+        ]
+        mock_prev.return_value = previous
+        current = [{'uid': 'a'}, {'uid': 'b'}]
+        expected = find_removed_elements(current, previous)
+        expected.extend(find_gpo_removed_elements({'{GPO1}'}, previous))
+        sm = GppStateManager()
+        self.assertEqual(sm.find_removed('Files', current), expected)
+        self.assertEqual([e['uid'] for e in expected], ['d', 'b'])
 
     @patch('gpoa_lib.storage.gpp_state.get_current_gpo_guids')
     def test_cleanup_removed_calls_handler(self, mock_gpos):
@@ -17,7 +17,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import configparser
+import os
 import sys
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch, call
 
@@ -144,6 +146,74 @@ class SystemGsettingsAppendTestCase(unittest.TestCase):
             self.assertEqual(len(sgs.gsettings), 0)
 
 
+class GsettingsSchemasTestCase(unittest.TestCase):
+
+    def test_source_is_looked_up_once(self):
+        gs = _import_gsettings()
+        _mock_gio.reset_mock()
+        source = _mock_gio.SettingsSchemaSource.get_default.return_value
+        source.lookup.return_value.has_key.return_value = True
+        schemas = gs.gsettings_schemas()
+        for path in ('key-a', 'key-b', 'key-c'):
+            self.assertTrue(gs.check_existing_gsettings('org.test', path, schemas))
+        schemas.settings('org.test')
+        schemas.settings('org.test')
+
+        _mock_gio.SettingsSchemaSource.get_default.assert_called_once_with()
+        source.lookup.assert_called_once_with('org.test', False)
+        _mock_gio.Settings.assert_called_once_with(schema='org.test')
+
+
+class SystemGsettingsWriteTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.override = os.path.join(self._tmp.name, 'zzz_policy.gschema.override')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_replace_if_changed(self):
+        gs = _import_gsettings()
+        self.assertTrue(gs.replace_if_changed(self.override, '[org/test]\nkey=1\n'))
+        mtime = os.stat(self.override).st_mtime_ns
+        self.assertFalse(gs.replace_if_changed(self.override, '[org/test]\nkey=1\n'))
+        self.assertEqual(os.stat(self.override).st_mtime_ns, mtime)
+        self.assertTrue(gs.replace_if_changed(self.override, '[org/test]\nkey=2\n'))
+        with open(self.override) as f:
+            self.assertEqual(f.read(), '[org/test]\nkey=2\n')
+        self.assertEqual(os.listdir(self._tmp.name), ['zzz_policy.gschema.override'])
+
+    @patch('gpoa_lib.frontend.appliers.gsettings.log')
+    def test_apply_reports_changes(self, mock_log):
+        gs = _import_gsettings()
+        paths = {
+            '_system_gsettings__path_local_dir': os.path.join(self._tmp.name, 'local.d'),
+            '_system_gsettings__path_locks': os.path.join(self._tmp.name, 'locks', 'policy'),
+            '_system_gsettings__path_profile': os.path.join(self._tmp.name, 'profile', 'user'),
+        }
+        mock_key = MagicMock()
+        mock_key.get_type_string.return_value = 's'
+        _mock_gio.Settings.return_value.get_value.return_value = mock_key
+        _mock_gio.Settings.return_value.get_property.return_value = '/org/test/'
+        _mock_glib.Variant.side_effect = lambda glib_type, value: repr(value)
+
+        def apply(value, lock):
+            sgs = gs.system_gsettings(self.override)
+            with patch.object(gs, 'check_existing_gsettings', return_value=True):
+                sgs.append('org.test', 'key', value, lock=lock, helper=None)
+            return sgs.apply()
+
+        try:
+            with patch.multiple(gs.system_gsettings, **paths):
+                self.assertEqual(apply('a', True), (True, True))
+                self.assertEqual(apply('a', True), (False, False))
+                self.assertEqual(apply('b', True), (True, False))
+                self.assertEqual(apply('b', False), (False, True))
+        finally:
+            _mock_glib.Variant.side_effect = None
+
+
 class UserGsettingApplyTestCase(unittest.TestCase):
 
     @patch('gpoa_lib.frontend.appliers.gsettings.log')
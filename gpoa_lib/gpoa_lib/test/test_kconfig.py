@@ -0,0 +1,159 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import importlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from gpoa_lib.util.kconfig import (
+    KCONFIG_GROUP,
+    KCONFIG_KEY,
+    KConfigFile,
+    kconfig_escape,
+    kconfig_group,
+    kconfig_unescape,
+)
+
+
+# The frontend package exports the applier class under the module name
+kde_applier = importlib.import_module('gpoa_lib.frontend.kde_applier')
+
+EXISTING = '''# Written by hand
+[General]
+ColorScheme=Breeze
+Name[de]=Standard
+
+[KDE]
+SingleClick[$i]=false
+'''
+
+
+class KConfigEscapeTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        for text in (' lead', 'trail ', 'a\\b', 'line\nbreak\ttab', 'x=[y]', '\x01'):
+            for kind in (KCONFIG_GROUP, KCONFIG_KEY):
+                self.assertEqual(kconfig_unescape(kconfig_escape(text, kind)), text)
+            self.assertEqual(kconfig_unescape(kconfig_escape(text)), text)
+
+    def test_escapes(self):
+        self.assertEqual(kconfig_escape('a=b[c]', KCONFIG_KEY), 'a\\x3db\\x5bc\\x5d')
+        self.assertEqual(kconfig_escape('a=b[c]'), 'a=b[c]')
+        self.assertEqual(kconfig_escape(' x ', KCONFIG_GROUP), ' x ')
+        self.assertEqual(kconfig_escape(' x '), '\\sx\\s')
+        # List separators are left to the reader of the value
+        self.assertEqual(kconfig_unescape('a\\,b'), 'a\\,b')
+
+    def test_group_path(self):
+        self.assertEqual(kconfig_group('Containments)(1)(General'),
+                         ('Containments', '1', 'General'))
+
+
+class KConfigFileTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'kdeglobals')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_parse(self):
+        config = KConfigFile(EXISTING)
+        self.assertEqual(config.get(['General'], 'ColorScheme'), ('Breeze', False))
+        self.assertEqual(config.get(['KDE'], 'SingleClick'), ('false', True))
+        self.assertIsNone(config.get(['General'], 'Missing'))
+        self.assertIsNone(config.get(['Other'], 'Name'))
+
+    def test_set_keeps_other_lines(self):
+        config = KConfigFile(EXISTING)
+        config.set(['General'], 'ColorScheme', 'Dark')
+        config.set(['KDE'], 'SingleClick', 'true')
+        config.set(['General'], 'Font', 'Sans,10')
+        config.set(['Containments', '1', 'General'], 'Image', ' /a b ', immutable=True)
+        self.assertEqual(config.text(), '''# Written by hand
+[General]
+ColorScheme=Dark
+Name[de]=Standard
+Font=Sans,10
+
+[KDE]
+SingleClick=true
+
+[Containments][1][General]
+Image[$i]=\\s/a b\\s
+''')
+        self.assertEqual(KConfigFile(config.text()).get(('Containments', '1', 'General'), 'Image'),
+                         (' /a b ', True))
+
+    def test_save_skips_unchanged(self):
+        with open(self.path, 'w') as f:
+            f.write(EXISTING)
+        os.chmod(self.path, 0o600)
+        config = KConfigFile.load(self.path)
+        config.set(['General'], 'ColorScheme', 'Breeze')
+        self.assertFalse(config.save(self.path))
+
+        config.set(['General'], 'ColorScheme', 'Dark')
+        self.assertTrue(config.save(self.path))
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        self.assertEqual(os.listdir(self._tmp.name), ['kdeglobals'])
+        self.assertEqual(KConfigFile.load(self.path).get(['General'], 'ColorScheme'),
+                         ('Dark', False))
+
+    def test_missing_file(self):
+        config = KConfigFile.load(self.path)
+        self.assertEqual(config.text(), '')
+        config.set(['General'], 'ColorScheme', 'Breeze')
+        self.assertTrue(config.save(self.path))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '[General]\nColorScheme=Breeze\n')
+
+
+class KdeApplyTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self._tmp.name, '.config'))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_user_files_written_once(self):
+        settings = {'kdeglobals': {'General': {'ColorScheme': 'Dark', 'Font': 'Sans'},
+                                   'KDE)(Nested': {'SingleClick': 0}}}
+        locks = {'kdeglobals.General.Font': 1}
+        with patch.object(kde_applier, 'get_homedir', return_value=self._tmp.name), \
+                patch.object(kde_applier, 'call_dbus_method') as mock_dbus, \
+                patch.object(kde_applier, 'log'):
+            kde_applier.apply(settings, locks, username='user')
+            kde_applier.apply(settings, locks, username='user')
+
+        mock_dbus.assert_called_once_with('kdeglobals')
+        with open(os.path.join(self._tmp.name, '.config', 'kdeglobals')) as f:
+            self.assertEqual(f.read(), '''[General]
+ColorScheme=Dark
+Font[$i]=Sans
+
+[KDE][Nested]
+SingleClick=0
+''')
+
+
+if __name__ == '__main__':
+    unittest.main()
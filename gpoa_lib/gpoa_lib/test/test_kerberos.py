@@ -16,10 +16,54 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import struct
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
 
+REALM = 'DOMAIN.TEST'
+MACHINE = 'HOST$@' + REALM
+
+
+def _counted(value):
+    if isinstance(value, str):
+        value = value.encode()
+    return struct.pack('>I', len(value)) + value
+
+
+def _principal(realm, *components):
+    return (struct.pack('>II', 1, len(components)) + _counted(realm)
+            + b''.join(_counted(component) for component in components))
+
+
+def make_ccache(credentials, version=4):
+    '''
+    FILE credential cache of HOST$ with (server_components, endtime,
+    renew_till) credentials.
+    '''
+    data = struct.pack('>H', 0x0500 | version)
+    if version == 4:
+        # One KDC time offset tag
+        data += struct.pack('>HHHII', 12, 1, 8, 0, 0)
+    data += _principal(REALM, 'HOST$')
+    for server, endtime, renew_till in credentials:
+        data += _principal(REALM, 'HOST$')
+        data += _principal(server[0], *server[1])
+        data += struct.pack('>HH', 18, 18) if version == 3 else struct.pack('>H', 18)
+        data += _counted(b'k' * 32)
+        data += struct.pack('>IIII', 1000, 1000, endtime, renew_till)
+        data += struct.pack('>BI', 0, 0x40e10000)
+        data += struct.pack('>I', 1) + struct.pack('>H', 2) + _counted(b'\x0a\x00\x00\x05')
+        data += struct.pack('>I', 0)
+        data += _counted(b'ticket') + _counted(b'')
+    return data
+
+
+TGT = ((REALM, ['krbtgt', REALM]), 5000, 9000)
+
+
 class MachineKinitTestCase(unittest.TestCase):
 
     @patch('gpoa_lib.util.kerberos.check_krb_ticket', return_value=True)
@@ -118,6 +162,104 @@ class MachineKdestroyTestCase(unittest.TestCase):
         mock_os.unlink.assert_called_with('/tmp/krb5cc_env')
 
 
+class CcacheTgtTestCase(unittest.TestCase):
+
+    def _read(self, data):
+        from gpoa_lib.util.kerberos import read_ccache_tgt
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            return read_ccache_tgt(f.name)
+
+    def test_tgt_of_default_principal(self):
+        expected = {'client': MACHINE, 'endtime': 5000, 'renew_till': 9000}
+        credentials = [
+            (('X-CACHECONF:', ['krb5_ccache_conf_data', 'pa_type']), 0, 0),
+            ((REALM, ['cifs', 'dc1.domain.test']), 7000, 9000),
+            TGT,
+        ]
+        self.assertEqual(self._read(make_ccache(credentials)), expected)
+        self.assertEqual(self._read(make_ccache(credentials, version=3)), expected)
+
+    def test_no_tgt(self):
+        self.assertIsNone(self._read(make_ccache([])))
+        self.assertIsNone(self._read(make_ccache([TGT])[:-3]))
+        self.assertIsNone(self._read(b'\x05\x01'))
+        from gpoa_lib.util.kerberos import read_ccache_tgt
+        self.assertIsNone(read_ccache_tgt('/nonexistent/krb5cc'))
+
+
+class AcquireMachineCcacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self._tmp.name, 'krb5cc_machine')
+        self.commands = []
+        self.kinit_tgt = ((REALM, ['krbtgt', REALM]), 50000, 90000)
+        for patcher in (
+                patch('gpoa_lib.util.kerberos.MACHINE_CCACHE_DIR', self._tmp.name),
+                patch('gpoa_lib.util.kerberos._machine_kinit_cmd',
+                      return_value=(MACHINE, ['kinit', '-k', MACHINE])),
+                patch('gpoa_lib.util.kerberos.check_krb_ticket', return_value=True),
+                patch('gpoa_lib.util.kerberos.log'),
+                patch('gpoa_lib.util.kerberos.subprocess.Popen', side_effect=self._popen),
+                patch.dict(os.environ)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _popen(self, cmd):
+        self.commands.append(cmd[:-2])
+        with open(cmd[-1], 'wb') as f:
+            f.write(make_ccache([self.kinit_tgt]))
+        proc = MagicMock()
+        proc.returncode = 0
+        proc.__enter__.return_value = proc
+        return proc
+
+    def _acquire(self, now):
+        from gpoa_lib.util.kerberos import acquire_machine_ccache
+        return acquire_machine_ccache(now=now)
+
+    def test_ticket_is_reused_until_expiry(self):
+        self.assertTrue(self._acquire(now=1000))
+        self.assertTrue(self._acquire(now=2000))
+        self.assertEqual(self.commands, [['kinit', '-k', MACHINE]])
+        self.assertEqual(os.environ['KRB5CCNAME'], 'FILE:' + self.cache)
+        # Close to expiry the ticket is renewed
+        self.assertTrue(self._acquire(now=49500))
+        self.assertEqual(self.commands[-1], ['kinit', '-R'])
+        # Past the renewal limit a new ticket is requested
+        self.assertTrue(self._acquire(now=89500))
+        self.assertEqual(self.commands[-1], ['kinit', '-k', MACHINE])
+        self.assertEqual(sorted(os.listdir(self._tmp.name)),
+                         ['krb5cc_machine', 'krb5cc_machine.lock'])
+
+    def test_foreign_cache_is_replaced(self):
+        with open(self.cache, 'wb') as f:
+            f.write(make_ccache([TGT]).replace(b'HOST$', b'USER$'))
+        self.assertTrue(self._acquire(now=1000))
+        self.assertEqual(self.commands, [['kinit', '-k', MACHINE]])
+
+    def test_failed_kinit_keeps_cache(self):
+        with open(self.cache, 'wb') as f:
+            f.write(make_ccache([TGT]))
+
+        def failing_popen(cmd):
+            proc = self._popen(cmd)
+            proc.returncode = 1
+            return proc
+
+        with patch('gpoa_lib.util.kerberos.subprocess.Popen', side_effect=failing_popen):
+            self.assertFalse(self._acquire(now=4500))
+        with open(self.cache, 'rb') as f:
+            self.assertEqual(f.read(), make_ccache([TGT]))
+        self.assertEqual(sorted(os.listdir(self._tmp.name)),
+                         ['krb5cc_machine', 'krb5cc_machine.lock'])
+
+
 class CheckKrbTicketTestCase(unittest.TestCase):
 
     @patch('gpoa_lib.util.kerberos.subprocess')
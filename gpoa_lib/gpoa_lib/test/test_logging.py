@@ -0,0 +1,55 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import unittest
+
+from gpoa_lib.util.logging import log, log_watch
+
+
+class LogWatchTestCase(unittest.TestCase):
+    def test_counts_warnings_and_errors(self):
+        with log_watch() as watch:
+            log('D1')
+            log('I1')
+            self.assertEqual(watch.problems, 0)
+            log('W1')
+            log('E1')
+            log('W', {'message': 'plugin warning', 'plugin': 'test'})
+        self.assertEqual(watch.problems, 3)
+
+    def test_nested(self):
+        with log_watch() as outer:
+            log('W1')
+            with log_watch() as inner:
+                log('E1')
+        self.assertEqual(inner.problems, 1)
+        self.assertEqual(outer.problems, 2)
+        log('E1')
+        self.assertEqual(outer.problems, 2)
+
+    def test_other_threads_are_not_counted(self):
+        with log_watch() as watch:
+            thread = threading.Thread(target=log, args=('E1',))
+            thread.start()
+            thread.join()
+        self.assertEqual(watch.problems, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pathlib
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from gpoa_lib.storage.dconf_registry import Dconf_registry
+from gpoa_lib.storage.policy_digest import (
+    ApplierDigests,
+    compute_entries_digest,
+    compute_policy_digest,
+    find_volatile_filters,
+    load_policy_digest,
+    policy_rerun_due,
+    save_policy_digest,
+)
+
+
+class ComputePolicyDigestTestCase(unittest.TestCase):
+
+    def test_order_and_previous_are_ignored(self):
+        first = {'Software/A': (('k', "'1'"), ('j', "'2'")),
+                 'Previous/Software/A': (('k', "'0'"),)}
+        second = {'Previous/Software/A': (('k', "'9'"),),
+                  'Software/A': (('j', "'2'"), ('k', "'1'"))}
+        self.assertEqual(compute_policy_digest(first), compute_policy_digest(second))
+
+    def test_values_and_context_change_digest(self):
+        snapshot = {'Software/A': (('k', "'1'"),)}
+        digest = compute_policy_digest(snapshot, ('machine',))
+        self.assertNotEqual(digest, compute_policy_digest({'Software/A': (('k', "'2'"),)},
+                                                          ('machine',)))
+        self.assertNotEqual(digest, compute_policy_digest(snapshot, ('user', 'u', 1)))
+
+
+class ComputeEntriesDigestTestCase(unittest.TestCase):
+
+    def test_order_is_ignored(self):
+        self.assertEqual(compute_entries_digest([('a/k', '1'), ('b/k', 2)]),
+                         compute_entries_digest([('b/k', 2), ('a/k', '1')]))
+        self.assertNotEqual(compute_entries_digest([('b/k', 2)]),
+                            compute_entries_digest([('b/k', '2')]))
+
+
+class FindVolatileFiltersTestCase(unittest.TestCase):
+
+    def test_stable_and_volatile(self):
+        objects = [
+            SimpleNamespace(filters=[SimpleNamespace(filter_type='FilterComputer')]),
+            SimpleNamespace(filters=[SimpleNamespace(filter_type='FilterDate'),
+                                     SimpleNamespace(filter_type='FilterRunOnce')]),
+            SimpleNamespace(filters=None),
+            SimpleNamespace(),
+        ]
+        self.assertEqual(find_volatile_filters(objects), ['FilterDate'])
+        self.assertEqual(find_volatile_filters(objects[:1]), [])
+
+
+class PolicyDigestStorageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch('gpoa_lib.storage.policy_digest.policy_state_dir',
+                        return_value=pathlib.Path(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_round_trip_and_removal(self):
+        self.assertIsNone(load_policy_digest('machine'))
+        save_policy_digest('machine', 'abc', ['laps_applier'], {'systemd': 1000})
+        self.assertEqual(load_policy_digest('machine'), {
+            'digest': 'abc', 'always_run': ['laps_applier'], 'reassert': {'systemd': 1000}})
+        save_policy_digest('machine', None)
+        save_policy_digest('machine', None)
+        self.assertIsNone(load_policy_digest('machine'))
+
+    def test_rerun_due(self):
+        record = {'digest': 'abc', 'always_run': [], 'reassert': {'systemd': 1000, 'ntp': 3000}}
+        self.assertEqual(policy_rerun_due(record, 3600, now=2000), [])
+        self.assertEqual(policy_rerun_due(record, 3600, now=5000), ['systemd'])
+        self.assertEqual(policy_rerun_due(record, 0, now=9000), [])
+        record['always_run'] = ['laps_applier']
+        self.assertEqual(policy_rerun_due(record, 0, now=2000), ['laps_applier'])
+
+
+class ApplierDigestsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch('gpoa_lib.storage.policy_digest.policy_state_dir',
+                        return_value=pathlib.Path(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_changed_after_save(self):
+        digests = ApplierDigests('machine')
+        self.assertTrue(digests.changed('kde', 'abc'))
+        digests.update('kde', 'abc')
+        self.assertTrue(digests.save())
+        digests = ApplierDigests('machine')
+        self.assertFalse(digests.changed('kde', 'abc'))
+        self.assertTrue(digests.changed('kde', 'def'))
+        self.assertTrue(digests.changed('kde', None))
+        digests.discard('kde')
+        self.assertTrue(digests.changed('kde', 'abc'))
+
+    def test_reassert_interval(self):
+        digests = ApplierDigests('machine')
+        digests.update('systemd', 'abc', now=1000)
+        digests.update('kde', 'abc', now=1000)
+        self.assertFalse(digests.changed('systemd', 'abc', 3600, now=2000))
+        self.assertTrue(digests.changed('systemd', 'abc', 3600, now=5000))
+        self.assertFalse(digests.changed('systemd', 'abc', 0, now=5000))
+        self.assertEqual(digests.last_run('systemd'), 1000)
+        self.assertIsNone(digests.last_run('ntp'))
+
+    def test_unwritable_state_dir(self):
+        with patch('gpoa_lib.storage.policy_digest.policy_state_dir',
+                   side_effect=PermissionError()):
+            digests = ApplierDigests('1000')
+            self.assertFalse(digests.save())
+            self.assertFalse(save_policy_digest('1000', 'abc'))
+
+
+class DconfRegistryPolicyDigestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        Dconf_registry.wipe_hklm()
+        self.addCleanup(Dconf_registry.wipe_hklm)
+        self.addCleanup(setattr, Dconf_registry, 'files', [])
+
+    def test_volatile_filters_disable_digest(self):
+        Dconf_registry.files = [SimpleNamespace(filters=[SimpleNamespace(filter_type='FilterTime')])]
+        self.assertIsNone(Dconf_registry.policy_digest('root', True))
+
+    def test_digest_follows_registry(self):
+        Dconf_registry.files = []
+        with patch('gpoa_lib.storage.dconf_registry.add_preferences_to_global_registry_dict'):
+            Dconf_registry.global_registry_dict['Software/A'] = {'k': '1'}
+            first = Dconf_registry.policy_digest('root', True)
+            self.assertEqual(first, Dconf_registry.policy_digest('root', True))
+            Dconf_registry.global_registry_dict['Software/A'] = {'k': '2'}
+            self.assertNotEqual(first, Dconf_registry.policy_digest('root', True))
+
+
+CONTROL = ('Software/BaseALT/Policies/Control',)
+KDE = ('Software/BaseALT/Policies/KDE/', 'Software/BaseALT/Policies/KDELocks/')
+
+
+class DconfRegistryApplierDigestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        Dconf_registry.wipe_hklm()
+        self.addCleanup(Dconf_registry.wipe_hklm)
+        self.addCleanup(setattr, Dconf_registry, 'files', [])
+        Dconf_registry.files = []
+        Dconf_registry.global_registry_dict['Software/BaseALT/Policies/Control'] = {'a': '1'}
+        Dconf_registry.global_registry_dict['Software/BaseALT/Policies/KDE/kdeglobals'] = {'b': '2'}
+
+    def digest(self, name, branches=(), preferences=()):
+        return Dconf_registry.applier_digest(name, 'root', True, branches, preferences)
+
+    def test_only_own_branch_changes_digest(self):
+        control = self.digest('control', CONTROL)
+        kde = self.digest('kde', KDE)
+        Dconf_registry.global_registry_dict['Software/BaseALT/Policies/KDE/kdeglobals'] = {'b': '3'}
+        self.assertEqual(control, self.digest('control', CONTROL))
+        self.assertNotEqual(kde, self.digest('kde', KDE))
+
+    def test_backslash_branches(self):
+        kde = self.digest('kde', KDE)
+        self.assertEqual(kde, self.digest('kde', ('Software\\BaseALT\\Policies\\KDE\\',
+                                                   'Software\\BaseALT\\Policies\\KDELocks')))
+
+    def test_previous_and_switches_are_inputs(self):
+        control = self.digest('control', CONTROL)
+        Dconf_registry.global_registry_dict['Previous/Software/BaseALT/Policies/Control'] = {'a': '0'}
+        previous = self.digest('control', CONTROL)
+        self.assertNotEqual(control, previous)
+        Dconf_registry.global_registry_dict['Software/BaseALT/Policies/GPUpdate'] = {'control': '0'}
+        self.assertNotEqual(previous, self.digest('control', CONTROL))
+
+    def test_preferences(self):
+        files = self.digest('files', preferences=('Files',))
+        Dconf_registry.global_registry_dict['Software/BaseALT/Policies/Preferences/Machine'] = {
+            'Files': "[{'fromPath': 'x'}]", 'Folders': '[]'}
+        self.assertNotEqual(files, self.digest('files', preferences=('Files',)))
+        Dconf_registry.files = [SimpleNamespace(filters=[SimpleNamespace(filter_type='FilterFile')])]
+        self.assertIsNone(self.digest('files', preferences=('Files',)))
+
+    def test_applier_without_inputs_always_runs(self):
+        self.assertIsNone(self.digest('laps_applier'))
+
+
+if __name__ == '__main__':
+    unittest.main()
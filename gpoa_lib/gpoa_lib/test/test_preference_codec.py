@@ -0,0 +1,100 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from unittest.mock import patch
+
+from gpoa_lib.storage.dconf_compile import parse_value
+from gpoa_lib.storage.dconf_registry import (
+    Dconf_registry,
+    add_preferences_to_global_registry_dict,
+)
+from gpoa_lib.storage.gpp_state import get_previous_elements
+from gpoa_lib.storage.preference_codec import (
+    PREFERENCES_FORMAT_PREFIX,
+    decode_preferences,
+    encode_preferences,
+)
+from gpoa_lib.util.ini_writer import format_ini_value
+from gpoa_lib.util.util import add_prefix_to_keys, clean_data
+
+
+_ELEMENTS = [
+    {'uid': '{A}', 'path': 'C:\\Users\\"quoted"\\it\'s', 'text': 'line\nbreak\ttab',
+     'name': 'файл ☃ \ud800', 'port': 5, 'remove_policy': True, 'filters': None},
+    {'uid': '{B}', 'filters': [{'filter_type': 'FilterComputer', 'name': 'host'}]},
+]
+
+
+class PreferenceCodecTestCase(unittest.TestCase):
+
+    def test_round_trip(self):
+        encoded = encode_preferences(_ELEMENTS)
+        self.assertTrue(encoded.startswith(PREFERENCES_FORMAT_PREFIX))
+        self.assertEqual(decode_preferences(encoded), _ELEMENTS)
+
+    def test_survives_dconf_keyfile(self):
+        # Stored values pass clean_data() and the keyfile quoting on the
+        # way into the database, the encoding must not be affected
+        encoded = encode_preferences(_ELEMENTS)
+        self.assertEqual(clean_data(encoded), encoded)
+        self.assertEqual(parse_value(format_ini_value(encoded)), ('s', encoded))
+
+    def test_legacy_format(self):
+        legacy = clean_data(str([{'uid': '{A}', 'path': 'C:\\dir', 'applied': False}]))
+        self.assertEqual(decode_preferences(legacy),
+                         [{'uid': '{A}', 'path': 'C:\\\\dir', 'applied': False}])
+
+    def test_invalid_values(self):
+        for value in ('', None, 'gpp1:@@@', 'gpp1:' + 'AAAA', "{'a': 1}", 'not a list', 5):
+            self.assertEqual(decode_preferences(value), [], value)
+        self.assertEqual(decode_preferences([{'uid': '{A}'}]), [{'uid': '{A}'}])
+
+
+class StoredPreferencesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        Dconf_registry.wipe_hklm()
+        self.addCleanup(Dconf_registry.wipe_hklm)
+
+    def test_add_preferences_encodes_each_type(self):
+        with patch('gpoa_lib.storage.dconf_registry.remove_duplicate_dicts_in_list',
+                   side_effect=lambda elements: list(elements)):
+            Dconf_registry.files = list(_ELEMENTS)
+            self.addCleanup(setattr, Dconf_registry, 'files', [])
+            add_preferences_to_global_registry_dict('root', True)
+        section = Dconf_registry.global_registry_dict['Software/BaseALT/Policies/Preferences/Machine']
+        self.assertEqual(decode_preferences(section['Files']), _ELEMENTS)
+        self.assertEqual(decode_preferences(section['Folders']), [])
+
+    def test_previous_elements_of_both_formats(self):
+        patcher = patch.object(Dconf_registry, '_gpt_read_flag', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        Dconf_registry.global_registry_dict.update(add_prefix_to_keys({
+            'Software/BaseALT/Policies/Preferences/Machine': {
+                'Files': encode_preferences(_ELEMENTS),
+                'Folders': str([{'uid': '{F}'}]),
+            }}))
+        self.assertEqual(get_previous_elements('Files'), _ELEMENTS)
+        self.assertEqual(get_previous_elements('Folders'), [{'uid': '{F}'}])
+        self.assertEqual(get_previous_elements('Inifiles'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import unittest
+
+from gpoa_lib.storage.dconf_registry import (
+    Dconf_registry,
+    filter_dict_keys,
+    flatten_dictionary,
+    update_dict,
+)
+from gpoa_lib.storage.registry_index import RegistryDict, split_registry_path
+
+
+def _sample():
+    return {
+        'Software/BaseALT/Policies/Control': {'sshd-gssapi-auth': '1', 'writeable': '0'},
+        'Software/BaseALT/Policies/ControlExtra': {'x': '1'},
+        'Software/BaseALT/Policies/Packages/Install': {'vim': 'vim'},
+        'Software/BaseALT/Policies/Packages/Remove': {'nano': 'nano'},
+        'Software/Policies/Google/Chrome': {'HomepageLocation': 'https://example.org'},
+        'Software/BaseALT/Policies/GpoPriority': {},
+    }
+
+
+class SplitRegistryPathTestCase(unittest.TestCase):
+
+    def test_mixed_separators(self):
+        self.assertEqual(split_registry_path('Software\\BaseALT//Policies/'),
+                         ['Software', 'BaseALT', 'Policies'])
+
+
+class RegistryDictFilterTestCase(unittest.TestCase):
+
+    def test_matches_flatten_filter(self):
+        data = _sample()
+        registry = RegistryDict(data)
+        for prefix in ('Software/BaseALT/Policies/Control',
+                       'Software\\BaseALT\\Policies\\Packages',
+                       'Software/BaseALT/Policies/Packages/Install/vim',
+                       'Software/Policies',
+                       'Software/Nonexistent'):
+            self.assertEqual(registry.filter(prefix),
+                             filter_dict_keys(prefix, flatten_dictionary(data)))
+
+    def test_segment_boundary(self):
+        registry = RegistryDict(_sample())
+        result = registry.filter('Software/BaseALT/Policies/Control')
+        self.assertNotIn('Software/BaseALT/Policies/ControlExtra/x', result)
+
+    def test_case_insensitive(self):
+        registry = RegistryDict(_sample())
+        result = registry.filter('SOFTWARE\\POLICIES\\google\\chrome')
+        self.assertEqual(list(result), ['Software/Policies/Google/Chrome/HomepageLocation'])
+
+    def test_insertion_order(self):
+        registry = RegistryDict()
+        registry['Software/B'] = {'k': 1}
+        registry['Software/A'] = {'k': 2}
+        self.assertEqual(list(registry.filter('Software')), ['Software/B/k', 'Software/A/k'])
+
+    def test_update_dict_keeps_index(self):
+        registry = RegistryDict(_sample())
+        update_dict(registry, {'Software/BaseALT/Policies/Control': {'new': '1'},
+                               'Software/BaseALT/Policies/Added': {'a': 'b'}})
+        self.assertIn('Software/BaseALT/Policies/Control/new',
+                      registry.filter('Software/BaseALT/Policies/Control'))
+        self.assertEqual(registry.filter('Software/BaseALT/Policies/Added'),
+                         {'Software/BaseALT/Policies/Added/a': 'b'})
+
+    def test_removal_keeps_index(self):
+        registry = RegistryDict(_sample())
+        del registry['Software/BaseALT/Policies/Control']
+        registry.pop('Software/BaseALT/Policies/ControlExtra')
+        self.assertEqual(registry.filter('Software/BaseALT/Policies/Control'), {})
+
+    def test_deepcopy(self):
+        registry = copy.deepcopy(RegistryDict(_sample()))
+        registry['Software/New'] = {'k': 'v'}
+        self.assertEqual(registry.filter('software/new'), {'Software/New/k': 'v'})
+
+    def test_lookup(self):
+        registry = RegistryDict(_sample())
+        self.assertEqual(registry.lookup('Software\\BaseALT\\Policies\\Control\\writeable'),
+                         (True, 'Software/BaseALT/Policies/Control', 'writeable', '0'))
+        self.assertFalse(registry.lookup('Software/BaseALT/Policies/Control/none')[0])
+
+
+class DconfRegistryIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        Dconf_registry.wipe_hklm()
+
+    def tearDown(self):
+        Dconf_registry.wipe_hklm()
+
+    def test_global_registry_is_indexed(self):
+        self.assertIsInstance(Dconf_registry.global_registry_dict, RegistryDict)
+        update_dict(Dconf_registry.global_registry_dict, _sample())
+        result = Dconf_registry.filter_entries('Software\\BaseALT\\Policies\\Packages\\%')
+        self.assertEqual(set(result), {'Software/BaseALT/Policies/Packages/Install/vim',
+                                       'Software/BaseALT/Policies/Packages/Remove/nano'})
+
+
+if __name__ == '__main__':
+    unittest.main()
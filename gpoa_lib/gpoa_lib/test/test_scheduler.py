@@ -0,0 +1,139 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+import time
+import unittest
+
+from gpoa_lib.util.scheduler import dependency_graph, resources_conflict, run_tasks
+
+
+class ResourcesConflictTestCase(unittest.TestCase):
+    def test_paths_cover_their_subtree(self):
+        self.assertTrue(resources_conflict(((), ('file:/etc',)), ((), ('file:/etc/polkit-1',))))
+        self.assertTrue(resources_conflict(((), ('file:/',)), ((), ('file:/usr/share',))))
+        self.assertFalse(resources_conflict(((), ('file:/etc/firefox',)),
+                                            ((), ('file:/etc/firefox-esr',))))
+
+    def test_reads_only_conflict_with_writes(self):
+        self.assertFalse(resources_conflict((('dconf',), ()), (('dconf',), ())))
+        self.assertTrue(resources_conflict((('dconf',), ()), ((), ('dconf',))))
+        self.assertTrue(resources_conflict(((), ('dconf',)), (('dconf',), ())))
+        self.assertFalse(resources_conflict(((), ('systemd',)), ((), ('cups',))))
+
+    def test_undeclared_writes_conflict_with_everything(self):
+        self.assertTrue(resources_conflict(((), None), ((), ())))
+        self.assertTrue(resources_conflict(((), ()), ((), None)))
+
+
+class DependencyGraphTestCase(unittest.TestCase):
+    def test_graph(self):
+        graph = dependency_graph([
+            ('control', (), ('control', 'file:/etc')),
+            ('systemd', (), ('systemd',)),
+            ('polkit', (), ('file:/etc/polkit-1',)),
+            ('laps', (), None),
+            ('cups', (), ('cups',)),
+            ('ntp', (), ('control', 'systemd')),
+        ])
+        self.assertEqual(graph, {
+            'control': set(),
+            'systemd': set(),
+            'polkit': {'control'},
+            'laps': {'control', 'systemd', 'polkit'},
+            'cups': {'laps'},
+            'ntp': {'control', 'systemd', 'laps'},
+        })
+
+
+class RunTasksTestCase(unittest.TestCase):
+    TASKS = [
+        ('a', (), ('x',)),
+        ('b', (), ('y',)),
+        ('c', (), ('x',)),
+        ('d', (), ('z',)),
+    ]
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = set()
+        self.overlaps = []
+        self.started = []
+
+    def _task(self, name):
+        with self.lock:
+            self.started.append(name)
+            self.overlaps.append((name, set(self.active)))
+            self.active.add(name)
+        time.sleep(0.05)
+        with self.lock:
+            self.active.remove(name)
+
+    def test_independent_tasks_overlap(self):
+        start = time.monotonic()
+        self.assertEqual(run_tasks(self.TASKS, self._task, workers=4), {})
+        # a and c write the same resource, the rest runs at once
+        self.assertLess(time.monotonic() - start, 0.18)
+        self.assertLess(self.started.index('a'), self.started.index('c'))
+        overlaps = dict(self.overlaps)
+        self.assertNotIn('a', overlaps['c'])
+        self.assertTrue(any(overlaps[name] for name in 'bcd'))
+
+    def test_one_worker_keeps_order(self):
+        run_tasks(self.TASKS, self._task, workers=1)
+        self.assertEqual(self.started, ['a', 'b', 'c', 'd'])
+        self.assertTrue(all(not active for _, active in self.overlaps))
+
+    def test_errors_are_isolated(self):
+        def task(name):
+            if name == 'b':
+                raise RuntimeError('broken')
+            self._task(name)
+
+        errors = run_tasks(self.TASKS, task, workers=4)
+        self.assertEqual(list(errors), ['b'])
+        self.assertEqual(sorted(self.started), ['a', 'c', 'd'])
+
+    def test_logs_follow_task_order(self):
+        messages = []
+
+        class Collector(logging.Handler):
+            def emit(self, record):
+                messages.append(record.getMessage())
+
+        def task(name):
+            delay = {'a': 0.06, 'b': 0.0, 'c': 0.0, 'd': 0.03}[name]
+            logging.warning('%s start', name)
+            time.sleep(delay)
+            logging.warning('%s end', name)
+
+        logger = logging.getLogger()
+        handler = Collector()
+        logger.addHandler(handler)
+        try:
+            run_tasks(self.TASKS, task, workers=4)
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual(messages, ['a start', 'a end', 'b start', 'b end',
+                                    'c start', 'c end', 'd start', 'd end'])
+        self.assertEqual(logger.filters, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from gpoa_lib.util.serve import EXIT_REJECTED, GpoaServer, systemd_listen_socket
+
+
+class GpoaServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self._tmp.name, 'run', 'gpoa.sock')
+        self.requests = []
+        patcher = patch('gpoa_lib.util.serve.peer_uid', return_value=0)
+        self.peer_uid = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _handler(self, argv):
+        self.requests.append(argv)
+        if argv == ['fail']:
+            raise RuntimeError('broken run')
+        if argv == ['exit']:
+            sys.exit(3)
+        print('user', argv[0])
+        logger = logging.getLogger()
+        logger.handlers = [logging.StreamHandler()]
+        logger.setLevel(logging.DEBUG)
+        logging.debug('debug output')
+        return 0
+
+    def _serve(self, count):
+        server = GpoaServer(self._handler, self.socket_path)
+        sock = server.listen()
+        thread = threading.Thread(target=server.serve, args=(sock, count))
+        thread.start()
+        self.addCleanup(thread.join)
+        return server
+
+    def _request(self, payload):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(self.socket_path)
+            conn.sendall(payload)
+            with conn.makefile('rb') as replies:
+                return [json.loads(line) for line in replies]
+
+    def test_runs_share_process_but_not_logging(self):
+        logger = logging.getLogger()
+        handlers = list(logger.handlers)
+        self._serve(2)
+        for username in ('alice', 'bob'):
+            replies = self._request(json.dumps({'argv': [username]}).encode() + b'\n')
+            self.assertEqual(''.join(reply.get('stdout', '') for reply in replies),
+                             'user {}\n'.format(username))
+            self.assertIn({'stderr': 'debug output\n'}, replies)
+            self.assertEqual(replies[-1], {'exitcode': 0})
+        self.assertEqual(self.requests, [['alice'], ['bob']])
+        self.assertEqual(logger.handlers, handlers)
+        # The socket created by the server is removed when it stops
+        self.doCleanups()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_failed_runs(self):
+        self._serve(2)
+        self.assertEqual(self._request(b'{"argv": ["fail"]}\n'), [{'exitcode': 1}])
+        self.assertEqual(self._request(b'{"argv": ["exit"]}\n'), [{'exitcode': 3}])
+
+    def test_rejected_requests(self):
+        self._serve(3)
+        self.assertEqual(self._request(b'{"argv": "user"}\n'), [{'exitcode': EXIT_REJECTED}])
+        self.assertEqual(self._request(b'not json\n'), [{'exitcode': EXIT_REJECTED}])
+        self.peer_uid.return_value = 1000
+        self.assertEqual(self._request(b'{"argv": ["user"]}\n'), [{'exitcode': EXIT_REJECTED}])
+        self.assertEqual(self.requests, [])
+
+    def test_socket_activation(self):
+        with patch.dict(os.environ, {'LISTEN_PID': '1', 'LISTEN_FDS': '1'}):
+            self.assertIsNone(systemd_listen_socket())
+        with patch.dict(os.environ, {'LISTEN_PID': str(os.getpid()), 'LISTEN_FDS': '0'}):
+            self.assertIsNone(systemd_listen_socket())
+            self.assertNotIn('LISTEN_PID', os.environ)
+
+
+if __name__ == '__main__':
+    unittest.main()
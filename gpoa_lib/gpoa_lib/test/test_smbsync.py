@@ -0,0 +1,170 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+
+import smbc
+
+from gpoa_lib.util.smbsync import SmbTreeSync, parse_gpt_version
+
+
+class FakeServer:
+    '''
+    Files of an SMB share as {url: (bytes, mtime)} with call counters.
+    '''
+    def __init__(self, files):
+        self.files = dict(files)
+        self.calls = {'opendir': 0, 'stat': 0, 'open': 0}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] += 1
+
+    def context(self):
+        return FakeContext(self)
+
+
+class FakeContext:
+    def __init__(self, server):
+        self.server = server
+
+    def opendir(self, url):
+        self.server.count('opendir')
+        prefix = url.rstrip('/') + '/'
+        entries = {}
+        for path in self.server.files:
+            if path.startswith(prefix):
+                name, _, rest = path[len(prefix):].partition('/')
+                entries[name] = smbc.DIR if rest else smbc.FILE
+        if not entries:
+            raise OSError('No such directory: {}'.format(url))
+        dirents = [SimpleNamespace(name=name, smbc_type=smbc_type)
+                   for name, smbc_type in entries.items()]
+        return SimpleNamespace(getdents=lambda: dirents)
+
+    def stat(self, url):
+        self.server.count('stat')
+        data, mtime = self.server.files[url]
+        return (0o100644, 0, 0, 1, 0, 0, len(data), mtime, mtime, mtime)
+
+    def open(self, url, flags):
+        self.server.count('open')
+        return io.BytesIO(self.server.files[url][0])
+
+
+ROOT = 'smb://ipa.test/sysvol/ipa.test/policies/{a}'
+
+
+def gpt_files(version, registry=b'pol'):
+    return {
+        ROOT + '/GPT.INI': ('[General]\r\nVersion={}\r\n'.format(version).encode(), 100 + version),
+        ROOT + '/Machine/Registry.pol': (registry, 200),
+        ROOT + '/User/Preferences/Files/Files.xml': (b'<Files/>', 300),
+    }
+
+
+class SmbTreeSyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.local = os.path.join(self._tmp.name, '{a}')
+        self.manifest = os.path.join(self._tmp.name, '.{a}.manifest')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _sync(self, server, workers=3):
+        syncer = SmbTreeSync(workers, context_factory=server.context)
+        return syncer.sync([(ROOT, self.local, self.manifest)])[0]
+
+    def _read(self, *names):
+        with open(os.path.join(self.local, *names), 'rb') as f:
+            return f.read()
+
+    def test_parse_gpt_version(self):
+        self.assertEqual(parse_gpt_version(b'[General]\r\nversion = 65538\r\n'), '65538')
+        self.assertEqual(parse_gpt_version('[General]\r\nVersion=7\r\n'.encode('utf-16')), '7')
+        self.assertIsNone(parse_gpt_version(b'[General]\r\n'))
+
+    def test_initial_and_cached_sync(self):
+        server = FakeServer(gpt_files(1))
+        result = self._sync(server)
+        self.assertEqual((result['fetched'], result['cached']), (3, False))
+        self.assertEqual(self._read('Machine', 'Registry.pol'), b'pol')
+        self.assertEqual(self._read('User', 'Preferences', 'Files', 'Files.xml'), b'<Files/>')
+
+        # Same GPT.INI version: only the root listing and GPT.INI are read
+        server.calls = dict.fromkeys(server.calls, 0)
+        result = self._sync(server)
+        self.assertTrue(result['cached'])
+        self.assertEqual(server.calls, {'opendir': 1, 'stat': 0, 'open': 1})
+
+    def test_only_changed_files_are_fetched(self):
+        self._sync(FakeServer(gpt_files(1)))
+        files = gpt_files(2, registry=b'new pol')
+        files[ROOT + '/Machine/Registry.pol'] = (b'new pol', 250)
+        del files[ROOT + '/User/Preferences/Files/Files.xml']
+        server = FakeServer(files)
+        result = self._sync(server)
+        # GPT.INI and Registry.pol changed, Files.xml is gone
+        self.assertEqual((result['fetched'], result['kept'], result['removed']), (2, 0, 1))
+        self.assertEqual(self._read('Machine', 'Registry.pol'), b'new pol')
+        self.assertFalse(os.path.exists(os.path.join(self.local, 'User')))
+
+    def test_missing_local_file_is_fetched_again(self):
+        self._sync(FakeServer(gpt_files(1)))
+        os.unlink(os.path.join(self.local, 'Machine', 'Registry.pol'))
+        result = self._sync(FakeServer(gpt_files(1)))
+        self.assertFalse(result['cached'])
+        self.assertEqual((result['fetched'], result['kept']), (1, 2))
+        self.assertEqual(self._read('Machine', 'Registry.pol'), b'pol')
+
+    def test_failed_file_keeps_version_unconfirmed(self):
+        server = FakeServer(gpt_files(1))
+        original_open = FakeContext.open
+
+        def failing_open(context, url, flags):
+            if url.endswith('Registry.pol'):
+                raise OSError('Access denied')
+            return original_open(context, url, flags)
+
+        FakeContext.open = failing_open
+        try:
+            result = self._sync(server)
+        finally:
+            FakeContext.open = original_open
+        self.assertEqual((result['fetched'], result['failed']), (2, 1))
+        # The next run does not trust the version and fetches the file
+        result = self._sync(server)
+        self.assertFalse(result['cached'])
+        self.assertEqual((result['fetched'], result['kept']), (1, 2))
+
+    def test_unreachable_tree_keeps_local_copy(self):
+        self._sync(FakeServer(gpt_files(1)))
+        result = self._sync(FakeServer({}))
+        self.assertEqual(result['removed'], 0)
+        self.assertEqual(self._read('Machine', 'Registry.pol'), b'pol')
+
+
+if __name__ == '__main__':
+    unittest.main()
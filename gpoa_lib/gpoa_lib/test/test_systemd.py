@@ -21,6 +21,8 @@ from unittest.mock import MagicMock, patch, call
 
 import dbus as _real_dbus
 
+from gpoa_lib.frontend.appliers.systemd import systemd_manager
+
 
 class SystemdUnitInitTestCase(unittest.TestCase):
 
@@ -146,3 +148,133 @@ class SystemdUnitRestartTestCase(unittest.TestCase):
         unit.restart()
 
         manager.RestartUnit.assert_called_once_with('test.service', 'replace')
+
+
+class FakeSystemd:
+    '''
+    systemd manager object with unit file and active states of units,
+    counting the calls made to it. Jobs finish after one ListJobs call.
+    '''
+    def __init__(self, file_states, active_states):
+        self.file_states = dict(file_states)
+        self.active_states = dict(active_states)
+        self.calls = []
+        self.jobs = {}
+        self.broken = set()
+
+    def get_object(self, bus_name, object_path):
+        return self
+
+    def get_dbus_method(self, member, dbus_interface=None):
+        def method(*args):
+            self.calls.append((member,) + tuple(args))
+            return getattr(self, member)(*args)
+        return method
+
+    def count(self, member):
+        return len([c for c in self.calls if c[0] == member])
+
+    def _check(self, names):
+        for name in names:
+            if name in self.broken:
+                raise _real_dbus.DBusException('Unit file {} does not exist.'.format(name))
+
+    def ListUnitFiles(self):
+        return [('/lib/systemd/system/' + name, state) for name, state in self.file_states.items()]
+
+    def ListUnits(self):
+        return [(name, '', 'loaded', state, '', '', '', 0, '', '/')
+                for name, state in self.active_states.items()]
+
+    def UnmaskUnitFiles(self, names, runtime):
+        self._check(names)
+        self.file_states.update(dict.fromkeys(names, 'disabled'))
+
+    def EnableUnitFiles(self, names, runtime, force):
+        self._check(names)
+        self.file_states.update(dict.fromkeys(names, 'enabled'))
+
+    def DisableUnitFiles(self, names, runtime):
+        self._check(names)
+        self.file_states.update(dict.fromkeys(names, 'disabled'))
+
+    def MaskUnitFiles(self, names, runtime, force):
+        self._check(names)
+        self.file_states.update(dict.fromkeys(names, 'masked'))
+
+    def Reload(self):
+        pass
+
+    def _job(self, name, state):
+        path = '/org/freedesktop/systemd1/job/{}'.format(len(self.jobs) + 1)
+        self.jobs[path] = (name, state)
+        return path
+
+    def StartUnit(self, name, mode):
+        return self._job(name, 'active')
+
+    def StopUnit(self, name, mode):
+        return self._job(name, 'inactive')
+
+    def ListJobs(self):
+        jobs = [(0, name, '', 'running', path, '/') for path, (name, _) in self.jobs.items()]
+        for name, state in self.jobs.values():
+            self.active_states[name] = state
+        self.jobs = {}
+        return jobs
+
+
+class SystemdManagerTestCase(unittest.TestCase):
+
+    def _apply(self, systemd, units):
+        manager = systemd_manager(bus=systemd, poll_interval=0)
+        with patch('gpoa_lib.frontend.appliers.systemd.log'):
+            manager.apply(units)
+        return manager
+
+    def test_batch_on_one_reload(self):
+        systemd = FakeSystemd(
+            {'a.service': 'masked', 'b.service': 'disabled', 'c.service': 'enabled',
+             'd.service': 'enabled'},
+            {'c.service': 'active', 'd.service': 'active'})
+        manager = self._apply(systemd, {'a.service': 1, 'b.service': 1, 'c.service': 0,
+                                        'd.service': 1})
+
+        self.assertEqual(systemd.count('ListUnitFiles'), 1)
+        self.assertEqual(systemd.count('Reload'), 1)
+        self.assertIn(('UnmaskUnitFiles', ['a.service'], False), systemd.calls)
+        self.assertIn(('EnableUnitFiles', ['a.service', 'b.service'], False, True), systemd.calls)
+        self.assertIn(('MaskUnitFiles', ['c.service'], False, True), systemd.calls)
+        self.assertEqual(systemd.count('StartUnit'), 2)
+        self.assertEqual(systemd.count('StopUnit'), 1)
+        # All jobs are queued before they are waited for
+        first_wait = [c[0] for c in systemd.calls].index('ListJobs')
+        self.assertEqual(len([c for c in systemd.calls[:first_wait]
+                              if c[0] in ('StartUnit', 'StopUnit')]), 3)
+        self.assertEqual(systemd.active_states['c.service'], 'inactive')
+        self.assertEqual(manager.stats, {'changed': 3, 'unchanged': 1, 'failed': 0})
+
+    def test_unchanged_units_are_not_touched(self):
+        systemd = FakeSystemd({'a.service': 'enabled', 'b.service': 'masked'},
+                              {'a.service': 'active'})
+        manager = self._apply(systemd, {'a.service': 1, 'b.service': 0})
+
+        self.assertEqual([c[0] for c in systemd.calls], ['ListUnitFiles', 'ListUnits'])
+        self.assertEqual(manager.stats['unchanged'], 2)
+
+    def test_failing_unit_does_not_block_batch(self):
+        systemd = FakeSystemd({'a.service': 'disabled'}, {})
+        systemd.broken.add('missing.service')
+        manager = self._apply(systemd, {'a.service': 1, 'missing.service': 1})
+
+        self.assertEqual(systemd.file_states['a.service'], 'enabled')
+        self.assertEqual(systemd.active_states['a.service'], 'active')
+        self.assertNotIn(('StartUnit', 'missing.service', 'replace'), systemd.calls)
+        self.assertEqual(manager.stats, {'changed': 1, 'unchanged': 0, 'failed': 1})
+
+    def test_gpupdate_service_is_not_started(self):
+        systemd = FakeSystemd({'gpupdate.service': 'disabled'}, {})
+        self._apply(systemd, {'gpupdate.service': 1})
+
+        self.assertEqual(systemd.file_states['gpupdate.service'], 'enabled')
+        self.assertEqual(systemd.count('StartUnit'), 0)
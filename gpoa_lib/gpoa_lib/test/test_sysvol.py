@@ -0,0 +1,241 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from gpoa_lib.util.sysvol import (
+    FILE_ATTRIBUTE_DIRECTORY,
+    SysvolReplicator,
+    sysvol_relative_path,
+)
+
+
+class FakeDCError(Exception):
+    pass
+
+
+class FakeConn:
+    '''
+    SMB connection serving a dictionary tree of {name: bytes | dict}.
+    '''
+    def __init__(self, tree, delay=0):
+        self.tree = tree
+        self.delay = delay
+
+    def _node(self, path):
+        node = self.tree
+        for part in path.replace('\\', '/').split('/'):
+            if part:
+                node = node[part]
+        return node
+
+    def list(self, path):
+        time.sleep(self.delay)
+        return [{'name': name,
+                 'attrib': FILE_ATTRIBUTE_DIRECTORY if isinstance(node, dict) else 0x20}
+                for name, node in self._node(path).items()]
+
+    def loadfile(self, path):
+        return self._node(path)
+
+
+def make_gpo(guid):
+    return SimpleNamespace(name=guid,
+                           file_sys_path='\\\\domain.test\\SysVol\\domain.test\\Policies\\' + guid)
+
+
+def make_tree(guids, marker=b'data'):
+    policies = {}
+    for guid in guids:
+        policies[guid] = {
+            'GPT.INI': b'[General]\r\nVersion=1\r\n',
+            'Machine': {'Registry.pol': marker},
+        }
+    return {'domain.test': {'Policies': policies}}
+
+
+class SysvolReplicatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = self._tmp.name
+        self.connects = []
+        self._lock = threading.Lock()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _connect_factory(self, trees, failing=(), delay=0):
+        def connect(dc):
+            with self._lock:
+                self.connects.append(dc)
+            if dc in failing:
+                raise FakeDCError(dc)
+            return FakeConn(trees[dc], delay)
+        return connect
+
+    def _gpt_path(self, guid, *names):
+        return os.path.join(self.cache, 'DOMAIN.TEST', 'POLICIES', guid.upper(), *names)
+
+    def test_relative_path(self):
+        self.assertEqual(sysvol_relative_path('\\\\dom\\SysVol\\dom\\Policies\\{A}'),
+                         os.path.join('dom', 'Policies', '{A}'))
+        with self.assertRaises(OSError):
+            sysvol_relative_path('\\\\dom\\sysvol\\..\\etc')
+
+    def test_replicate_layout_and_session_reuse(self):
+        guids = ['{G%02d}' % number for number in range(12)]
+        gpos = [make_gpo(guid) for guid in guids]
+        gpos.append(SimpleNamespace(name='{CACHED}', file_sys_path=''))
+        connect = self._connect_factory({'dc1': make_tree(guids)}, delay=0.01)
+        replicator = SysvolReplicator(None, None, self.cache, workers=3,
+                                      connect=connect, dc_errors=(FakeDCError,))
+        replicator.replicate(gpos, ['dc1', 'pdc'])
+
+        for guid in guids:
+            with open(self._gpt_path(guid, 'MACHINE', 'REGISTRY.POL'), 'rb') as f:
+                self.assertEqual(f.read(), b'data')
+            self.assertTrue(os.path.isfile(self._gpt_path(guid, 'GPT.INI')))
+        self.assertFalse(os.path.exists(self._gpt_path('{CACHED}')))
+        # Sessions are handed from one GPO to the next
+        self.assertLessEqual(len(self.connects), 3)
+        # No temporary directories are left behind
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self._gpt_path(guids[0])))),
+                         sorted(guid.upper() for guid in guids))
+
+    def test_replace_existing_gpt(self):
+        stale = self._gpt_path('{A}', 'USER', 'STALE.XML')
+        os.makedirs(os.path.dirname(stale))
+        with open(stale, 'w'):
+            pass
+        connect = self._connect_factory({'dc1': make_tree(['{A}'], b'new')})
+        SysvolReplicator(None, None, self.cache, connect=connect,
+                         dc_errors=(FakeDCError,)).replicate([make_gpo('{A}')], ['dc1'])
+        self.assertFalse(os.path.exists(stale))
+        with open(self._gpt_path('{A}', 'MACHINE', 'REGISTRY.POL'), 'rb') as f:
+            self.assertEqual(f.read(), b'new')
+
+    def test_unchanged_gpt_is_kept(self):
+        connect = self._connect_factory({'dc1': make_tree(['{A}'])})
+        replicator = SysvolReplicator(None, None, self.cache, connect=connect,
+                                      dc_errors=(FakeDCError,))
+        replicator.replicate([make_gpo('{A}')], ['dc1'])
+        inode = os.stat(self._gpt_path('{A}')).st_ino
+        replicator.replicate([make_gpo('{A}')], ['dc1'])
+        self.assertEqual(os.stat(self._gpt_path('{A}')).st_ino, inode)
+        self.assertEqual(os.listdir(os.path.dirname(self._gpt_path('{A}'))), ['{A}'])
+
+    def test_concurrent_runs_share_the_cache(self):
+        # Two passes replicating the same GPOs, each with its own lock files
+        guids = ['{A}', '{B}']
+        errors = []
+
+        def run(marker):
+            connect = self._connect_factory({'dc1': make_tree(guids, marker)}, delay=0.005)
+            replicator = SysvolReplicator(None, None, self.cache, workers=2, connect=connect,
+                                          dc_errors=(FakeDCError,))
+            try:
+                for _ in range(5):
+                    replicator.replicate([make_gpo(guid) for guid in guids], ['dc1'])
+            except Exception as exc:
+                errors.append(exc)
+
+        rename = os.rename
+
+        def slow_rename(source, target):
+            # Widens the window between moving the old GPT away and
+            # moving the new one into place
+            time.sleep(0.005)
+            rename(source, target)
+
+        threads = [threading.Thread(target=run, args=(marker,)) for marker in (b'one', b'two')]
+        with patch('gpoa_lib.util.sysvol.os.rename', slow_rename):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        for guid in guids:
+            with open(self._gpt_path(guid, 'MACHINE', 'REGISTRY.POL'), 'rb') as f:
+                self.assertIn(f.read(), (b'one', b'two'))
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self._gpt_path('{A}')))), guids)
+
+    def test_fallback_per_gpo(self):
+        trees = {
+            # The site DC misses one GPO, e.g. because it did not replicate yet
+            'site': make_tree(['{A}'], b'site'),
+            'pdc': make_tree(['{A}', '{B}'], b'pdc'),
+        }
+
+        def connect(dc):
+            conn = FakeConn(trees[dc])
+            original_list = conn.list
+
+            def list_or_fail(path):
+                try:
+                    return original_list(path)
+                except KeyError as exc:
+                    raise FakeDCError(str(exc))
+            conn.list = list_or_fail
+            return conn
+
+        replicator = SysvolReplicator(None, None, self.cache, workers=2,
+                                      connect=connect, dc_errors=(FakeDCError,))
+        replicator.replicate([make_gpo('{A}'), make_gpo('{B}')], ['site', 'pdc'])
+        with open(self._gpt_path('{A}', 'MACHINE', 'REGISTRY.POL'), 'rb') as f:
+            self.assertEqual(f.read(), b'site')
+        with open(self._gpt_path('{B}', 'MACHINE', 'REGISTRY.POL'), 'rb') as f:
+            self.assertEqual(f.read(), b'pdc')
+
+    def test_all_servers_fail(self):
+        connect = self._connect_factory({}, failing=('dc1', 'pdc'))
+        replicator = SysvolReplicator(None, None, self.cache, connect=connect,
+                                      dc_errors=(FakeDCError,))
+        with self.assertRaises(FakeDCError):
+            replicator.replicate([make_gpo('{A}')], ['dc1', None, 'dc1', 'pdc'])
+        self.assertEqual(self.connects, ['dc1', 'pdc'])
+        self.assertEqual(os.listdir(self.cache), [])
+
+    def test_failed_download_keeps_cached_gpt(self):
+        cached = self._gpt_path('{A}', 'GPT.INI')
+        os.makedirs(os.path.dirname(cached))
+        with open(cached, 'w'):
+            pass
+
+        def connect(dc):
+            conn = FakeConn(make_tree(['{A}']))
+            def loadfile(path):
+                raise FakeDCError(path)
+            conn.loadfile = loadfile
+            return conn
+
+        replicator = SysvolReplicator(None, None, self.cache, connect=connect,
+                                      dc_errors=(FakeDCError,))
+        with self.assertRaises(FakeDCError):
+            replicator.replicate([make_gpo('{A}')], ['dc1'])
+        self.assertTrue(os.path.isfile(cached))
+        self.assertEqual(os.listdir(os.path.dirname(self._gpt_path('{A}'))), ['{A}'])
+
+
+if __name__ == '__main__':
+    unittest.main()
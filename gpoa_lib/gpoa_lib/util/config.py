@@ -73,6 +73,110 @@ class GPConfig:
         self.full_config['gpoa']['local-policy'] = template_name
         self.write_config()
 
+    def get_reassert_interval(self):
+        '''
+        Fetch the number of seconds after which appliers with external
+        side effects run again even if their inputs did not change.
+        Zero disables re-assertion.
+        '''
+        if 'gpoa' in self.full_config:
+            try:
+                return max(0, self.full_config['gpoa'].getint('reassert-interval', 86400))
+            except ValueError:
+                pass
+
+        return 86400
+
+    def get_parse_workers(self):
+        '''
+        Fetch the number of threads used to parse GPT files. One or
+        less parses them one after another.
+        '''
+        if 'gpoa' in self.full_config:
+            try:
+                return max(1, self.full_config['gpoa'].getint('parse-workers', 4))
+            except ValueError:
+                pass
+
+        return 4
+
+    def get_sysvol_workers(self):
+        '''
+        Fetch the number of threads that download GPOs from SYSVOL.
+        '''
+        if 'gpoa' in self.full_config:
+            try:
+                return max(1, self.full_config['gpoa'].getint('sysvol-workers', 4))
+            except ValueError:
+                pass
+
+        return 4
+
+    def get_dc_cache_ttl(self):
+        '''
+        Fetch the time in seconds the AD site and DC topology is cached
+        for. Zero disables the cache.
+        '''
+        if 'gpoa' in self.full_config:
+            try:
+                return max(0, self.full_config['gpoa'].getint('dc-cache-ttl', 86400))
+            except ValueError:
+                pass
+
+        return 86400
+
+    def get_dc_ranking_ttl(self):
+        '''
+        Fetch the time in seconds the latency ranking of the site DCs is
+        cached for. Zero ranks them on every run.
+        '''
+        if 'gpoa' in self.full_config:
+            try:
+                return max(0, self.full_config['gpoa'].getint('dc-ranking-ttl', 600))
+            except ValueError:
+                pass
+
+        return 600
+
+    def get_prefetch_workers(self):
+        '''
+        Fetch the number of threads that fetch files referenced by
+        policies into the file cache.
+        '''
+        if 'gpoa' in self.full_config:
+            try:
+                return max(1, self.full_config['gpoa'].getint('prefetch-workers', 4))
+            except ValueError:
+                pass
+
+        return 4
+
+    def get_applier_workers(self):
+        '''
+        Fetch the number of threads that run appliers which do not share
+        state. One runs the appliers one by one.
+        '''
+        if 'gpoa' in self.full_config:
+            try:
+                return max(1, self.full_config['gpoa'].getint('applier-workers', 4))
+            except ValueError:
+                pass
+
+        return 4
+
+    def get_parallel_passes(self):
+        '''
+        Fetch whether gpupdate runs the computer and user passes at the
+        same time.
+        '''
+        if 'gpoa' in self.full_config:
+            try:
+                return self.full_config['gpoa'].getboolean('parallel-passes', True)
+            except ValueError:
+                pass
+
+        return True
+
     def write_config(self):
         with open(self.__config_path, 'w') as config_file:
             self.full_config.write(config_file)
@@ -0,0 +1,243 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Cache of the AD site and DC topology found in LDAP.
+
+The site DCs, all DCs and the PDC emulator of the domain are kept in
+``/var/cache/gpupdate/dc-topology.json`` for a configurable time.  The
+entry also records the realm and the IP addresses of the host, and is
+ignored when either of them changed since the host may have moved to
+another site.
+
+Site DCs are ranked by the time an SMB2 NEGOTIATE exchange on their SMB
+port takes, measured for all of them at once, so that a DC which accepts
+connections but whose SMB server does not answer counts as unreachable.  Latencies change much faster
+than the topology, so the ranking is stored in the same entry with its
+own, short lifetime and measured again when it expired.
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import socket
+import struct
+import tempfile
+import time
+
+from .logging import log
+from .paths import cache_dir
+
+
+DC_TOPOLOGY_FORMAT = 1
+DC_PROBE_PORT = 445
+DC_PROBE_TIMEOUT = 2.0
+DC_PROBE_WORKERS = 8
+DC_RANKING_TTL = 600
+
+# SMB2 NEGOTIATE request offering the dialects 2.0.2 to 3.0.2 in a
+# NetBIOS session message
+_SMB2_MAGIC = b'\xfeSMB'
+_SMB2_DIALECTS = (0x0202, 0x0210, 0x0300, 0x0302)
+_SMB2_NEGOTIATE = (
+    _SMB2_MAGIC
+    + struct.pack('<HHIHHIIQII8x16x', 64, 0, 0, 0, 1, 0, 0, 0, 0xfeff, 0)
+    + struct.pack('<HHHHI16xQ', 36, len(_SMB2_DIALECTS), 1, 0, 0, 0)
+    + struct.pack('<{}H'.format(len(_SMB2_DIALECTS)), *_SMB2_DIALECTS)
+)
+_SMB2_NEGOTIATE_MESSAGE = struct.pack('>I', len(_SMB2_NEGOTIATE)) + _SMB2_NEGOTIATE
+
+
+def dc_topology_file():
+    return os.path.join(str(cache_dir()), 'dc-topology.json')
+
+
+def _recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('Connection closed by the server')
+        data += chunk
+    return data
+
+
+def probe_dc(dc, timeout=DC_PROBE_TIMEOUT):
+    '''
+    Return the seconds an SMB2 NEGOTIATE exchange with *dc* takes or
+    None if it is unreachable or its SMB server does not answer within
+    *timeout* seconds.
+    '''
+    start = time.monotonic()
+    try:
+        with socket.create_connection((dc, DC_PROBE_PORT), timeout=timeout) as sock:
+            sock.settimeout(max(timeout - (time.monotonic() - start), 0.001))
+            sock.sendall(_SMB2_NEGOTIATE_MESSAGE)
+            _recv_exactly(sock, 4)
+            if _recv_exactly(sock, 4) != _SMB2_MAGIC:
+                return None
+            return time.monotonic() - start
+    except OSError:
+        return None
+
+
+def rank_dcs(servers, probe=probe_dc, workers=DC_PROBE_WORKERS):
+    '''
+    Probe *servers* concurrently and return them ordered by latency,
+    unreachable ones last in their original order.
+    '''
+    servers = [dc for dc in dict.fromkeys(servers) if dc]
+    if not servers:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(servers))) as executor:
+        latencies = list(executor.map(probe, servers))
+    measured = dict(zip(servers, latencies))
+    ranking = sorted((dc for dc in servers if measured[dc] is not None), key=measured.get)
+    ranking.extend(dc for dc in servers if measured[dc] is None)
+    for dc in ranking:
+        latency = measured[dc]
+        log('D346', {'dc': dc,
+                     'latency_ms': None if latency is None else round(latency * 1000, 1)})
+    return ranking
+
+
+class DcTopologyCache:
+    '''
+    Topology of *realm* as seen from a host with *addresses*, valid for
+    *ttl* seconds (0 disables the cache), and the latency ranking of its
+    site DCs, valid for *ranking_ttl* seconds (0 ranks them every run).
+    '''
+    def __init__(self, realm, addresses, ttl, path=None, ranking_ttl=DC_RANKING_TTL):
+        self.realm = (realm or '').lower()
+        self.addresses = sorted(str(address) for address in addresses)
+        self.ttl = ttl
+        self.ranking_ttl = ranking_ttl
+        self.path = path if path is not None else dc_topology_file()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(entry, dict) or entry.get('format') != DC_TOPOLOGY_FORMAT:
+            return {}
+        return entry
+
+    def _read_valid(self, now):
+        '''
+        Return the stored entry and its age if it is valid for this
+        realm and these addresses, else (None, None).
+        '''
+        if self.ttl <= 0 or not self.realm:
+            return None, None
+        entry = self._read()
+        if entry.get('realm') != self.realm or entry.get('addresses') != self.addresses:
+            return None, None
+        age = now - entry.get('time', 0)
+        if age < 0 or age >= self.ttl or not isinstance(entry.get('topology'), dict):
+            return None, None
+        return entry, age
+
+    def load(self, now=None):
+        '''
+        Return the stored topology dict or None if there is no valid
+        entry for this realm and these addresses.
+        '''
+        entry, age = self._read_valid(time.time() if now is None else now)
+        if entry is None:
+            return None
+        log('D344', {'realm': self.realm, 'age': int(age)})
+        return entry['topology']
+
+    def load_ranking(self, servers, now=None):
+        '''
+        Return the stored ranking of *servers* or None if it expired or
+        was made for other servers.
+        '''
+        if self.ranking_ttl <= 0:
+            return None
+        now = time.time() if now is None else now
+        entry, _ = self._read_valid(now)
+        ranking = (entry or {}).get('ranking')
+        if not isinstance(ranking, dict) or not isinstance(ranking.get('servers'), list):
+            return None
+        age = now - ranking.get('time', 0)
+        if age < 0 or age >= self.ranking_ttl:
+            return None
+        if sorted(ranking['servers']) != sorted(dict.fromkeys(dc for dc in servers if dc)):
+            return None
+        return ranking['servers']
+
+    def save_ranking(self, ranking, now=None):
+        '''
+        Store *ranking* in the valid entry, keeping the time the
+        topology was read; returns False if it was not stored.
+        '''
+        if self.ranking_ttl <= 0:
+            return False
+        now = time.time() if now is None else now
+        entry, _ = self._read_valid(now)
+        if entry is None:
+            return False
+        entry['ranking'] = {'time': now, 'servers': list(ranking)}
+        return self._write(entry)
+
+    def save(self, topology, now=None):
+        '''
+        Store *topology*; returns False if the cache is disabled or
+        could not be written.
+        '''
+        if self.ttl <= 0 or not self.realm:
+            return False
+        entry = {
+            'format': DC_TOPOLOGY_FORMAT,
+            'realm': self.realm,
+            'addresses': self.addresses,
+            'time': time.time() if now is None else now,
+            'topology': topology,
+        }
+        return self._write(entry)
+
+    def _write(self, entry):
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.dc-topology-',
+                                            dir=os.path.dirname(self.path))
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entry, f, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as exc:
+            log('D345', {'path': self.path, 'exc': str(exc)})
+            return False
+        return True
+
+    def invalidate(self):
+        '''
+        Drop the stored topology so the next run reads it from LDAP.
+        '''
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
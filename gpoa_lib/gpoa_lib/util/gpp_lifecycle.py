@@ -213,19 +213,6 @@ def get_or_generate_uid(element):
     return generate_element_uid(class_name)
 
 
-def sanitize_for_json(value):
-    '''
-    Sanitize value for JSON storage in dconf.
-    Convert special characters as needed.
-
-    :param value: Any value to sanitize
-    :return: Sanitized string
-    '''
-    if isinstance(value, str):
-        return value.replace('"', '″').replace("'", '″')
-    return value
-
-
 def _object_to_dict(obj):
     '''
     Convert an object with attributes to dictionary.
@@ -260,7 +247,7 @@ def _value_to_serializable(value):
     if value is None:
         return None
     elif isinstance(value, str):
-        return sanitize_for_json(value)
+        return value
     elif isinstance(value, (int, float, bool)):
         return value
     elif isinstance(value, (list, tuple)):
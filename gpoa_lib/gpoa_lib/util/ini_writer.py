@@ -17,6 +17,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+def format_ini_value(value):
+    '''
+    Return *value* as it is written into a dconf INI file: integers
+    as is, everything else as a double-quoted string.
+    '''
+    if isinstance(value, int):
+        return f'{value}'
+    return f'"{value}"'
+
+
 def write_ini_sections(file_obj, data):
     '''
     Write a nested dict as dconf INI sections to a file object.
@@ -36,8 +46,5 @@ def write_ini_sections(file_obj, data):
             for key, value in section_data.items():
                 if not key:
                     continue
-                if isinstance(value, int):
-                    file_obj.write(f'{key} = {value}\n')
-                else:
-                    file_obj.write(f'{key} = "{value}"\n')
+                file_obj.write(f'{key} = {format_ini_value(value)}\n')
         file_obj.write('\n')
@@ -0,0 +1,246 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Reader and writer of KConfig INI files such as ``~/.config/kdeglobals``.
+
+Nested groups are written as ``[Group][Subgroup]``, entries and groups
+may carry the ``[$i]`` immutability marker, and group names, keys and
+values are escaped the way KConfig does it.  Lines which are not
+changed, comments included, are kept as they are, so a file is written
+only when an entry really changed.
+'''
+
+import os
+import re
+import tempfile
+
+
+KCONFIG_GROUP = 'group'
+KCONFIG_KEY = 'key'
+KCONFIG_VALUE = 'value'
+
+_OPTION = re.compile(r'\[([^\]]*)\]')
+_ESCAPE = re.compile(r'\\(x[0-9a-fA-F]{2}|.)')
+_UNESCAPED = {'s': ' ', 't': '\t', 'n': '\n', 'r': '\r', '\\': '\\'}
+
+
+def kconfig_escape(text, kind=KCONFIG_VALUE):
+    '''
+    Escape *text* for use as a group name, a key or a string value.
+    '''
+    result = []
+    for char in text:
+        if char == '\\':
+            result.append('\\\\')
+        elif char == '\n':
+            result.append('\\n')
+        elif char == '\t':
+            result.append('\\t')
+        elif char == '\r':
+            result.append('\\r')
+        elif (ord(char) < 32
+              or (char == '=' and kind == KCONFIG_KEY)
+              or (char in '[]' and kind != KCONFIG_VALUE)):
+            result.append('\\x{:02x}'.format(ord(char)))
+        else:
+            result.append(char)
+    if text and kind != KCONFIG_GROUP:
+        # Leading and trailing spaces are stripped on reading
+        if text[0] == ' ':
+            result[0] = '\\s'
+        if text[-1] == ' ':
+            result[-1] = '\\s'
+    return ''.join(result)
+
+
+def kconfig_unescape(text):
+    '''
+    Reverse kconfig_escape(). Unknown escapes such as the ``\\;`` of
+    lists are kept.
+    '''
+    def unescape(match):
+        code = match.group(1)
+        if code.startswith('x') and len(code) == 3:
+            return chr(int(code[1:], 16))
+        return _UNESCAPED.get(code, match.group(0))
+    return _ESCAPE.sub(unescape, text)
+
+
+def kconfig_group(section):
+    '''
+    Return the group path of a policy section, where nested groups are
+    separated by ``)(``.
+    '''
+    return tuple(section.split(')('))
+
+
+def _parse_group(line):
+    '''
+    Return the group path of a ``[Group][Subgroup]`` line and whether
+    the group is immutable.
+    '''
+    path = [kconfig_unescape(name) for name in _OPTION.findall(line.strip())]
+    immutable = bool(path) and path[-1] == '$i'
+    if immutable:
+        path.pop()
+    return tuple(path), immutable
+
+
+def _parse_entry(line):
+    '''
+    Return (key, options, value) of an entry line or None for blank
+    lines and comments.
+    '''
+    stripped = line.strip()
+    if not stripped or stripped.startswith('#') or '=' not in stripped:
+        return None
+    left, _, value = stripped.partition('=')
+    key, bracket, options = left.rstrip().partition('[')
+    return (kconfig_unescape(key.strip()), _OPTION.findall(bracket + options),
+            kconfig_unescape(value.strip()))
+
+
+def _is_immutable(options):
+    return any(option.startswith('$') and 'i' in option for option in options)
+
+
+def _has_locale(options):
+    return any(not option.startswith('$') for option in options)
+
+
+class _Group:
+    def __init__(self, path, header=None):
+        self.path = path
+        self.header = header
+        self.lines = []
+
+
+class KConfigFile:
+    '''
+    Contents of one KConfig file, parsed from *text*.
+    '''
+    def __init__(self, text=''):
+        # Entries before the first group header
+        self.groups = [_Group(None)]
+        for line in text.splitlines():
+            if line.strip().startswith('['):
+                path, _ = _parse_group(line)
+                if path:
+                    self.groups.append(_Group(path, line))
+                    continue
+            self.groups[-1].lines.append(line)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Read the file at *path*; a missing file is an empty one.
+        '''
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls(f.read())
+        except FileNotFoundError:
+            return cls()
+
+    def _group(self, path):
+        for group in self.groups:
+            if group.path == path:
+                return group
+        return None
+
+    def get(self, path, key):
+        '''
+        Return (value, immutable) of *key* in the group *path* or None.
+        '''
+        group = self._group(tuple(path))
+        if group is None:
+            return None
+        for line in group.lines:
+            entry = _parse_entry(line)
+            if entry is not None and entry[0] == key and not _has_locale(entry[1]):
+                return entry[2], _is_immutable(entry[1])
+        return None
+
+    def set(self, path, key, value, immutable=False):
+        '''
+        Set *key* of the group *path* to the string *value*, replacing
+        the locked and unlocked entries of the key.
+        '''
+        path = tuple(path)
+        line = '{}{}={}'.format(kconfig_escape(key, KCONFIG_KEY),
+                                '[$i]' if immutable else '',
+                                kconfig_escape(value, KCONFIG_VALUE))
+        group = self._group(path)
+        if group is None:
+            last = self.groups[-1]
+            if last.lines and last.lines[-1].strip():
+                last.lines.append('')
+            group = _Group(path, ''.join('[{}]'.format(kconfig_escape(name, KCONFIG_GROUP))
+                                         for name in path))
+            self.groups.append(group)
+
+        position = None
+        for index in reversed(range(len(group.lines))):
+            entry = _parse_entry(group.lines[index])
+            if entry is not None and entry[0] == key and not _has_locale(entry[1]):
+                del group.lines[index]
+                position = index
+        if position is None:
+            # After the last entry, before the blank lines ending the group
+            position = len(group.lines)
+            while position and not group.lines[position - 1].strip():
+                position -= 1
+        group.lines.insert(position, line)
+
+    def text(self):
+        lines = []
+        for group in self.groups:
+            if group.header is not None:
+                lines.append(group.header)
+            lines.extend(group.lines)
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def save(self, path, mode=0o644):
+        '''
+        Write the file to *path* unless its content did not change.
+        The file is replaced atomically, keeping the mode of an existing
+        file. Returns True when the file was written.
+        '''
+        text = self.text()
+        path = os.path.realpath(path)
+        try:
+            with open(path, encoding='utf-8') as f:
+                if f.read() == text:
+                    return False
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            pass
+        fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '-',
+                                        dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return True
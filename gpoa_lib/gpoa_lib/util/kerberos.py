@@ -16,18 +16,25 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import fcntl
 import os
+import shutil
+import struct
 import subprocess
+import tempfile
+import time
 
 from .logging import log
 from .samba import smbopts
 from .util import get_machine_name
 
 
-def machine_kinit(cache_name=None, backend_type=None):
-    '''
-    Perform kinit with machine credentials
-    '''
+MACHINE_CCACHE_DIR = '/var/cache/gpupdate/creds'
+# Tickets expiring sooner than this are renewed before a run
+MACHINE_TICKET_MIN_LIFETIME = 900
+
+
+def _machine_kinit_cmd(backend_type=None):
     if backend_type == 'freeipa':
         from .ipa import ipaopts
         keytab_path = '/etc/samba/samba.keytab'
@@ -42,6 +49,14 @@ def machine_kinit(cache_name=None, backend_type=None):
         realm = opts.get_realm()
         with_realm = '{}@{}'.format(host, realm)
         kinit_cmd = ['kinit', '-k', with_realm]
+    return with_realm, kinit_cmd
+
+
+def machine_kinit(cache_name=None, backend_type=None):
+    '''
+    Perform kinit with machine credentials
+    '''
+    _, kinit_cmd = _machine_kinit_cmd(backend_type)
 
     if cache_name:
         os.environ['KRB5CCNAME'] = 'FILE:{}'.format(cache_name)
@@ -61,6 +76,153 @@ def machine_kinit(cache_name=None, backend_type=None):
     return result
 
 
+def machine_ccache_path(backend_type=None):
+    '''
+    Path of the machine credential cache shared by gpoa processes.
+    '''
+    if backend_type == 'freeipa':
+        return os.path.join(MACHINE_CCACHE_DIR, 'krb5cc_machine_freeipa')
+    return os.path.join(MACHINE_CCACHE_DIR, 'krb5cc_machine')
+
+
+def is_machine_ccache(cache_name):
+    '''
+    Check if *cache_name* (a path or FILE: name) is a shared machine
+    credential cache which must outlive the process.
+    '''
+    if not cache_name:
+        return False
+    if cache_name.startswith('FILE:'):
+        cache_name = cache_name[5:]
+    return cache_name in (machine_ccache_path(), machine_ccache_path('freeipa'))
+
+
+def acquire_machine_ccache(backend_type=None, now=None):
+    '''
+    Point KRB5CCNAME to the shared machine credential cache and make
+    sure it holds a machine TGT valid for MACHINE_TICKET_MIN_LIFETIME
+    more seconds. The ticket is renewed or requested from the KDC only
+    when it is close to expiry. A file lock keeps concurrent gpoa
+    processes from doing it at the same time.
+    '''
+    principal, kinit_cmd = _machine_kinit_cmd(backend_type)
+    cache_path = machine_ccache_path(backend_type)
+    os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+
+    with open(cache_path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        now = time.time() if now is None else now
+        ticket = read_ccache_tgt(cache_path)
+        if ticket and ticket['client'].lower() == principal.lower():
+            logdata = {'cache': cache_path,
+                       'endtime': time.strftime('%Y-%m-%d %H:%M:%S',
+                                                time.localtime(ticket['endtime']))}
+            if ticket['endtime'] - now > MACHINE_TICKET_MIN_LIFETIME:
+                log('D347', logdata)
+                os.environ['KRB5CCNAME'] = 'FILE:{}'.format(cache_path)
+                return True
+            if (ticket['renew_till'] - now > MACHINE_TICKET_MIN_LIFETIME
+                    and _refresh_machine_ccache(cache_path, ['kinit', '-R'], renew=True)):
+                log('D348', logdata)
+                return True
+        return _refresh_machine_ccache(cache_path, kinit_cmd)
+
+
+def _refresh_machine_ccache(cache_path, kinit_cmd, renew=False):
+    # kinit writes into a copy which then atomically replaces the cache,
+    # processes using the cache never see it half-written
+    fd, tmp_path = tempfile.mkstemp(prefix='.krb5cc-', dir=os.path.dirname(cache_path))
+    os.close(fd)
+    try:
+        if renew:
+            shutil.copyfile(cache_path, tmp_path)
+        with subprocess.Popen(kinit_cmd + ['-c', tmp_path]) as proc:
+            proc.wait(timeout=15)
+        if proc.returncode != 0:
+            return False
+        os.replace(tmp_path, cache_path)
+    except (OSError, subprocess.SubprocessError) as exc:
+        log('E14', {'krb-exc': exc})
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    os.environ['KRB5CCNAME'] = 'FILE:{}'.format(cache_path)
+    return check_krb_ticket()
+
+
+def read_ccache_tgt(cache_path):
+    '''
+    Return {'client', 'endtime', 'renew_till'} of the longest valid TGT
+    of the default principal in a version 3 or 4 FILE credential cache,
+    or None.
+    '''
+    try:
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        return _parse_ccache_tgt(data)
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def _parse_ccache_tgt(data):
+    offset = 0
+
+    def read(fmt):
+        nonlocal offset
+        values = struct.unpack_from(fmt, data, offset)
+        offset += struct.calcsize(fmt)
+        return values
+
+    def read_data():
+        nonlocal offset
+        length, = read('>I')
+        if offset + length > len(data):
+            raise ValueError('Truncated credential cache')
+        value = data[offset:offset + length]
+        offset += length
+        return value
+
+    def read_principal():
+        _, count = read('>II')
+        realm = read_data().decode('utf-8')
+        components = [read_data().decode('utf-8') for _ in range(count)]
+        return realm, components
+
+    version, = read('>H')
+    if version not in (0x0503, 0x0504):
+        raise ValueError('Unsupported credential cache version')
+    if version == 0x0504:
+        header_length, = read('>H')
+        offset += header_length
+
+    realm, components = read_principal()
+    client = '{}@{}'.format('/'.join(components), realm)
+    tgt = None
+    while offset < len(data):
+        client_realm, client_components = read_principal()
+        server_realm, server_components = read_principal()
+        read('>HH' if version == 0x0503 else '>H')
+        read_data()
+        _, _, endtime, renew_till = read('>IIII')
+        read('>BI')
+        for _ in range(read('>I')[0]):
+            read('>H')
+            read_data()
+        for _ in range(read('>I')[0]):
+            read('>H')
+            read_data()
+        read_data()
+        read_data()
+        if (client_realm, client_components) != (realm, components):
+            continue
+        if server_components[:2] == ['krbtgt', realm] and server_realm == realm:
+            if tgt is None or endtime > tgt['endtime']:
+                tgt = {'client': client, 'endtime': endtime, 'renew_till': renew_till}
+    return tgt
+
+
 def machine_kdestroy(cache_name=None):
     '''
     Perform kdestroy for machine credentials
@@ -19,10 +19,14 @@
 import datetime
 import json
 import logging
+import threading
 
 from ..messages import message_with_code
 
 
+_watches = threading.local()
+
+
 class encoder(json.JSONEncoder):
     def default(self, obj):
         result = super(encoder, self)
@@ -53,6 +57,32 @@ class slogm(object):
 
         return result
 
+
+class log_watch:
+    '''
+    Context manager counting the warnings and errors the current thread
+    logs inside the block. Appliers which handle their own failures only
+    log them, so this tells whether such an applier completed.
+    '''
+    def __enter__(self):
+        self.problems = 0
+        self._outer = getattr(_watches, 'current', None)
+        _watches.current = self
+        return self
+
+    def __exit__(self, *exc_info):
+        _watches.current = self._outer
+        if self._outer is not None:
+            self._outer.problems += self.problems
+        return False
+
+
+def _note_level(mtype):
+    watch = getattr(_watches, 'current', None)
+    if watch is not None and mtype in ('W', 'E', 'F'):
+        watch.problems += 1
+
+
 def log(message_code, data=None):
     # New simplified format: message_code can be a single character for level
     # and data should contain the actual message
@@ -61,6 +91,7 @@ def log(message_code, data=None):
         mtype = message_code
 
         if data and isinstance(data, dict):
+            _note_level(mtype)
             # Extract message from data
             message = data.get('message', 'No message provided')
             plugin_name = data.get('plugin', 'UnknownPlugin')
@@ -87,6 +118,7 @@ def log(message_code, data=None):
 
     # Fallback to old format for compatibility
     mtype = message_code[0] if isinstance(message_code, str) and len(message_code) > 0 else 'E'
+    _note_level(mtype)
 
     if 'I' == mtype:
         logging.info(slogm(message_with_code(message_code), data))
@@ -64,6 +64,18 @@ def cache_dir():
 
     return cachedir
 
+def policy_state_dir():
+    '''
+    Returns path pointing to gpupdate's runtime state directory which
+    is cleared on reboot
+    '''
+    statedir = pathlib.Path('/run/gpupdate')
+
+    if not statedir.exists():
+        statedir.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    return statedir
+
 def file_cache_dir():
     '''
     Returns path pointing to gpupdate's cache directory
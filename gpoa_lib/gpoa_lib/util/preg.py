@@ -83,8 +83,9 @@ def preg_keymap(preg):
     return keymap
 
 
-def merge_polfile(preg, sid=None, reg_name='registry', reg_path=None, policy_name='Unknown', username='Machine', gpo_info=None):
-    pregfile = load_preg(preg)
+def merge_polfile(preg, sid=None, reg_name='registry', reg_path=None, policy_name='Unknown', username='Machine', gpo_info=None, pregfile=None):
+    if pregfile is None:
+        pregfile = load_preg(preg)
     if sid is None and username == 'Machine':
         load_preg_dconf(pregfile, preg, policy_name, None, gpo_info)
     else:
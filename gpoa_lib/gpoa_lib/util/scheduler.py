@@ -0,0 +1,155 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Concurrent execution of appliers which do not share state.
+
+Every task declares the shared resources it reads and writes.  A
+resource is a name such as ``'dconf'`` or ``'systemd'``, or a path
+``'file:/etc/polkit-1'`` which also covers everything below it.  A task
+waits for every task before it in the given order which writes what it
+reads or writes, or reads what it writes.  A task which writes ``None``
+waits for all tasks before it and all tasks after it wait for it, so
+conflicting tasks still run in their original order.
+
+Log records of a task run in a worker thread are held back and passed
+to the handlers once all tasks before it in the order were logged, so
+the log reads as if the tasks ran one after another.
+'''
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import logging
+import threading
+
+
+FILE_RESOURCE = 'file:'
+
+
+def _covers(first, second):
+    if first == second:
+        return True
+    if first.startswith(FILE_RESOURCE) and second.startswith(FILE_RESOURCE):
+        first = first.rstrip('/') + '/'
+        second = second.rstrip('/') + '/'
+        return first.startswith(second) or second.startswith(first)
+    return False
+
+
+def resources_conflict(first, second):
+    '''
+    Check whether two tasks, given as (reads, writes), may not run at
+    the same time.
+    '''
+    first_reads, first_writes = first
+    second_reads, second_writes = second
+    if first_writes is None or second_writes is None:
+        return True
+    return any(_covers(written, used)
+               for written in first_writes
+               for used in tuple(second_reads) + tuple(second_writes)) \
+        or any(_covers(written, read)
+               for written in second_writes
+               for read in first_reads)
+
+
+def dependency_graph(tasks):
+    '''
+    Return {name: set of names it waits for} for *tasks*, a list of
+    (name, reads, writes) in the order they would run one by one.
+    '''
+    graph = dict()
+    for position, (name, reads, writes) in enumerate(tasks):
+        graph[name] = {earlier for earlier, earlier_reads, earlier_writes in tasks[:position]
+                       if resources_conflict((earlier_reads, earlier_writes), (reads, writes))}
+    return graph
+
+
+class _LogCapture(logging.Filter):
+    '''
+    Root logger filter keeping the records of the tasks in worker
+    threads until they are flushed in task order.
+    '''
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+        self._records = dict()
+
+    def filter(self, record):
+        records = getattr(self._local, 'records', None)
+        if records is None:
+            return True
+        records.append(record)
+        return False
+
+    def run(self, name, func):
+        self._local.records = list()
+        try:
+            func(name)
+        finally:
+            self._records[name] = self._local.records
+            self._local.records = None
+
+    def flush(self, name):
+        logger = logging.getLogger()
+        for record in self._records.pop(name, ()):
+            logger.handle(record)
+
+
+def run_tasks(tasks, func, workers=4):
+    '''
+    Call *func(name)* for *tasks*, a list of (name, reads, writes), with
+    up to *workers* threads, and return {name: exception} for the calls
+    which raised. One worker runs the tasks one by one in the calling
+    thread.
+    '''
+    errors = dict()
+    names = [name for name, _, _ in tasks]
+    if workers <= 1 or len(tasks) <= 1:
+        for name in names:
+            try:
+                func(name)
+            except Exception as exc:
+                errors[name] = exc
+        return errors
+
+    graph = dependency_graph(tasks)
+    capture = _LogCapture()
+    logger = logging.getLogger()
+    logger.addFilter(capture)
+    pending = list(names)
+    running = dict()
+    done = set()
+    flushed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for name in [name for name in pending if graph[name] <= done]:
+                    pending.remove(name)
+                    running[executor.submit(capture.run, name, func)] = name
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        errors[name] = future.exception()
+                    done.add(name)
+                while flushed < len(names) and names[flushed] in done:
+                    capture.flush(names[flushed])
+                    flushed += 1
+    finally:
+        logger.removeFilter(capture)
+    return errors
@@ -0,0 +1,211 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Long-lived gpoa process serving runs over a Unix socket.
+
+The process keeps its imports, caches and parsed configuration between
+runs.  A client connects, sends one JSON line ``{"argv": [...]}`` with
+the gpoa command line and receives JSON lines ``{"stdout": text}`` and
+``{"stderr": text}`` with the output of the run, followed by
+``{"exitcode": n}``.  Requests are processed one at a time, only root
+may connect.  Runs started at the same time wait in the listen queue.
+A user pass is not forwarded here while a computer pass is running or
+pending, since it would hold the service while waiting for it.
+
+The socket is taken from systemd socket activation if present,
+otherwise it is created at the given path.
+'''
+
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import struct
+import time
+
+from .logging import log
+
+
+SERVE_SOCKET = '/run/gpupdate/gpoa.sock'
+SD_LISTEN_FDS_START = 3
+# Longest accepted request line
+SERVE_MAX_REQUEST = 65536
+EXIT_REJECTED = 2
+
+
+def systemd_listen_socket():
+    '''
+    Return the first socket passed by systemd socket activation or None.
+    '''
+    if os.environ.get('LISTEN_PID') != str(os.getpid()):
+        return None
+    try:
+        fds = int(os.environ.get('LISTEN_FDS', '0'))
+    except ValueError:
+        return None
+    for name in ('LISTEN_PID', 'LISTEN_FDS', 'LISTEN_FDNAMES'):
+        os.environ.pop(name, None)
+    if fds < 1:
+        return None
+    return socket.socket(fileno=SD_LISTEN_FDS_START)
+
+
+def peer_uid(conn):
+    '''
+    Return the UID of the process on the other end of a Unix socket.
+    '''
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', creds)
+    return uid
+
+
+class _ReplyStream(io.TextIOBase):
+    '''
+    Text stream forwarding what is written to it to the client as JSON
+    lines. Output is dropped once the client went away.
+    '''
+    def __init__(self, conn, name):
+        self._conn = conn
+        self._name = name
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text and self._conn is not None:
+            try:
+                send_message(self._conn, {self._name: text})
+            except OSError:
+                self._conn = None
+        return len(text)
+
+
+def send_message(conn, message):
+    conn.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def read_request(conn):
+    '''
+    Read the request line and return its argv or None if it is malformed.
+    '''
+    data = b''
+    while not data.endswith(b'\n') and len(data) <= SERVE_MAX_REQUEST:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    try:
+        argv = json.loads(data.decode('utf-8'))['argv']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+        return None
+    return argv
+
+
+class GpoaServer:
+    '''
+    Accept connections on *socket_path* and process each request with
+    *handler(argv)*, which returns the exit code of the run.
+    '''
+    def __init__(self, handler, socket_path=SERVE_SOCKET):
+        self.handler = handler
+        self.socket_path = socket_path
+        self._created = False
+
+    def listen(self):
+        sock = systemd_listen_socket()
+        if sock is not None:
+            return sock
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o755, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        sock.listen(16)
+        self._created = True
+        return sock
+
+    def serve(self, sock=None, max_requests=None):
+        '''
+        Process requests until interrupted, or until *max_requests*
+        were processed.
+        '''
+        if sock is None:
+            sock = self.listen()
+        log('I38', {'socket': self.socket_path})
+        served = 0
+        try:
+            while max_requests is None or served < max_requests:
+                conn, _ = sock.accept()
+                with conn:
+                    self.process(conn)
+                served += 1
+        finally:
+            sock.close()
+            if self._created:
+                with contextlib.suppress(OSError):
+                    os.unlink(self.socket_path)
+
+    def process(self, conn):
+        try:
+            uid = peer_uid(conn)
+            argv = read_request(conn)
+            if uid != 0 or argv is None:
+                log('W57', {'uid': uid})
+                send_message(conn, {'exitcode': EXIT_REJECTED})
+                return
+        except OSError as exc:
+            log('W57', {'exc': str(exc)})
+            return
+
+        start = time.monotonic()
+        exitcode = self.run(conn, argv)
+        log('D349', {'argv': argv, 'exitcode': exitcode,
+                     'seconds': round(time.monotonic() - start, 3)})
+        with contextlib.suppress(OSError):
+            send_message(conn, {'exitcode': exitcode})
+
+    def run(self, conn, argv):
+        '''
+        Run *handler* with its output sent to the client, then put the
+        logging configuration of the server back.
+        '''
+        logger = logging.getLogger()
+        handlers, level = list(logger.handlers), logger.level
+        try:
+            with contextlib.redirect_stdout(_ReplyStream(conn, 'stdout')), \
+                    contextlib.redirect_stderr(_ReplyStream(conn, 'stderr')):
+                return self.handler(argv)
+        except SystemExit as exc:
+            if exc.code is None:
+                return 0
+            return exc.code if isinstance(exc.code, int) else 1
+        except Exception as exc:
+            log('E82', {'argv': argv, 'exc': str(exc)})
+            return 1
+        finally:
+            for handler in logger.handlers:
+                if handler not in handlers:
+                    handler.close()
+            logger.handlers = handlers
+            logger.setLevel(level)
@@ -21,7 +21,7 @@ import os
 import signal
 
 from .arguments import ExitCodeUpdater
-from .kerberos import machine_kdestroy
+from .kerberos import is_machine_ccache, machine_kdestroy
 
 
 def signal_handler(sig_number, frame):
@@ -29,8 +29,10 @@ def signal_handler(sig_number, frame):
     # Ignore extra signals
     signal.signal(sig_number, signal.SIG_IGN)
 
-    # Kerberos cache cleanup on interrupt
-    machine_kdestroy()
+    # Kerberos cache cleanup on interrupt, the shared machine cache
+    # is kept for the next run
+    if not is_machine_ccache(os.environ.get('KRB5CCNAME')):
+        machine_kdestroy()
 
     os._exit(ExitCodeUpdater.EXIT_SIGINT)
 
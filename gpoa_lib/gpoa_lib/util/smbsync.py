@@ -0,0 +1,276 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Incremental copy of GPT directories from an SMB share with libsmbclient.
+
+Every copied tree has a manifest with the version from its GPT.INI and
+the size and modification time of every remote file.  A tree whose
+GPT.INI version matches the manifest is not walked at all, otherwise
+only files whose size or modification time changed are downloaded and
+files removed on the server are removed locally.
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import re
+import tempfile
+import threading
+
+import smbc
+
+from .logging import log
+
+
+MANIFEST_FORMAT = 1
+
+_GPT_INI_VERSION = re.compile(r'^\s*Version\s*=\s*(\d+)', re.IGNORECASE | re.MULTILINE)
+
+
+def parse_gpt_version(data):
+    '''
+    Return the Version value of GPT.INI contents or None.
+    '''
+    if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        text = data.decode('utf-16', errors='replace')
+    else:
+        text = data.decode('utf-8', errors='replace')
+    match = _GPT_INI_VERSION.search(text)
+    return match.group(1) if match else None
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('format') != MANIFEST_FORMAT:
+        return {}
+    return manifest
+
+
+def save_manifest(path, manifest):
+    manifest = dict(manifest, format=MANIFEST_FORMAT)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '-',
+                                    dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class _Tree:
+    def __init__(self, remote_url, local_path, manifest_path):
+        self.remote_url = remote_url.rstrip('/')
+        self.local_path = local_path
+        self.manifest_path = manifest_path
+        self.manifest = load_manifest(manifest_path)
+        self.version = None
+        self.cached = False
+        self.listed = False
+        self.complete = False
+        self.lock = threading.Lock()
+        self.remote_files = []
+        self.files = {}
+        self.stats = {'fetched': 0, 'kept': 0, 'removed': 0, 'failed': 0}
+
+
+class SmbTreeSync:
+    '''
+    Synchronize remote directory trees into local directories using a
+    pool of *workers* threads, each with its own libsmbclient context
+    made by *context_factory*.
+    '''
+    def __init__(self, workers=4, context_factory=None, blocksize=65536):
+        self.workers = max(1, workers)
+        if context_factory is None:
+            context_factory = lambda: smbc.Context(use_kerberos=1)
+        self._context_factory = context_factory
+        self._local = threading.local()
+        self.blocksize = blocksize
+
+    def _context(self):
+        context = getattr(self._local, 'context', None)
+        if context is None:
+            context = self._context_factory()
+            self._local.context = context
+        return context
+
+    def sync(self, trees):
+        '''
+        Synchronize *trees*, a list of (remote_url, local_path,
+        manifest_path), and return for each of them a dict with the
+        number of fetched, kept, removed and failed files and whether
+        the cached copy was up to date.
+        '''
+        trees = [_Tree(*tree) for tree in trees]
+        if not trees:
+            return []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._list_tree, trees))
+            jobs = [(tree, rel_path) for tree in trees for rel_path in tree.remote_files]
+            list(executor.map(lambda job: self._sync_file(*job), jobs))
+        results = []
+        for tree in trees:
+            if tree.listed:
+                self._finish_tree(tree)
+            results.append(dict(tree.stats, cached=tree.cached))
+        return results
+
+    def _list_tree(self, tree):
+        context = self._context()
+        try:
+            root_entries = context.opendir(tree.remote_url).getdents()
+        except Exception as exc:
+            log('W12', {'remote_folder_path': tree.remote_url, 'exception': str(exc)})
+            return
+        for entry in root_entries:
+            if entry.smbc_type == smbc.FILE and entry.name.lower() == 'gpt.ini':
+                try:
+                    tree.version = parse_gpt_version(
+                        self._read(context, '{}/{}'.format(tree.remote_url, entry.name)))
+                except Exception as exc:
+                    log('W13', {'file': entry.name, 'exception': str(exc)})
+                break
+
+        files = tree.manifest.get('files', {})
+        if (tree.version is not None and tree.manifest.get('version') == tree.version
+                and all(os.path.isfile(os.path.join(tree.local_path, rel_path))
+                        for rel_path in files)):
+            tree.cached = True
+            tree.stats['kept'] = len(files)
+            log('D342', {'path': tree.local_path, 'version': tree.version})
+            return
+
+        remote_files = []
+        tree.complete = self._walk(context, tree.remote_url, '', root_entries, remote_files)
+        tree.remote_files = remote_files
+        tree.listed = True
+
+    def _walk(self, context, remote_url, rel_dir, entries, remote_files):
+        complete = True
+        for entry in entries:
+            if entry.name in ('.', '..'):
+                continue
+            rel_path = os.path.join(rel_dir, entry.name)
+            if entry.smbc_type == smbc.DIR:
+                url = '{}/{}'.format(remote_url, rel_path)
+                try:
+                    subentries = context.opendir(url).getdents()
+                except Exception as exc:
+                    log('W12', {'remote_folder_path': url, 'exception': str(exc)})
+                    complete = False
+                    continue
+                complete &= self._walk(context, remote_url, rel_path, subentries, remote_files)
+            elif entry.smbc_type == smbc.FILE:
+                remote_files.append(rel_path)
+        return complete
+
+    def _sync_file(self, tree, rel_path):
+        context = self._context()
+        url = '{}/{}'.format(tree.remote_url, rel_path)
+        local_file = os.path.join(tree.local_path, rel_path)
+        try:
+            stat = context.stat(url)
+            stamp = [stat[6], stat[8]]
+            if (tree.manifest.get('files', {}).get(rel_path) == stamp
+                    and os.path.isfile(local_file)):
+                self._count(tree, rel_path, stamp, 'kept')
+                return
+            os.makedirs(os.path.dirname(local_file), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(local_file) + '-',
+                                            dir=os.path.dirname(local_file))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    self._read(context, url, f)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, local_file)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._count(tree, rel_path, stamp, 'fetched')
+        except Exception as exc:
+            log('W13', {'file': url, 'exception': str(exc)})
+            self._count(tree, rel_path, None, 'failed')
+
+    @staticmethod
+    def _count(tree, rel_path, stamp, stat_name):
+        with tree.lock:
+            if stamp is not None:
+                tree.files[rel_path] = stamp
+            tree.stats[stat_name] += 1
+
+    def _read(self, context, url, dest=None):
+        handle = context.open(url, os.O_RDONLY)
+        chunks = []
+        try:
+            while True:
+                data = handle.read(self.blocksize)
+                if not data:
+                    break
+                if dest is None:
+                    chunks.append(data)
+                else:
+                    dest.write(data)
+        finally:
+            handle.close()
+        return b''.join(chunks)
+
+    def _finish_tree(self, tree):
+        if tree.complete:
+            self._remove_stale(tree)
+        else:
+            # Nothing is removed after an incomplete listing
+            tree.version = None
+        if tree.stats['failed']:
+            # Files that failed are checked again on the next run
+            tree.version = None
+        log('D343', dict(tree.stats, path=tree.local_path, version=tree.version))
+        try:
+            os.makedirs(os.path.dirname(tree.manifest_path), exist_ok=True)
+            save_manifest(tree.manifest_path, {'version': tree.version, 'files': tree.files})
+        except OSError as exc:
+            log('W13', {'file': tree.manifest_path, 'exception': str(exc)})
+
+    def _remove_stale(self, tree):
+        remote = set(tree.remote_files)
+        for dirpath, dirnames, filenames in os.walk(tree.local_path, topdown=False):
+            for filename in filenames:
+                local_file = os.path.join(dirpath, filename)
+                if os.path.relpath(local_file, tree.local_path) not in remote:
+                    try:
+                        os.unlink(local_file)
+                        tree.stats['removed'] += 1
+                    except OSError:
+                        pass
+            if dirpath != tree.local_path:
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    pass
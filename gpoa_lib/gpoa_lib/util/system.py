@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import contextlib
+import fcntl
 import json
 import locale
 import os
@@ -26,6 +28,7 @@ import sys
 
 from .dbus import dbus_session
 from .logging import log
+from .paths import policy_state_dir
 from .util import get_user_info
 
 
@@ -170,4 +173,50 @@ def with_privileges(username, func):
         log('D308', {'exc': str(exc)})
     os.close(wfd)
 
-    sys.exit(exitcode)
\ No newline at end of file
+    sys.exit(exitcode)
+
+
+def _state_lock_file(name):
+    return open(os.path.join(str(policy_state_dir()), name), 'a')
+
+
+@contextlib.contextmanager
+def policy_apply_lock():
+    '''
+    Serialize the parts of concurrent gpoa runs which write shared
+    system state: dconf databases, files in /etc and applier state.
+    '''
+    with _state_lock_file('apply.lock') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            log('D350')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+@contextlib.contextmanager
+def machine_pass_lock():
+    '''
+    Mark a computer pass as running for its whole run. gpupdate takes
+    it as well from before it starts the passes until the computer pass
+    finished, so that a user pass which gets ahead of the computer gpoa
+    process still waits for it. Computer passes do not wait for each
+    other here, see wait_machine_pass().
+    '''
+    with _state_lock_file('machine-pass.lock') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH)
+        yield
+
+
+def wait_machine_pass():
+    '''
+    Wait until the computer passes which are running have finished, so
+    that a user pass applies its policies after the computer policies.
+    '''
+    with _state_lock_file('machine-pass.lock') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            log('D368')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
@@ -0,0 +1,240 @@
+#
+# GPOA - GPO Applier for Linux
+#
+# Copyright (C) 2026 BaseALT Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Replication of GPT directories from the SYSVOL share of AD DCs into the
+``gpo_cache`` directory, in the layout used by samba's
+``check_refresh_gpo_list()``: the path below ``sysvol`` with every
+directory and file name in upper case.
+
+The computer and user passes may replicate the same GPO at the same
+time, so every GPO is fetched and renamed into place under an exclusive
+lock on a file in ``.locks`` of the cache, and a GPT whose content did
+not change is left in place for the parsers of the other pass.
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import fcntl
+import filecmp
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+from .logging import log
+
+try:
+    from samba import NTSTATUSError
+    from samba.credentials import SMB_SIGNING_REQUIRED
+    from samba.samba3 import libsmb_samba_internal as libsmb
+except ImportError:
+    NTSTATUSError = None
+    SMB_SIGNING_REQUIRED = None
+    libsmb = None
+
+
+FILE_ATTRIBUTE_DIRECTORY = 0x10
+LOCK_DIR = '.locks'
+
+
+def sysvol_relative_path(file_sys_path):
+    '''
+    Return the part of a GPO file_sys_path below the ``sysvol`` share,
+    refusing paths that escape it.
+    '''
+    dirs = [part for part in re.split(r'/|\\', file_sys_path) if part]
+    lower_dirs = [part.lower() for part in dirs]
+    if 'sysvol' in lower_dirs:
+        dirs = dirs[lower_dirs.index('sysvol') + 1:]
+    if not dirs or '..' in dirs:
+        raise OSError('Unsafe SYSVOL path: {}'.format(file_sys_path))
+    return os.path.join(*dirs)
+
+
+def same_tree(first, second):
+    '''
+    Check whether two directory trees have the same names and contents.
+    '''
+    comparison = filecmp.dircmp(first, second, ignore=[])
+    if (comparison.left_only or comparison.right_only or comparison.common_funny
+            or comparison.funny_files or comparison.diff_files):
+        return False
+    return all(same_tree(os.path.join(first, name), os.path.join(second, name))
+               for name in comparison.common_dirs)
+
+
+class SysvolReplicator:
+    '''
+    Copy the GPT directories of GPOs from SYSVOL with a pool of
+    *workers* threads.  Authenticated SMB sessions are kept per DC and
+    handed from one GPO to the next, every GPO is first downloaded into
+    a temporary directory and then renamed into place, and each GPO
+    falls back to the next server of the list it is given on its own.
+    '''
+    def __init__(self, lp, creds, cache_path, workers=4, connect=None, dc_errors=None):
+        self.lp = lp
+        self.creds = creds
+        self.cache_path = cache_path
+        self.workers = max(1, workers)
+        self._connect = connect if connect is not None else self._smb_connect
+        if dc_errors is None:
+            dc_errors = (NTSTATUSError,) if NTSTATUSError is not None else ()
+        self._dc_errors = dc_errors
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def _smb_connect(self, dc):
+        # Signing is a property of the shared credentials object, so it
+        # is switched for the time of the connection only
+        with self._lock:
+            saved_signing_state = self.creds.get_smb_signing()
+            self.creds.set_smb_signing(SMB_SIGNING_REQUIRED)
+            try:
+                try:
+                    return libsmb.Conn(dc, 'sysvol', lp=self.lp, creds=self.creds,
+                                       multi_threaded=True)
+                except TypeError:
+                    return libsmb.Conn(dc, 'sysvol', lp=self.lp, creds=self.creds)
+            finally:
+                self.creds.set_smb_signing(saved_signing_state)
+
+    def _acquire(self, dc):
+        with self._lock:
+            idle = self._idle.get(dc)
+            if idle:
+                return idle.pop()
+        log('D341', {'dc': dc})
+        return self._connect(dc)
+
+    def _release(self, dc, conn):
+        with self._lock:
+            self._idle.setdefault(dc, []).append(conn)
+
+    def close(self):
+        '''
+        Drop the idle SMB sessions.
+        '''
+        with self._lock:
+            self._idle.clear()
+
+    def replicate(self, gpos, servers):
+        '''
+        Replicate GPOs having a file_sys_path, trying *servers* in order
+        for every GPO.  When a GPO could not be fetched from any of them
+        the error of the first such GPO is raised after the others are
+        done.
+        '''
+        servers = [dc for dc in dict.fromkeys(servers) if dc]
+        jobs = {}
+        for gpo in gpos:
+            if gpo.file_sys_path:
+                rel_path = sysvol_relative_path(gpo.file_sys_path)
+                jobs.setdefault(rel_path.upper(), (gpo, rel_path))
+        if not jobs:
+            return
+
+        def replicate_one(job):
+            gpo, rel_path = job
+            return self._replicate_gpo(gpo, rel_path, servers)
+
+        workers = min(self.workers, len(jobs))
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(replicate_one, job) for job in jobs.values()]
+            for future in futures:
+                future.result()
+        finally:
+            self.close()
+
+    def _replicate_gpo(self, gpo, rel_path, servers):
+        if not servers:
+            raise RuntimeError('No DC to replicate {} from'.format(rel_path))
+        for dc, next_dc in zip(servers, servers[1:] + [None]):
+            try:
+                conn = self._acquire(dc)
+                count = self._fetch(conn, rel_path)
+            except self._dc_errors as exc:
+                if next_dc is None:
+                    raise
+                logdata = {'gpo': gpo.name, 'dc': dc, 'smb_exc': str(exc),
+                           'action': 'Search another dc', 'another_dc': next_dc}
+                log('W11', logdata)
+                continue
+            self._release(dc, conn)
+            log('D340', {'gpo': gpo.name, 'dc': dc, 'files': count})
+            return
+
+    def _gpo_lock_file(self, rel_path):
+        lock_dir = os.path.join(self.cache_path, LOCK_DIR)
+        os.makedirs(lock_dir, mode=0o700, exist_ok=True)
+        name = rel_path.upper().replace(os.sep, '!')
+        return open(os.path.join(lock_dir, name + '.lock'), 'a')
+
+    def _fetch(self, conn, rel_path):
+        local_dir = os.path.join(self.cache_path, rel_path.upper())
+        parent_dir = os.path.dirname(local_dir)
+        os.makedirs(parent_dir, mode=0o755, exist_ok=True)
+        with self._gpo_lock_file(rel_path) as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                log('D371', {'gpo': rel_path})
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            tmp_dir = tempfile.mkdtemp(prefix='.' + os.path.basename(local_dir) + '-',
+                                       dir=parent_dir)
+            try:
+                os.chmod(tmp_dir, 0o755)
+                count = self._fetch_dir(conn, rel_path, tmp_dir)
+                if os.path.isdir(local_dir) and same_tree(tmp_dir, local_dir):
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                else:
+                    self._replace_dir(tmp_dir, local_dir)
+            except BaseException:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+        return count
+
+    def _fetch_dir(self, conn, remote_dir, local_dir):
+        count = 0
+        for fdata in conn.list(remote_dir):
+            name = fdata['name']
+            if name in ('.', '..'):
+                continue
+            remote_path = os.path.join(remote_dir, name)
+            local_path = os.path.join(local_dir, name.upper())
+            if fdata['attrib'] & FILE_ATTRIBUTE_DIRECTORY:
+                os.makedirs(local_path, mode=0o755, exist_ok=True)
+                count += self._fetch_dir(conn, remote_path, local_path)
+            else:
+                data = conn.loadfile(remote_path.replace('/', '\\'))
+                with open(local_path, 'wb') as f:
+                    f.write(data)
+                count += 1
+        return count
+
+    @staticmethod
+    def _replace_dir(new_dir, target_dir):
+        old_dir = None
+        if os.path.lexists(target_dir):
+            old_dir = tempfile.mkdtemp(prefix='.' + os.path.basename(target_dir) + '-old-',
+                                       dir=os.path.dirname(target_dir))
+            os.rename(target_dir, os.path.join(old_dir, 'gpt'))
+        os.rename(new_dir, target_dir)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
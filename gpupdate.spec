@@ -204,6 +204,8 @@ mkdir -p %buildroot%_sysconfdir/%name
 touch %buildroot%_sysconfdir/%name/environment
 
 install -Dm0644 dist/%name.service %buildroot%_unitdir/%name.service
+install -Dm0644 dist/gpoa.service %buildroot%_unitdir/gpoa.service
+install -Dm0644 dist/gpoa.socket %buildroot%_unitdir/gpoa.socket
 install -Dm0644 dist/%name.timer %buildroot%_unitdir/%name.timer
 install -Dm0644 dist/%name-scripts-run.service %buildroot%_unitdir/%name-scripts-run.service
 install -Dm0644 dist/%name-user.service %buildroot%{_user_unitdir}/%name-user.service
@@ -228,9 +230,11 @@ done
 
 %preun
 %preun_service gpupdate
+%preun_service gpoa
 
 %post
 %post_service gpupdate
+%post_service gpoa
 if [ -x "/bin/systemctl" ]; then
     gpupdate-setup update
 fi
@@ -260,6 +264,8 @@ fi
 %_datadir/%name
 %_unitdir/%name.service
 %_unitdir/%name-scripts-run.service
+%_unitdir/gpoa.service
+%_unitdir/gpoa.socket
 %_unitdir/%name.timer
 %_man1dir/gpoa.1.*
 %_man1dir/gpupdate.1.*
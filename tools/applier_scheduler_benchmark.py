@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+
+#Benchmark for the applier scheduler: runs the machine appliers, each
+#replaced by a sleep of the given duration, one by one as gpoa used to
+#and through the scheduler using the resources the applier classes
+#declare, and compares the wall time.
+#
+#Usage: applier_scheduler_benchmark.py [milliseconds] [workers]
+#  milliseconds - time taken by every applier (default: 100)
+#  workers      - scheduler threads (default: 4)
+
+import os
+import sys
+import time
+
+_root = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+sys.path.insert(0, os.path.join(_root, 'gpoa_lib'))
+sys.path.insert(0, os.path.join(_root, 'gpoa'))
+
+from frontend.frontend_manager import _MACHINE_APPLIERS, load_applier_class
+from util.scheduler import dependency_graph, run_tasks
+
+
+def applier_tasks():
+    tasks = []
+    for applier_name, (module_name, class_name, _) in _MACHINE_APPLIERS.items():
+        try:
+            applier_class = load_applier_class(module_name, class_name)
+            tasks.append((applier_name, applier_class.reads, applier_class.writes))
+        except Exception as exc:
+            print('{}: not loaded ({}), runs alone'.format(applier_name, exc))
+            tasks.append((applier_name, (), None))
+    return tasks
+
+
+def timed(tasks, seconds, workers):
+    start = time.perf_counter()
+    run_tasks(tasks, lambda name: time.sleep(seconds), workers)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    seconds = (int(sys.argv[1]) if len(sys.argv) > 1 else 100) / 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    tasks = applier_tasks()
+
+    graph = dependency_graph(tasks)
+    for name, _, _ in tasks:
+        print('{:16s} waits for {}'.format(name, ', '.join(sorted(graph[name])) or '-'))
+
+    serial = timed(tasks, seconds, 1)
+    print('serial:    {:3d} appliers {:10.4f} s'.format(len(tasks), serial))
+    scheduled = timed(tasks, seconds, workers)
+    print('scheduled: {:3d} appliers {:10.4f} s ({} workers)'.format(len(tasks), scheduled, workers))
+    print('speedup: {:.1f}x'.format(serial / scheduled))
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+
+#Benchmark for reading policy keys from dconf: compares the former
+#`dconf list`/`dconf read` subprocess path with the in-process GVDB reader.
+#
+#Usage: dconf_read_benchmark.py [profile] [prefix]
+#  profile - dconf profile name or path (default: system)
+#  prefix  - directory to read (default: /Software/BaseALT/Policies/)
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'gpoa_lib'))
+
+from gpoa_lib.storage.dconf_engine import DconfEngine
+
+
+class ForkCounter:
+    def __init__(self):
+        self.count = 0
+        self._popen = subprocess.Popen
+
+    def __enter__(self):
+        counter = self
+
+        class CountingPopen(self._popen):
+            def __init__(self, *args, **kwargs):
+                counter.count += 1
+                super().__init__(*args, **kwargs)
+
+        subprocess.Popen = CountingPopen
+        return self
+
+    def __exit__(self, *exc):
+        subprocess.Popen = self._popen
+
+
+def subprocess_list(path, env, result):
+    output = subprocess.run(['dconf', 'list', path], env=env,
+                            capture_output=True, text=True).stdout
+    for name in output.split():
+        if name.endswith('/'):
+            subprocess_list(path + name, env, result)
+        else:
+            result.append(path + name)
+    return result
+
+
+def subprocess_read(keys, env):
+    return {key: subprocess.run(['dconf', 'read', key], env=env,
+                                capture_output=True, text=True).stdout.strip()
+            for key in keys}
+
+
+def native_read(prefix, env):
+    engine = DconfEngine.from_env(env)
+    return {key: engine.read(key) for key in engine.list_keys(prefix)}
+
+
+def measure(func, *args):
+    with ForkCounter() as forks:
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+    return result, forks.count, elapsed
+
+
+if __name__ == '__main__':
+    profile = sys.argv[1] if len(sys.argv) > 1 else 'system'
+    prefix = sys.argv[2] if len(sys.argv) > 2 else '/Software/BaseALT/Policies/'
+    env = dict(os.environ, DCONF_PROFILE=profile)
+
+    native, native_forks, native_time = measure(native_read, prefix, env)
+    print('native:     {:6d} keys {:6d} forks {:10.4f} s'.format(len(native), native_forks, native_time))
+
+    if not shutil.which('dconf'):
+        print('subprocess: skipped, dconf utility is not installed')
+        sys.exit()
+
+    def legacy(prefix, env):
+        return subprocess_read(subprocess_list(prefix, env, []), env)
+
+    legacy_values, legacy_forks, legacy_time = measure(legacy, prefix, env)
+    print('subprocess: {:6d} keys {:6d} forks {:10.4f} s'.format(len(legacy_values), legacy_forks, legacy_time))
+    if native_time:
+        print('speedup:    {:.1f}x'.format(legacy_time / native_time))
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+
+#Benchmark for GPP state lookups: compares the former per-element
+#is_element_applied()/find_removed_elements() path, which decodes the stored
+#previous elements on every check and scans them linearly, with the UID index
+#of GppStateManager.
+#
+#Usage: gpp_state_benchmark.py [elements] [legacy_sample]
+#  elements      - number of applyOnce elements (default: 10000)
+#  legacy_sample - number of checks timed on the legacy path, the total is
+#                  extrapolated from them (default: 100)
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'gpoa_lib'))
+
+from gpoa_lib.storage import gpp_state
+from gpoa_lib.storage.gpp_state import (
+    GppStateManager,
+    find_gpo_removed_elements,
+    find_removed_elements,
+    is_element_applied,
+)
+from gpoa_lib.storage.preference_codec import decode_preferences, encode_preferences
+
+
+def make_elements(count):
+    previous = []
+    for number in range(count):
+        previous.append({
+            'uid': '{{{:08X}-0000-0000-0000-000000000000}}'.format(number),
+            'policy_guid': '{{GPO{}}}'.format(number % 10),
+            'path': '/srv/files/file{}'.format(number),
+            'apply_once': True,
+            'remove_policy': number % 2 == 0,
+            'applied': '01.01.2026 10:00:00' if number % 3 == 0 else None,
+        })
+    current = [dict(elem, applied=None) for elem in previous[:count - count // 10]]
+    return previous, current
+
+
+def legacy(stored, current, gpos, sample):
+    with patch.object(gpp_state, 'get_previous_elements',
+                      side_effect=lambda *args: decode_preferences(stored)):
+        start = time.perf_counter()
+        skipped = sum(is_element_applied(elem, 'Files') for elem in current[:sample])
+        checks = time.perf_counter() - start
+        start = time.perf_counter()
+        previous = gpp_state.get_previous_elements('Files')
+        removed = find_removed_elements(current, previous)
+        removed.extend(find_gpo_removed_elements(gpos, previous))
+        cleanup = time.perf_counter() - start
+    return skipped, len(removed), checks * len(current) / sample + cleanup
+
+
+def indexed(stored, current, gpos):
+    with patch.object(gpp_state, 'get_previous_elements',
+                      side_effect=lambda *args: decode_preferences(stored)), \
+            patch.object(gpp_state, 'get_current_gpo_guids', return_value=gpos):
+        start = time.perf_counter()
+        manager = GppStateManager()
+        skipped = sum(manager.should_skip(elem, 'Files') for elem in current)
+        removed = manager.find_removed('Files', current)
+        elapsed = time.perf_counter() - start
+    return skipped, len(removed), elapsed
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    sample = max(1, min(sample, count))
+    previous, current = make_elements(count)
+    stored = encode_preferences(previous)
+    gpos = {'{{GPO{}}}'.format(number) for number in range(9)}
+
+    skipped, removed, elapsed = indexed(stored, current, gpos)
+    print('indexed: {:6d} elements {:6d} skipped {:6d} removed {:10.4f} s'.format(
+        len(current), skipped, removed, elapsed))
+
+    legacy_skipped, legacy_removed, legacy_elapsed = legacy(stored, current, gpos, sample)
+    print('legacy:  {:6d} elements {:6d} removed {:10.4f} s (extrapolated from {} checks)'.format(
+        len(current), legacy_removed, legacy_elapsed, sample))
+    if elapsed:
+        print('speedup: {:.1f}x'.format(legacy_elapsed / elapsed))